@@ -0,0 +1,172 @@
+"""Benchmark comparing get_data queries read by a single lazy scan against reading one file at a time, and reading
+many traces with one batch query against a query per trace, and repeating queries with the chunk cache or the query cache enabled.
+
+Reads a 26 year reference year mapping of the example traces. Run from the project root, after the example data has
+been parsed, with:
+
+    uv run python benchmarks/benchmark_get_data.py
+"""
+
+import tempfile
+import timeit
+from pathlib import Path
+
+import pandas as pd
+import polars as pl
+
+from isp_trace_parser import (
+    disable_chunk_cache,
+    disable_query_cache,
+    enable_chunk_cache,
+    enable_query_cache,
+    get_data,
+)
+from isp_trace_parser.parsed_store import get_partition_labels
+
+PARSED_DIRECTORY = Path("example_parsed_data")
+DIRECTORY = PARSED_DIRECTORY / "solar"
+PROJECT = "Adelaide Desalination Plant Solar Farm"
+REFERENCE_YEARS = {year: 2011 + year % 2 for year in range(2025, 2051)}
+
+
+def legacy_read(reference_years: dict[int, int]) -> pd.DataFrame:
+    """Reads each half-year file with pl.read_parquet, converting each year to pandas and concatenating the years,
+    as done before the reads of a query were combined."""
+    data = []
+    for year, reference_year in reference_years.items():
+        year_data = []
+        for partition in get_partition_labels(year, year, "fy", "half_year"):
+            filepath = get_data.filepath_writer(
+                "solar_project",
+                DIRECTORY,
+                partition=partition,
+                reference_year=reference_year,
+                project=PROJECT,
+            )
+            year_data.append(pl.read_parquet(filepath))
+        data.append(pl.concat(year_data).to_pandas())
+    return pd.concat(data)
+
+
+def read(reference_years: dict[int, int], output_format: str):
+    return get_data.solar_project_multiple_reference_years(
+        reference_years, PROJECT, DIRECTORY, output_format=output_format
+    )
+
+
+BATCH_TRACES = [
+    {"type": "solar_project", "project": PROJECT},
+    {"type": "wind_project", "project": "Bango 973 Wind Farm"},
+    {"type": "wind_area", "area": "Q1", "resource_quality": "WH"},
+    {
+        "type": "demand",
+        "subregion": "CNSW",
+        "scenario": "Green Energy Exports",
+        "poe": "POE10",
+        "demand_type": "OPSO_MODELLING",
+    },
+]
+
+
+def read_each_trace(reference_years: dict[int, int]) -> pl.DataFrame:
+    """Reads each trace with its own call, and aligns the traces on Datetime."""
+    data = [
+        get_data.solar_project_multiple_reference_years(
+            reference_years, PROJECT, DIRECTORY, output_format="polars"
+        ),
+        get_data.wind_project_multiple_reference_years(
+            reference_years,
+            "Bango 973 Wind Farm",
+            PARSED_DIRECTORY / "wind",
+            output_format="polars",
+        ),
+        get_data.wind_area_multiple_reference_years(
+            reference_years,
+            "Q1",
+            "WH",
+            PARSED_DIRECTORY / "wind",
+            output_format="polars",
+        ),
+        get_data.demand_multiple_reference_years(
+            reference_years,
+            "CNSW",
+            "Green Energy Exports",
+            "POE10",
+            "OPSO_MODELLING",
+            PARSED_DIRECTORY / "demand",
+            output_format="polars",
+        ),
+    ]
+    wide = data[0].rename({"Value": "0"})
+    for i, trace in enumerate(data[1:], start=1):
+        wide = wide.join(
+            trace.rename({"Value": str(i)}), on="Datetime", how="full", coalesce=True
+        )
+    return wide
+
+
+def read_batch(reference_years: dict[int, int]) -> pl.DataFrame:
+    return get_data.batch_multiple_reference_years(
+        BATCH_TRACES,
+        reference_years,
+        PARSED_DIRECTORY,
+        shape="wide",
+        output_format="polars",
+    )
+
+
+def run_benchmark(repeats: int = 10):
+    pd.testing.assert_frame_equal(
+        legacy_read(REFERENCE_YEARS), read(REFERENCE_YEARS, "pandas")
+    )
+    print(f"Reading {len(REFERENCE_YEARS)} years of a trace, best of {repeats}:")
+    for name, query in [
+        ("legacy", lambda: legacy_read(REFERENCE_YEARS)),
+        ("single scan, pandas", lambda: read(REFERENCE_YEARS, "pandas")),
+        ("single scan, polars", lambda: read(REFERENCE_YEARS, "polars")),
+    ]:
+        best = min(timeit.repeat(query, number=1, repeat=repeats))
+        print(f"  {name:<22} {best * 1000:8.1f} ms")
+
+    print(f"Reading {len(BATCH_TRACES)} traces as a wide table, best of {repeats}:")
+    for name, query in [
+        ("call per trace", lambda: read_each_trace(REFERENCE_YEARS)),
+        ("batch", lambda: read_batch(REFERENCE_YEARS)),
+    ]:
+        best = min(timeit.repeat(query, number=1, repeat=repeats))
+        print(f"  {name:<22} {best * 1000:8.1f} ms")
+
+    print(f"Repeating the batch query, best of {repeats}:")
+    cache = enable_chunk_cache()
+    try:
+        best = min(
+            timeit.repeat(lambda: read_batch(REFERENCE_YEARS), number=1, repeat=repeats)
+        )
+    finally:
+        disable_chunk_cache()
+    print(f"  {'chunk cache':<22} {best * 1000:8.1f} ms")
+    stats = cache.stats()
+    print(
+        f"  {stats.entries} files, {stats.size_bytes / 1e6:.1f} MB cached, "
+        f"hit rate {stats.hit_rate:.0%}"
+    )
+
+    print(f"Repeating a {len(REFERENCE_YEARS)} year query, best of {repeats}:")
+    with tempfile.TemporaryDirectory() as cache_directory:
+        enable_query_cache(cache_directory)
+        try:
+            for output_format in ["pandas", "polars"]:
+                best = min(
+                    timeit.repeat(
+                        lambda: read(REFERENCE_YEARS, output_format),
+                        number=1,
+                        repeat=repeats,
+                    )
+                )
+                print(f"  {'query cache, ' + output_format:<22} {best * 1000:8.1f} ms")
+        finally:
+            disable_query_cache()
+
+
+if __name__ == "__main__":
+    run_benchmark()
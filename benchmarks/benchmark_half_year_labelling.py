@@ -0,0 +1,79 @@
+"""Benchmark comparing add_partition_as_column with half-year partitions against the previous map_elements based
+implementation of half-year labelling.
+
+Uses the full-horizon solar and wind traces in example_input_data. Run from the project root with:
+
+    uv run python benchmarks/benchmark_half_year_labelling.py
+"""
+
+import timeit
+from datetime import timedelta
+from pathlib import Path
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from isp_trace_parser import trace_formatter
+from isp_trace_parser.parsed_store import add_partition_as_column
+from isp_trace_parser.trace_restructure_helper_functions import read_trace_csv
+
+TRACES = [
+    Path("example_input_data/solar/Adelaide_Desal_FFP_RefYear2011.csv"),
+    Path("example_input_data/solar/REZ_Q1_Far_North_QLD_SAT_RefYear2011.csv"),
+    Path("example_input_data/wind/BANGOWF1_RefYear2011.csv"),
+    Path("example_input_data/wind/Q1_WH_Far_North_QLD_RefYear2011.csv"),
+]
+
+
+def legacy_add_half_year_as_column(trace: pl.DataFrame) -> pl.DataFrame:
+    """The half-year labelling prior to vectorisation, kept here as the benchmark baseline."""
+
+    def calculate_half_year(dt):
+        dt -= timedelta(seconds=1)
+        if dt.month < 7:
+            half_year = f"{dt.year}-1"
+        else:
+            half_year = f"{dt.year}-2"
+        return half_year
+
+    trace = trace.sort("Datetime")
+
+    trace = trace.with_columns(
+        (pl.col("Datetime").map_elements(calculate_half_year, pl.String).alias("HY"))
+    )
+
+    return trace
+
+
+def run_benchmark(repeats: int = 5):
+    print(f"Half-year labelling per trace, best of {repeats}:")
+    for filepath in TRACES:
+        trace = trace_formatter(read_trace_csv(filepath), method="reshape")
+        assert_frame_equal(
+            add_partition_as_column(trace, "half_year"),
+            legacy_add_half_year_as_column(trace).select(
+                "Datetime", "Value", pl.format("HalfYear{}", "HY").alias("Partition")
+            ),
+        )
+        legacy = min(
+            timeit.repeat(
+                lambda: legacy_add_half_year_as_column(trace),
+                number=1,
+                repeat=repeats,
+            )
+        )
+        vectorised = min(
+            timeit.repeat(
+                lambda: add_partition_as_column(trace, "half_year"),
+                number=1,
+                repeat=repeats,
+            )
+        )
+        print(
+            f"  {filepath.name:<45} {trace.height} rows: legacy {legacy * 1000:7.1f} ms, "
+            f"vectorised {vectorised * 1000:6.1f} ms, speedup {legacy / vectorised:6.1f} x"
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,47 @@
+"""Benchmark of the time taken to import isp_trace_parser and use one of its functions, in a fresh process.
+
+The package used to import every submodule, and with them pandas, joblib and yaml, when it was imported. The legacy
+statements below import all the public submodules to reproduce that. Run from the project root with:
+
+    uv run python benchmarks/benchmark_import_time.py
+"""
+
+import subprocess
+import sys
+
+LEGACY_IMPORTS = (
+    "import isp_trace_parser.get_data, isp_trace_parser.all_traces, isp_trace_parser.construct_reference_year_mapping, "
+    "isp_trace_parser.demand_traces, isp_trace_parser.parallel, isp_trace_parser.parse_plan, "
+    "isp_trace_parser.solar_traces, isp_trace_parser.trace_formatter, isp_trace_parser.wind_traces, joblib, yaml"
+)
+
+STATEMENTS = {
+    "import isp_trace_parser": "import isp_trace_parser",
+    "construct_reference_year_mapping": "from isp_trace_parser import construct_reference_year_mapping",
+    "parse_solar_traces": "from isp_trace_parser import parse_solar_traces",
+    "get_data": "from isp_trace_parser import get_data",
+}
+
+
+def time_in_new_process(statement: str) -> float:
+    """Returns the time taken to run statement in a new Python process, measured in that process."""
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return float(output.stdout)
+
+
+def run_benchmark(repeats: int = 5):
+    print(f"Import time in a new process, best of {repeats}:")
+    best = min(time_in_new_process(LEGACY_IMPORTS) for _ in range(repeats))
+    print(f"  {'legacy (all submodules)':<35} {best * 1000:8.1f} ms")
+    for name, statement in STATEMENTS.items():
+        best = min(time_in_new_process(statement) for _ in range(repeats))
+        print(f"  {name:<35} {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    # Run once to write bytecode caches, so compiling isn't included in the timings.
+    time_in_new_process(LEGACY_IMPORTS)
+    run_benchmark()
@@ -0,0 +1,55 @@
+"""Benchmark comparing loading the name mapping configs from their YAML files against the compiled JSON file.
+
+Each parse call used to parse all the YAML configs it needed. Run from the project root with:
+
+    uv run python benchmarks/benchmark_name_mappings.py
+"""
+
+import timeit
+
+import yaml
+
+from isp_trace_parser import name_mappings
+from isp_trace_parser.name_mappings import (
+    MAPPING_CONFIGS_DIRECTORY,
+    MAPPING_NAMES,
+    load_name_mapping,
+)
+
+
+def load_from_yaml():
+    """Parses every YAML config, as done on each parse call before the mappings were compiled and cached."""
+    for mapping_name in MAPPING_NAMES:
+        with open(MAPPING_CONFIGS_DIRECTORY / f"{mapping_name}.yaml", "r") as f:
+            yaml.safe_load(f)
+
+
+def load_from_compiled():
+    """Loads every mapping in a new process, from the compiled JSON file."""
+    load_name_mapping.cache_clear()
+    name_mappings._load_compiled_mappings.cache_clear()
+    name_mappings._source_hash.cache_clear()
+    for mapping_name in MAPPING_NAMES:
+        load_name_mapping(mapping_name)
+
+
+def load_cached():
+    """Loads every mapping again in the same process."""
+    for mapping_name in MAPPING_NAMES:
+        load_name_mapping(mapping_name)
+
+
+def run_benchmark(repeats: int = 20):
+    load_cached()
+    print(f"Loading all {len(MAPPING_NAMES)} name mappings, best of {repeats}:")
+    for name, load in [
+        ("yaml", load_from_yaml),
+        ("compiled json", load_from_compiled),
+        ("cached", load_cached),
+    ]:
+        best = min(timeit.repeat(load, number=1, repeat=repeats))
+        print(f"  {name:<15} {best * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
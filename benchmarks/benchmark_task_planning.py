@@ -0,0 +1,170 @@
+"""Benchmark comparing planning wind parse tasks from a metadata table against the previous per-file dict approach.
+
+Creates filenames for every wind project and area in the name mappings, for many reference years, without creating
+the files, so only the metadata extraction and task planning are timed. Run from the project root with:
+
+    uv run python benchmarks/benchmark_task_planning.py
+"""
+
+import os
+import timeit
+from collections import defaultdict
+from pathlib import Path
+
+import polars as pl
+
+from isp_trace_parser.metadata_extractors import (
+    FILENAME_PATTERNS,
+    extract_metadata_table,
+)
+from isp_trace_parser.name_mappings import load_name_mapping
+from isp_trace_parser.trace_restructure_helper_functions import (
+    ParseTask,
+    check_filter_by_metadata,
+    filter_mapping_by_names_in_input_files,
+    plan_tasks_from_metadata_table,
+)
+from isp_trace_parser.wind_traces import (
+    restructure_wind_project_mapping,
+    write_output_wind_area_filepath,
+    write_output_wind_project_filepath,
+)
+
+REFERENCE_YEARS = range(2011, 2024)
+RESOURCE_QUALITIES = ["WH", "WM", "WL", "WX", "WFL", "WFX"]
+
+
+def create_filepaths(project_mapping: dict, area_mapping: dict) -> list[str]:
+    project_names = {
+        name
+        for names in project_mapping.values()
+        for name in ([names] if isinstance(names, str) else names)
+    }
+    filenames = [
+        f"{name}_RefYear{year}.csv"
+        for name in project_names
+        for year in REFERENCE_YEARS
+    ]
+    filenames += [
+        f"{name}_{quality}_Area_Name_RefYear{year}.csv"
+        for name in area_mapping.values()
+        for quality in RESOURCE_QUALITIES
+        for year in REFERENCE_YEARS
+    ]
+    # Paths as strings, as listed by os.scandir, so both approaches create the Path objects of the tasks.
+    return [os.path.join("input", filename) for filename in filenames]
+
+
+def load_mappings() -> tuple[dict, dict]:
+    project_mapping = restructure_wind_project_mapping(
+        load_name_mapping("wind_project_mapping")
+    )
+    return project_mapping, dict(load_name_mapping("wind_area_mapping"))
+
+
+def legacy_extract_wind_trace_metadata(filename: str) -> dict:
+    """Matches a filename against each pattern in turn, as done before metadata was extracted as a table."""
+    for pattern, file_type in FILENAME_PATTERNS["wind"]:
+        match = pattern.match(filename)
+        if match:
+            metadata = {**match.groupdict(), "file_type": file_type}
+            metadata["reference_year"] = int(metadata["reference_year"])
+            return metadata
+    raise ValueError(f"Filename '{filename}' does not match the expected pattern")
+
+
+def legacy_plan(filepaths, project_mapping, area_mapping) -> list[ParseTask]:
+    """Per-file metadata extraction and dict based grouping, as used before the metadata table was introduced."""
+    filepaths = [Path(f) for f in filepaths]
+    file_metadata = {f: legacy_extract_wind_trace_metadata(f.name) for f in filepaths}
+    metadata_by_name = defaultdict(dict)
+    for filepath, metadata in file_metadata.items():
+        metadata_by_name[metadata["name"]][filepath] = metadata
+
+    def plan(output_name, input_names, group_by, write_output_filepath):
+        input_names = [input_names] if isinstance(input_names, str) else input_names
+        if input_names[0] not in metadata_by_name:
+            return []
+        groups = defaultdict(dict)
+        for name in input_names:
+            for filepath, metadata in metadata_by_name.get(name, {}).items():
+                key = tuple(metadata[f] for f in ["reference_year"] + group_by)
+                groups[key][filepath] = metadata
+        return [
+            ParseTask(
+                list(files),
+                {**next(iter(files.values())), "name": output_name},
+                write_output_filepath,
+            )
+            for files in groups.values()
+            if check_filter_by_metadata(next(iter(files.values())), None)
+        ]
+
+    tasks = []
+    for output_name, input_name in area_mapping.items():
+        tasks += plan(
+            output_name,
+            input_name,
+            ["resource_quality"],
+            write_output_wind_area_filepath,
+        )
+    for output_name, input_names in project_mapping.items():
+        tasks += plan(output_name, input_names, [], write_output_wind_project_filepath)
+    return tasks
+
+
+def table_plan(filepaths) -> list[ParseTask]:
+    """Metadata table planning with the trace name indexes of the mapping configs, as used by parse_wind_traces."""
+    file_metadata = extract_metadata_table(
+        [os.path.basename(f) for f in filepaths], "wind"
+    )
+    file_metadata = file_metadata.with_columns(pl.Series("filepath", filepaths)).drop(
+        "filename", "matched"
+    )
+    area_mapping = filter_mapping_by_names_in_input_files(
+        "wind_area_mapping", file_metadata["name"]
+    )
+    project_mapping = filter_mapping_by_names_in_input_files(
+        "wind_project_mapping", file_metadata["name"]
+    )
+    tasks = plan_tasks_from_metadata_table(
+        file_metadata,
+        area_mapping,
+        ["resource_quality"],
+        write_output_wind_area_filepath,
+    )
+    tasks += plan_tasks_from_metadata_table(
+        file_metadata, project_mapping, [], write_output_wind_project_filepath
+    )
+    return tasks
+
+
+def run_benchmark(repeats: int = 5):
+    project_mapping, area_mapping = load_mappings()
+    filepaths = create_filepaths(project_mapping, area_mapping)
+    legacy_tasks = legacy_plan(filepaths, project_mapping, area_mapping)
+    tasks = table_plan(filepaths)
+    assert sorted(map(str, (t.files for t in tasks))) == sorted(
+        map(str, (t.files for t in legacy_tasks))
+    )
+
+    print(
+        f"Planning {len(tasks)} tasks from {len(filepaths)} files, best of {repeats}:"
+    )
+    plans = [
+        ("legacy", lambda: legacy_plan(filepaths, project_mapping, area_mapping)),
+        ("metadata table", lambda: table_plan(filepaths)),
+    ]
+    for name, plan in plans:
+        best = min(
+            timeit.repeat(
+                plan,
+                number=1,
+                repeat=repeats,
+            )
+        )
+        print(f"  {name:<15} {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,109 @@
+"""Microbenchmark comparing the trace_formatter methods against the previous map_elements based implementation.
+
+Run from the project root with:
+
+    uv run python benchmarks/benchmark_trace_formatter.py
+"""
+
+import timeit
+from datetime import timedelta
+
+import numpy as np
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from isp_trace_parser import trace_formatter
+
+
+def generate_aemo_format_trace(start_year: int, end_year: int) -> pl.DataFrame:
+    """Random trace data in the AEMO format covering whole calendar years from start_year to end_year (inclusive)."""
+    dates = pl.date_range(
+        pl.date(start_year, 1, 1), pl.date(end_year, 12, 31), "1d", eager=True
+    )
+    values = np.random.rand(len(dates), 48)
+    return pl.DataFrame(
+        {
+            "Year": dates.dt.year().cast(pl.Int64),
+            "Month": dates.dt.month().cast(pl.Int64),
+            "Day": dates.dt.day().cast(pl.Int64),
+            **{f"{i:02d}": values[:, i - 1] for i in range(1, 49)},
+        }
+    )
+
+
+def legacy_trace_formatter(trace_data: pl.DataFrame) -> pl.DataFrame:
+    """The trace_formatter implementation prior to vectorisation, kept here as the benchmark baseline."""
+    value_vars = [f"{i:02d}" for i in range(1, 49)] + [str(i) for i in range(1, 10)]
+    value_vars = [v for v in value_vars if v in trace_data.columns]
+
+    trace_data = trace_data.unpivot(
+        index=["Year", "Month", "Day"],
+        on=value_vars,
+        variable_name="time_label",
+        value_name="Value",
+    )
+
+    def get_hour(time_label):
+        return timedelta(hours=int(time_label) // 2)
+
+    def get_minute(time_label):
+        return timedelta(minutes=int(time_label) % 2 * 30)
+
+    trace_data = trace_data.with_columns(
+        [
+            pl.col("time_label")
+            .map_elements(get_hour, return_dtype=pl.Duration)
+            .alias("Hour"),
+            pl.col("time_label")
+            .map_elements(get_minute, return_dtype=pl.Duration)
+            .alias("Minute"),
+            (
+                pl.col("Year").cast(pl.Utf8).str.zfill(2)
+                + "-"
+                + pl.col("Month").cast(pl.Utf8).str.zfill(2)
+                + "-"
+                + pl.col("Day").cast(pl.Utf8).str.zfill(2)
+                + " 00:00:00"
+            )
+            .str.strptime(pl.Datetime)
+            .alias("Datetime"),
+        ]
+    )
+
+    return (
+        trace_data.with_columns(
+            [(pl.col("Datetime") + pl.col("Hour") + pl.col("Minute")).alias("Datetime")]
+        )
+        .select(["Datetime", "Value"])
+        .sort("Datetime")
+    )
+
+
+def run_benchmark(start_year: int = 2021, end_year: int = 2054, repeats: int = 5):
+    trace = generate_aemo_format_trace(start_year, end_year)
+    assert_frame_equal(trace_formatter(trace), legacy_trace_formatter(trace))
+    assert_frame_equal(
+        trace_formatter(trace, method="reshape"), legacy_trace_formatter(trace)
+    )
+
+    print(
+        f"Formatting a {end_year - start_year + 1} year trace "
+        f"({trace.height} days, {trace.height * 48} half hours), best of {repeats}:"
+    )
+    timings = {}
+    for name, func in [
+        ("legacy map_elements", legacy_trace_formatter),
+        ("vectorised", trace_formatter),
+        ("reshape", lambda t: trace_formatter(t, method="reshape")),
+    ]:
+        timings[name] = min(
+            timeit.repeat(lambda: func(trace), number=1, repeat=repeats)
+        )
+        print(f"  {name:<22} {timings[name] * 1000:8.1f} ms")
+    for name in ["vectorised", "reshape"]:
+        speedup = timings["legacy map_elements"] / timings[name]
+        print(f"  speedup ({name}){' ' * (13 - len(name))}{speedup:8.1f} x")
+
+
+if __name__ == "__main__":
+    run_benchmark()
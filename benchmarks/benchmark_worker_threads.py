@@ -0,0 +1,82 @@
+"""Benchmark comparing parse throughput with and without a per-worker thread budget.
+
+Without a budget, each worker process starts a Polars thread pool with a thread per CPU, so n workers run about
+n x CPUs threads. With the budget set by ParallelConfig, the CPUs are divided between the workers. The example input
+data is copied several times so there are enough tasks to keep the workers busy, each copy with different reference
+years in its filenames so it is parsed as separate traces. Run from the project root with:
+
+    uv run python benchmarks/benchmark_worker_threads.py
+"""
+
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from isp_trace_parser import ParallelConfig, parse_all_traces
+from isp_trace_parser.parallel import available_cpu_count
+
+COPIES = 4
+TRACE_TYPES = ["solar", "wind", "demand"]
+
+
+def create_input_data(directory: Path) -> int:
+    """Copies the example input data COPIES times, shifting the reference years of each copy by 10 years, and
+    returns the number of files created."""
+    n_files = 0
+    for trace_type in TRACE_TYPES:
+        for copy in range(COPIES):
+            copy_directory = directory / trace_type / f"copy{copy}"
+            copy_directory.mkdir(parents=True)
+            for filepath in (Path("example_input_data") / trace_type).glob("*.csv"):
+                name = re.sub(
+                    r"(RefYear_?)(\d{4})",
+                    lambda match: f"{match[1]}{int(match[2]) + 10 * copy}",
+                    filepath.name,
+                )
+                shutil.copyfile(filepath, copy_directory / name)
+                n_files += 1
+    return n_files
+
+
+def time_parse(input_directory: Path, parallel_config: ParallelConfig) -> float:
+    with tempfile.TemporaryDirectory() as parsed_directory:
+        start = time.perf_counter()
+        parse_all_traces(
+            parsed_directory,
+            **{
+                f"{trace_type}_input_directory": input_directory / trace_type
+                for trace_type in TRACE_TYPES
+            },
+            parallel_config=parallel_config,
+        )
+        return time.perf_counter() - start
+
+
+def run_benchmark(repeats: int = 3):
+    n_cpus = available_cpu_count()
+    n_workers = ParallelConfig().resolve_n_workers()
+    configs = {
+        "uncoordinated": ParallelConfig(threads_per_worker=n_cpus),
+        "coordinated": ParallelConfig(),
+    }
+    with tempfile.TemporaryDirectory() as input_directory:
+        input_directory = Path(input_directory)
+        n_files = create_input_data(input_directory)
+        print(
+            f"Parsing {n_files} input files with {n_workers} workers on {n_cpus} CPUs:"
+        )
+        for name, config in configs.items():
+            threads = config.resolve_threads_per_worker(n_workers)
+            # The first run starts the worker processes, which isn't counted.
+            time_parse(input_directory, config)
+            best = min(time_parse(input_directory, config) for _ in range(repeats))
+            print(
+                f"  {name:<14} {threads:3d} threads per worker: {best:6.2f} s, "
+                f"{n_files / best:6.1f} input files per s"
+            )
+
+
+if __name__ == "__main__":
+    run_benchmark()
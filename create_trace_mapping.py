@@ -57,3 +57,6 @@ rezs = gets_rezs(workbook)
 wind_rez_mapping = draft_wind_rez_mapping(rezs, wind_traces)
 with open("draft_wind_rez_mapping.yaml", "w") as file:
     yaml.dump(wind_rez_mapping, file, default_flow_style=False)
+
+# After the drafts are reviewed and copied to src/isp_trace_name_mapping_configs, recompile the mappings loaded by the
+# parser with: python -m isp_trace_parser.name_mappings
@@ -1,11 +1,29 @@
-from isp_trace_parser import get_data
-from isp_trace_parser.construct_reference_year_mapping import (
-    construct_reference_year_mapping,
-)
-from isp_trace_parser.demand_traces import DemandMetadataFilter, parse_demand_traces
-from isp_trace_parser.solar_traces import SolarMetadataFilter, parse_solar_traces
-from isp_trace_parser.trace_formatter import trace_formatter
-from isp_trace_parser.wind_traces import WindMetadataFilter, parse_wind_traces
+"""Submodules are imported when one of their names is first used, so importing isp_trace_parser is fast, and scripts
+and worker processes only import the modules and dependencies (pandas, joblib and so on) that they use.
+"""
+
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from isp_trace_parser import get_data
+    from isp_trace_parser.all_traces import parse_all_traces
+    from isp_trace_parser.chunk_cache import disable_chunk_cache, enable_chunk_cache
+    from isp_trace_parser.construct_reference_year_mapping import (
+        construct_reference_year_mapping,
+    )
+    from isp_trace_parser.demand_traces import (
+        DemandMetadataFilter,
+        parse_demand_traces,
+    )
+    from isp_trace_parser.parallel import ParallelConfig
+    from isp_trace_parser.parse_plan import run_parse_plan
+    from isp_trace_parser.query_cache import disable_query_cache, enable_query_cache
+    from isp_trace_parser.solar_traces import SolarMetadataFilter, parse_solar_traces
+    from isp_trace_parser.trace_formatter import trace_formatter
+    from isp_trace_parser.wind_traces import WindMetadataFilter, parse_wind_traces
 
 __all__ = [
     "trace_formatter",
@@ -13,8 +31,62 @@ __all__ = [
     "parse_wind_traces",
     "parse_demand_traces",
     "parse_solar_traces",
+    "parse_all_traces",
     "construct_reference_year_mapping",
     "WindMetadataFilter",
     "SolarMetadataFilter",
     "DemandMetadataFilter",
+    "ParallelConfig",
+    "run_parse_plan",
+    "enable_chunk_cache",
+    "disable_chunk_cache",
+    "enable_query_cache",
+    "disable_query_cache",
 ]
+
+# The module each public name is defined in, the get_data module is itself public.
+_PUBLIC_NAME_MODULES = {
+    "trace_formatter": "isp_trace_parser.trace_formatter",
+    "get_data": "isp_trace_parser.get_data",
+    "parse_wind_traces": "isp_trace_parser.wind_traces",
+    "parse_demand_traces": "isp_trace_parser.demand_traces",
+    "parse_solar_traces": "isp_trace_parser.solar_traces",
+    "parse_all_traces": "isp_trace_parser.all_traces",
+    "construct_reference_year_mapping": "isp_trace_parser.construct_reference_year_mapping",
+    "WindMetadataFilter": "isp_trace_parser.wind_traces",
+    "SolarMetadataFilter": "isp_trace_parser.solar_traces",
+    "DemandMetadataFilter": "isp_trace_parser.demand_traces",
+    "ParallelConfig": "isp_trace_parser.parallel",
+    "run_parse_plan": "isp_trace_parser.parse_plan",
+    "enable_chunk_cache": "isp_trace_parser.chunk_cache",
+    "disable_chunk_cache": "isp_trace_parser.chunk_cache",
+    "enable_query_cache": "isp_trace_parser.query_cache",
+    "disable_query_cache": "isp_trace_parser.query_cache",
+}
+
+
+def __getattr__(name: str):
+    if name not in _PUBLIC_NAME_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_PUBLIC_NAME_MODULES[name])
+    value = module if name == "get_data" else getattr(module, name)
+    # Cached as a module attribute, so __getattr__ is only called the first time a name is used.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # The import system sets each submodule as an attribute of the package when it is first imported, which would
+        # hide the function construct_reference_year_mapping behind the submodule of the same name.
+        if name in _PUBLIC_NAME_MODULES and name != "get_data":
+            if isinstance(value, types.ModuleType):
+                return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
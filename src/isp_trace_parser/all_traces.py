@@ -0,0 +1,103 @@
+from pathlib import Path
+
+from pydantic import NonNegativeInt, PositiveInt, validate_call
+
+from isp_trace_parser import input_validation
+from isp_trace_parser.demand_traces import DemandMetadataFilter, plan_demand_directory
+from isp_trace_parser.manifest import ChangeDetection
+from isp_trace_parser.parallel import ParallelConfig
+from isp_trace_parser.parsed_store import OutputLayout, PartitionScheme
+from isp_trace_parser.scheduler import TraceDirectory, parse_trace_directories
+from isp_trace_parser.solar_traces import SolarMetadataFilter, plan_solar_directory
+from isp_trace_parser.trace_restructure_helper_functions import ErrorHandling
+from isp_trace_parser.wind_traces import WindMetadataFilter, plan_wind_directory
+
+
+@validate_call
+def parse_all_traces(
+    parsed_directory: str | Path,
+    solar_input_directory: str | Path | None = None,
+    wind_input_directory: str | Path | None = None,
+    demand_input_directory: str | Path | None = None,
+    use_concurrency: bool = True,
+    solar_filters: SolarMetadataFilter | None = None,
+    wind_filters: WindMetadataFilter | None = None,
+    demand_filters: DemandMetadataFilter | None = None,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
+    parallel_config: ParallelConfig | None = None,
+    incremental: bool = False,
+    change_detection: ChangeDetection = "size_mtime",
+    errors: ErrorHandling = "raise",
+    max_retries: NonNegativeInt = 0,
+    plan: bool = False,
+    shard_index: NonNegativeInt = 0,
+    num_shards: PositiveInt = 1,
+):
+    """Parses solar, wind and demand trace data in a single run.
+
+    The output is the same as calling parse_solar_traces, parse_wind_traces and parse_demand_traces with the
+    parsed directories '<parsed_directory>/solar', '<parsed_directory>/wind' and '<parsed_directory>/demand'. However,
+    the tasks for all trace types are planned first and then run by a single pool of workers, in order of decreasing
+    estimated cost (based on input file sizes), so workers aren't left idle waiting for the last tasks of one trace
+    type to finish before the next type is started.
+
+    Examples:
+
+    >>> parse_all_traces(
+    ... parsed_directory='example_parsed_data',
+    ... solar_input_directory='example_input_data/solar',
+    ... wind_input_directory='example_input_data/wind',
+    ... demand_input_directory='example_input_data/demand',
+    ... ) # doctest: +SKIP
+
+    Args:
+        parsed_directory: str or pathlib.Path, path to the directory where the parsed traces will be saved, each
+            trace type is saved in a subdirectory named 'solar', 'wind' or 'demand'.
+        solar_input_directory: str or pathlib.Path, optional, path to the solar trace data to parse.
+        wind_input_directory: str or pathlib.Path, optional, path to the wind trace data to parse.
+        demand_input_directory: str or pathlib.Path, optional, path to the demand trace data to parse.
+        use_concurrency: boolean, default True, specifies whether to use parallel processing.
+        solar_filters: SolarMetadataFilter, optional, which solar traces to parse, see parse_solar_traces.
+        wind_filters: WindMetadataFilter, optional, which wind traces to parse, see parse_wind_traces.
+        demand_filters: DemandMetadataFilter, optional, which demand traces to parse, see parse_demand_traces.
+        partition_scheme, output_layout, parallel_config, incremental, change_detection, errors, max_retries, plan,
+            shard_index and num_shards: the options shared by the parse functions, see
+            scheduler.parse_trace_directories.
+
+    Returns: None, or if errors is 'collect', a list of dicts describing the traces that failed to parse, or if plan
+        is True, a polars.DataFrame describing the parse tasks.
+    """
+    parsed_directory = input_validation.parsed_directory(parsed_directory)
+    planners = [
+        ("solar", solar_input_directory, solar_filters, plan_solar_directory),
+        ("wind", wind_input_directory, wind_filters, plan_wind_directory),
+        ("demand", demand_input_directory, demand_filters, plan_demand_directory),
+    ]
+    planners = [p for p in planners if p[1] is not None]
+    if not planners:
+        raise ValueError("At least one input directory must be provided.")
+
+    trace_directories = [
+        TraceDirectory(
+            plan_directory,
+            input_validation.input_directory(input_directory),
+            parsed_directory / trace_type,
+            filters,
+        )
+        for trace_type, input_directory, filters, plan_directory in planners
+    ]
+    return parse_trace_directories(
+        trace_directories,
+        use_concurrency=use_concurrency,
+        partition_scheme=partition_scheme,
+        output_layout=output_layout,
+        parallel_config=parallel_config,
+        incremental=incremental,
+        change_detection=change_detection,
+        errors=errors,
+        max_retries=max_retries,
+        plan=plan,
+        shard_index=shard_index,
+        num_shards=num_shards,
+    )
@@ -0,0 +1,189 @@
+"""An opt-in, in-process cache of decoded parquet files for the get_data functions.
+
+Repeated queries of the same traces, e.g. in sensitivity runs, re-read and re-decode the same partition files on
+every call. When the cache is enabled, each file read by a get_data query is kept in memory as a polars DataFrame,
+up to a budget of bytes, and the least recently used files are evicted when the budget is exceeded. The files of a
+query that aren't cached are read concurrently before the query is run over the data in memory, so each file is
+decoded once. Entries are keyed by filepath and checked against the file's modification time and size on every read,
+so a file that is rewritten, e.g. by re-parsing, is read again. Files of the consolidated layout are not cached, as
+reads of the consolidated file are filtered to a single trace by the parquet reader.
+"""
+
+import glob
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import polars as pl
+
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+class ChunkCacheStats(NamedTuple):
+    """Counts of the reads of a ChunkCache, for tuning its size.
+
+    Attributes:
+        hits: int, the number of files read from the cache.
+        misses: int, the number of files read from disk, including files that changed since they were cached.
+        evictions: int, the number of files evicted to stay within max_bytes.
+        entries: int, the number of files in the cache.
+        size_bytes: int, the estimated size of the files in the cache.
+        max_bytes: int, the budget of the cache.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        reads = self.hits + self.misses
+        return self.hits / reads if reads else 0.0
+
+
+class ChunkCache:
+    """A thread-safe, least recently used cache of decoded parquet files, limited to max_bytes.
+
+    Files larger than max_bytes are read but not cached. Two threads missing the same file at the same time may both
+    read it, the cache stays consistent and keeps one copy.
+
+    Examples:
+
+    >>> cache = ChunkCache(max_bytes=10_000_000)
+
+    >>> filepath = 'example_parsed_data/wind/RefYear2011/Area/Q1/WH/RefYear2011_Q1_WH_HalfYear2030-1.parquet'
+
+    >>> (data,) = cache.read_parquet([filepath])
+
+    >>> (data,) = cache.read_parquet([filepath])
+
+    >>> cache.stats().hits, cache.stats().misses
+    (1, 1)
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative.")
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[tuple[int, int], pl.DataFrame, int]] = (
+            OrderedDict()
+        )
+        self._size_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def read_parquet(self, filepaths: list[str]) -> list[pl.DataFrame]:
+        """Returns the data of each filepath, or of the files matching it if it is a glob pattern, from the cache
+        where possible, and reads the other files from disk concurrently."""
+        expanded = {
+            filepath: sorted(glob.glob(filepath))
+            if glob.has_magic(filepath)
+            else [filepath]
+            for filepath in dict.fromkeys(filepaths)
+        }
+        files = list(dict.fromkeys(f for fs in expanded.values() for f in fs))
+        versions = {f: _file_version(f) for f in files}
+
+        data = {}
+        with self._lock:
+            for f in files:
+                entry = self._entries.get(f)
+                if entry is not None and entry[0] == versions[f]:
+                    self._entries.move_to_end(f)
+                    data[f] = entry[1]
+                    self._hits += 1
+                else:
+                    self._misses += 1
+
+        missing = [f for f in files if f not in data]
+        if missing:
+            read = pl.collect_all([pl.scan_parquet(f) for f in missing])
+            with self._lock:
+                for f, frame in zip(missing, read):
+                    data[f] = frame
+                    self._put(f, versions[f], frame)
+
+        results = []
+        for filepath in filepaths:
+            frames = [data[f] for f in expanded[filepath]]
+            if not frames:
+                raise FileNotFoundError(f"No files match {filepath}.")
+            results.append(frames[0] if len(frames) == 1 else pl.concat(frames))
+        return results
+
+    def _put(self, filepath: str, version: tuple[int, int], frame: pl.DataFrame):
+        size = frame.estimated_size()
+        if filepath in self._entries:
+            self._size_bytes -= self._entries.pop(filepath)[2]
+        if size > self.max_bytes:
+            return
+        self._entries[filepath] = (version, frame, size)
+        self._size_bytes += size
+        while self._size_bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._size_bytes -= evicted_size
+            self._evictions += 1
+
+    def stats(self) -> ChunkCacheStats:
+        with self._lock:
+            return ChunkCacheStats(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(self._entries),
+                self._size_bytes,
+                self.max_bytes,
+            )
+
+    def clear(self) -> None:
+        """Removes all files from the cache and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+
+def _file_version(filepath: str) -> tuple[int, int]:
+    stat = os.stat(filepath)
+    return stat.st_mtime_ns, stat.st_size
+
+
+_chunk_cache: ChunkCache | None = None
+
+
+def enable_chunk_cache(max_bytes: int = DEFAULT_MAX_BYTES) -> ChunkCache:
+    """Caches the files read by the get_data functions in this process, see ChunkCache.
+
+    Replaces the cache of a previous call, so calling again with a different max_bytes starts an empty cache.
+
+    Examples:
+
+    >>> cache = enable_chunk_cache(max_bytes=2 * 1024**3)
+
+    >>> disable_chunk_cache()
+
+    Args:
+        max_bytes: int, default 1 GiB, the estimated size in memory of the decoded files the cache can hold.
+
+    Returns: the ChunkCache used, whose stats() give the hits and misses of the get_data functions.
+    """
+    global _chunk_cache
+    _chunk_cache = ChunkCache(max_bytes)
+    return _chunk_cache
+
+
+def disable_chunk_cache() -> None:
+    """Stops caching the files read by the get_data functions and frees the cached data."""
+    global _chunk_cache
+    _chunk_cache = None
+
+
+def get_chunk_cache() -> ChunkCache | None:
+    """Returns the cache used by the get_data functions, or None if caching isn't enabled."""
+    return _chunk_cache
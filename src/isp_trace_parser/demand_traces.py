@@ -1,21 +1,30 @@
-import functools
-import os
 from pathlib import Path
-from typing import Literal, Optional
+from typing import Literal, Mapping, Optional
 
-import yaml
-from joblib import Parallel, delayed
-from pydantic import BaseModel, validate_call
+import polars as pl
+from pydantic import BaseModel, NonNegativeInt, PositiveInt, validate_call
 
 from isp_trace_parser import input_validation
-from isp_trace_parser.metadata_extractors import extract_demand_trace_metadata
+from isp_trace_parser.manifest import ChangeDetection
+from isp_trace_parser.metadata_extractors import extract_metadata_dicts
+from isp_trace_parser.name_mappings import load_name_mapping
+from isp_trace_parser.parallel import (
+    ParallelConfig,
+)
+from isp_trace_parser.parsed_store import (
+    OutputLayout,
+    PartitionScheme,
+    format_partition_label,
+)
+from isp_trace_parser.scheduler import TraceDirectory, parse_trace_directories
 from isp_trace_parser.trace_restructure_helper_functions import (
-    add_half_year_as_column,
-    check_filter_by_metadata,
-    get_all_filepaths,
-    read_trace_csv,
-    save_half_year_chunk_of_trace,
-    trace_formatter,
+    ErrorHandling,
+    ParseTask,
+    describe_error,
+    filter_metadata_table,
+    metadata_table_from_dict,
+    run_parse_task,
+    scan_input_files,
 )
 
 
@@ -65,6 +74,16 @@ def parse_demand_traces(
     parsed_directory: str | Path,
     use_concurrency: bool = True,
     filters: DemandMetadataFilter | None = None,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
+    parallel_config: ParallelConfig | None = None,
+    incremental: bool = False,
+    change_detection: ChangeDetection = "size_mtime",
+    errors: ErrorHandling = "raise",
+    max_retries: NonNegativeInt = 0,
+    plan: bool = False,
+    shard_index: NonNegativeInt = 0,
+    num_shards: PositiveInt = 1,
 ):
     """Takes a directory with AEMO demand trace data and reformats the data, saving it to a new directory.
 
@@ -77,8 +96,8 @@ def parse_demand_traces(
     the data files with a directory structure that mirrors the new file naming convention. Firstly, the data format is
     changed to a two column format with a column "Datetime" specifying the end of the half hour period the measurement
     is for in the format %Y-%m-%d %HH:%MM%:%SS, and a column "Value" specifying the measurement value. The data is saved
-    in parquet format in half-yearly chunks to improved read speeds. The files are saved in with following
-    directory structure and naming convention:
+    in parquet format in half-yearly chunks to improved read speeds (see the partition_scheme option for other
+    chunk sizes). The files are saved in with following directory structure and naming convention:
 
          "<scenario>/RefYear<reference year>/<subregion ID>/<poe>/<data type>/"
          "<scenario>_RefYear<reference year>_<subregion ID>_<poe>_<data type>_HalfYear<year>-<half of year>.parquet"
@@ -97,9 +116,13 @@ def parse_demand_traces(
 
     Parse whole directory of trace data.
 
+    >>> import tempfile
+
+    >>> parsed_directory = tempfile.TemporaryDirectory()
+
     >>> parse_demand_traces(
     ... input_directory='example_input_data/demand',
-    ... parsed_directory='example_parsed_data/demand',
+    ... parsed_directory=parsed_directory.name,
     ... use_concurrency=False
     ... )
 
@@ -120,11 +143,12 @@ def parse_demand_traces(
 
     >>> parse_demand_traces(
     ... input_directory='example_input_data/demand',
-    ... parsed_directory='example_parsed_data/demand',
+    ... parsed_directory=parsed_directory.name,
     ... filters=metadata_filters,
     ... use_concurrency=False
     ... )
 
+    >>> parsed_directory.cleanup()
 
     Args:
         input_directory: str or pathlib.Path, path to data to parse.
@@ -132,36 +156,100 @@ def parse_demand_traces(
         use_concurrency: boolean, default True, specifies whether to use parallel processing
         filters: dict{str: list[str]}, dict that specifies which traces to parse, if a component
             of the metadata is missing from the dict no filtering on that component occurs. See example.
+        partition_scheme, output_layout, parallel_config, incremental, change_detection, errors, max_retries, plan,
+            shard_index and num_shards: the options shared by the parse functions, see
+            scheduler.parse_trace_directories.
 
-    Returns: None
+    Returns: None, or if errors is 'collect', a list of dicts describing the traces that failed to parse, or if plan
+        is True, a polars.DataFrame describing the parse tasks.
     """
-    input_directory = input_validation.input_directory(input_directory)
-    parsed_directory = input_validation.parsed_directory(parsed_directory)
-
-    files = get_all_filepaths(input_directory)
-
-    with open(
-        Path(__file__).parent.parent
-        / Path("isp_trace_name_mapping_configs/demand_scenario_mapping.yaml"),
-        "r",
-    ) as f:
-        demand_scenario_mapping = yaml.safe_load(f)
-
-    partial_func = functools.partial(
-        restructure_demand_file,
-        demand_scenario_mapping=demand_scenario_mapping,
-        output_directory=parsed_directory,
-        filters=filters,
+    trace_directory = TraceDirectory(
+        plan_demand_directory,
+        input_validation.input_directory(input_directory),
+        input_validation.parsed_directory(parsed_directory),
+        filters,
+    )
+    return parse_trace_directories(
+        [trace_directory],
+        use_concurrency=use_concurrency,
+        partition_scheme=partition_scheme,
+        output_layout=output_layout,
+        parallel_config=parallel_config,
+        incremental=incremental,
+        change_detection=change_detection,
+        errors=errors,
+        max_retries=max_retries,
+        plan=plan,
+        shard_index=shard_index,
+        num_shards=num_shards,
     )
 
-    if use_concurrency:
-        max_workers = os.cpu_count() - 2
 
-        Parallel(n_jobs=max_workers)(delayed(partial_func)(file) for file in files)
+def plan_demand_directory(
+    input_directory: Path,
+    parsed_directory: Path,
+    filters: DemandMetadataFilter | None = None,
+    errors: list[dict] | None = None,
+) -> list[ParseTask]:
+    """
+    Plans the parse tasks for all demand traces in input_directory, to be saved in parsed_directory.
 
-    else:
-        for file in files:
-            partial_func(file)
+    If errors is a list, input files that can't be planned are skipped and described in errors, otherwise an
+    exception is raised.
+
+    Returns:
+        A list of ParseTask, one for each output trace.
+    """
+    file_metadata = scan_input_files(
+        input_directory,
+        "demand",
+        filters,
+        parsed_directory,
+        errors,
+    )
+
+    tasks = plan_demand_tasks_from_metadata_table(
+        file_metadata,
+        load_name_mapping("demand_scenario_mapping"),
+        filters,
+        parsed_directory,
+        errors,
+    )
+    return [task._replace(output_directory=parsed_directory) for task in tasks]
+
+
+def plan_demand_tasks_from_metadata_table(
+    file_metadata: pl.DataFrame,
+    demand_scenario_mapping: Mapping[str, str],
+    filters: DemandMetadataFilter | None = None,
+    output_directory: Path | None = None,
+    errors: list[dict] | None = None,
+) -> list[ParseTask]:
+    """Plans a task for each demand file in a metadata table, with the scenario mapped to the IASR workbook scenario
+    name. Files excluded by the filters, after the scenario is mapped, are skipped.
+
+    If errors is a list, files with a scenario that isn't in demand_scenario_mapping are skipped and described in
+    errors, otherwise a KeyError is raised.
+    """
+    is_mapped = pl.col("scenario").is_in(list(demand_scenario_mapping))
+    for file, scenario in (
+        file_metadata.filter(~is_mapped).select("filepath", "scenario").iter_rows()
+    ):
+        if errors is None:
+            raise KeyError(scenario)
+        errors.append(
+            describe_error(
+                [Path(file)], KeyError(scenario), output_directory, "planning"
+            )
+        )
+    file_metadata = file_metadata.filter(is_mapped).with_columns(
+        pl.col("scenario").replace_strict(dict(demand_scenario_mapping))
+    )
+    file_metadata = filter_metadata_table(file_metadata, filters)
+    return [
+        ParseTask([Path(metadata.pop("filepath"))], metadata, write_new_demand_filepath)
+        for metadata in file_metadata.iter_rows(named=True)
+    ]
 
 
 def restructure_demand_file(
@@ -169,6 +257,8 @@ def restructure_demand_file(
     demand_scenario_mapping: dict[str, str],
     output_directory: str | Path,
     filters: dict[str, list[str]] = None,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
 ) -> None:
     """
     Restructures a single demand trace file and saves it in a new format.
@@ -181,6 +271,8 @@ def restructure_demand_file(
         demand_scenario_mapping: Dictionary mapping raw scenario names to IASR workbook scenario names.
         output_directory: Directory where restructured files will be saved.
         filters: Filters to apply to the metadata. Keys are metadata fields, values are lists of allowed values.
+        partition_scheme: The period of data saved in each output file.
+        output_layout: 'partitioned' or 'consolidated', see scheduler.parse_trace_directories.
 
     Returns:
         None: Files are saved to disk, but the function doesn't return any value.
@@ -198,23 +290,14 @@ def restructure_demand_file(
 
         # This will process the input file and save it with the new scenario name in the specified output directory
     """
-    file_metadata = extract_demand_trace_metadata(input_filepath.name)
-    file_metadata["scenario"] = get_save_scenario_for_demand_trace(
-        file_metadata, demand_scenario_mapping
+    file_metadata = metadata_table_from_dict(
+        extract_metadata_for_all_demand_files([Path(input_filepath)])
     )
-    parse_file = check_filter_by_metadata(file_metadata, filters)
-    if parse_file:
-        trace = read_trace_csv(input_filepath)
-        trace = trace_formatter(trace)
-        trace = add_half_year_as_column(trace)
-        for half_year, chunk in trace.group_by("HY"):
-            save_half_year_chunk_of_trace(
-                chunk,
-                file_metadata,
-                half_year,
-                output_directory,
-                write_new_demand_filepath,
-            )
+    tasks = plan_demand_tasks_from_metadata_table(
+        file_metadata, demand_scenario_mapping, filters
+    )
+    for task in tasks:
+        run_parse_task(task, output_directory, partition_scheme, output_layout)
 
 
 def get_save_scenario_for_demand_trace(
@@ -249,7 +332,7 @@ def write_new_demand_filepath(metadata: dict[str, str]) -> str:
 
     return (
         f"{scenario}/RefYear{m['reference_year']}/{subregion}/{m['poe']}/{m['demand_type']}/"
-        f"{scenario}_RefYear{m['reference_year']}_{subregion}_{m['poe']}_{m['demand_type']}_HalfYear{m['hy']}.parquet"
+        f"{scenario}_RefYear{m['reference_year']}_{subregion}_{m['poe']}_{m['demand_type']}_{format_partition_label(m)}.parquet"
     )
 
 
@@ -265,5 +348,5 @@ def extract_metadata_for_all_demand_files(
     Returns:
         A dictionary with filepaths as keys and metadata dicts as values.
     """
-    file_metadata = [extract_demand_trace_metadata(str(f.name)) for f in filenames]
+    file_metadata = extract_metadata_dicts([f.name for f in filenames], "demand")
     return dict(zip(filenames, file_metadata))
@@ -1,12 +1,29 @@
-import itertools
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Mapping
 
+import numpy as np
 import pandas as pd
 import polars as pl
 from pydantic import validate_call
 
 from isp_trace_parser import input_validation
+from isp_trace_parser.chunk_cache import get_chunk_cache
+from isp_trace_parser.parsed_store import (
+    CONSOLIDATED_FILENAME,
+    STORE_OPTIONS_FILENAME,
+    get_partition_labels,
+    get_time_window,
+    partitions_align_with_years,
+    read_store_options,
+    scan_consolidated_trace,
+    trace_id_from_filepath,
+)
+from isp_trace_parser.query_cache import get_query_cache
+
+OutputFormat = Literal["pandas", "polars", "pyarrow", "pandas_arrow", "numpy"]
+
+# With output_format 'pyarrow' a pyarrow.Table is returned, pyarrow is an optional dependency so it isn't imported here.
+TraceData = pd.DataFrame | pl.DataFrame | dict[str, np.ndarray]
 
 
 @validate_call
@@ -17,7 +34,8 @@ def solar_project_single_reference_year(
     project: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads solar project trace data from an output directory created by isp_trace_parser.solar_trace_parser.
 
     Examples:
@@ -54,8 +72,9 @@ def solar_project_single_reference_year(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     input_validation.start_year_before_end_year(start_year, end_year)
@@ -68,6 +87,7 @@ def solar_project_single_reference_year(
         reference_year,
         year_type,
         directory,
+        output_format=output_format,
         **kwargs,
     )
 
@@ -78,7 +98,8 @@ def solar_project_multiple_reference_years(
     project: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads solar project trace data from an output directory created by isp_trace_parser.solar_trace_parser.
 
     Examples:
@@ -113,13 +134,19 @@ def solar_project_multiple_reference_years(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     kwargs = {"project": project}
     return generic_multi_reference_year_mapping(
-        "solar_project", reference_years, year_type, directory, **kwargs
+        "solar_project",
+        reference_years,
+        year_type,
+        directory,
+        output_format=output_format,
+        **kwargs,
     )
 
 
@@ -132,7 +159,8 @@ def solar_area_single_reference_year(
     technology: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads solar area trace data from an output directory created by isp_trace_parser.solar_trace_parser.
 
     Examples:
@@ -172,8 +200,9 @@ def solar_area_single_reference_year(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     input_validation.start_year_before_end_year(start_year, end_year)
@@ -185,6 +214,7 @@ def solar_area_single_reference_year(
         reference_year,
         year_type,
         directory,
+        output_format=output_format,
         **kwargs,
     )
 
@@ -196,7 +226,8 @@ def solar_area_multiple_reference_years(
     technology: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads solar area trace data from an output directory created by isp_trace_parser.solar_trace_parser.
 
     Examples:
@@ -233,13 +264,19 @@ def solar_area_multiple_reference_years(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     kwargs = {"area": area, "technology": technology}
     return generic_multi_reference_year_mapping(
-        "solar_area", reference_years, year_type, directory, **kwargs
+        "solar_area",
+        reference_years,
+        year_type,
+        directory,
+        output_format=output_format,
+        **kwargs,
     )
 
 
@@ -251,7 +288,8 @@ def wind_project_single_reference_year(
     project: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads wind project trace data from an output directory created by isp_trace_parser.wind_trace_parser.
 
     Examples:
@@ -289,8 +327,9 @@ def wind_project_single_reference_year(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     input_validation.start_year_before_end_year(start_year, end_year)
@@ -302,6 +341,7 @@ def wind_project_single_reference_year(
         reference_year,
         year_type,
         directory,
+        output_format=output_format,
         **kwargs,
     )
 
@@ -312,7 +352,8 @@ def wind_project_multiple_reference_years(
     project: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads wind project trace data from an output directory created by isp_trace_parser.wind_trace_parser.
 
     Examples:
@@ -347,13 +388,19 @@ def wind_project_multiple_reference_years(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     kwargs = {"project": project}
     return generic_multi_reference_year_mapping(
-        "wind_project", reference_years, year_type, directory, **kwargs
+        "wind_project",
+        reference_years,
+        year_type,
+        directory,
+        output_format=output_format,
+        **kwargs,
     )
 
 
@@ -366,7 +413,8 @@ def wind_area_single_reference_year(
     resource_quality: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads wind area trace data from an output directory created by isp_trace_parser.wind_trace_parser.
 
     Examples:
@@ -406,8 +454,9 @@ def wind_area_single_reference_year(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     input_validation.start_year_before_end_year(start_year, end_year)
@@ -419,6 +468,7 @@ def wind_area_single_reference_year(
         reference_year,
         year_type,
         directory,
+        output_format=output_format,
         **kwargs,
     )
 
@@ -430,7 +480,8 @@ def wind_area_multiple_reference_years(
     resource_quality: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads wind area trace data from an output directory created by isp_trace_parser.restructure_solar_directory.
 
     Examples:
@@ -467,13 +518,19 @@ def wind_area_multiple_reference_years(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     kwargs = {"area": area, "resource_quality": resource_quality}
     return generic_multi_reference_year_mapping(
-        "wind_area", reference_years, year_type, directory, **kwargs
+        "wind_area",
+        reference_years,
+        year_type,
+        directory,
+        output_format=output_format,
+        **kwargs,
     )
 
 
@@ -488,7 +545,8 @@ def demand_single_reference_year(
     demand_type: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads demand trace data from an output directory created by isp_trace_parser.demand_trace_parser.
 
     Examples:
@@ -532,8 +590,9 @@ def demand_single_reference_year(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     input_validation.start_year_before_end_year(start_year, end_year)
@@ -544,7 +603,14 @@ def demand_single_reference_year(
         "demand_type": demand_type,
     }
     return generic_single_reference_year(
-        "demand", start_year, end_year, reference_year, year_type, directory, **kwargs
+        "demand",
+        start_year,
+        end_year,
+        reference_year,
+        year_type,
+        directory,
+        output_format=output_format,
+        **kwargs,
     )
 
 
@@ -557,7 +623,8 @@ def demand_multiple_reference_years(
     demand_type: str,
     directory: str | Path,
     year_type: Literal["fy", "calendar"] = "fy",
-) -> pd.DataFrame:
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
     """Reads wind area trace data from an output directory created by isp_trace_parser.demand_trace_parser.
 
     Examples:
@@ -598,8 +665,9 @@ def demand_multiple_reference_years(
         year_type: str, 'fy' or 'calendar', if 'fy' then time filtering is by financial year with start_year and
             end_year specifiying the financial year to return data for, using year ending nomenclature (2016 ->
             FY2015/2016). If 'calendar', then filtering is by calendar year.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
 
-    Returns: pd.DataFrame with columns Datetime and Value
+    Returns: pd.DataFrame with columns Datetime and Value, or the type given by output_format
     """
     directory = input_validation.parsed_directory(directory)
     kwargs = {
@@ -609,58 +677,202 @@ def demand_multiple_reference_years(
         "demand_type": demand_type,
     }
     return generic_multi_reference_year_mapping(
-        "demand", reference_years, year_type, directory, **kwargs
+        "demand",
+        reference_years,
+        year_type,
+        directory,
+        output_format=output_format,
+        **kwargs,
     )
 
 
-def get_years_and_half_years(
-    start_year: int, end_year: int, year_type: str
-) -> list[tuple]:
-    """
-    Generate a list of year and half-year tuples for the given range and year type.
+# The fields identifying a trace of each type in the trace keys of the batch functions, and the parsed directory
+# subdirectory of each type, as used by parse_all_traces.
+TRACE_KEY_FIELDS = {
+    "solar_project": ["project"],
+    "solar_area": ["area", "technology"],
+    "wind_project": ["project"],
+    "wind_area": ["area", "resource_quality"],
+    "demand": ["subregion", "scenario", "poe", "demand_type"],
+}
 
-    This function creates a list of tuples, each containing a year and a half-year (1 or 2),
-    based on the specified start year, end year, and year type. The year type determines how
-    the years and half-years are calculated.
+BatchShape = Literal["long", "wide"]
 
-    Notes:
-        - For 'calendar' year type, the function includes both halves of each year from
-          start_year to end_year, inclusive.
-        - For 'fy' (fiscal year) type, the function includes the second half of the year
-          before start_year and the first half of end_year. This ensures that complete
-          fiscal years are covered for the specified range.
+
+@validate_call
+def batch_single_reference_year(
+    traces: list[dict[str, str]],
+    start_year: int,
+    end_year: int,
+    reference_year: int,
+    directory: str | Path,
+    year_type: Literal["fy", "calendar"] = "fy",
+    shape: BatchShape = "long",
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
+    """Reads many traces of any type for a single reference year in one query, see batch_multiple_reference_years.
 
     Examples:
 
-        Using 'calendar' year type:
+    >>> batch_single_reference_year(
+    ... traces=[
+    ...     {'type': 'wind_project', 'project': 'Bango 973 Wind Farm'},
+    ...     {'type': 'wind_area', 'area': 'Q1', 'resource_quality': 'WH'},
+    ... ],
+    ... start_year=2030,
+    ... end_year=2030,
+    ... reference_year=2011,
+    ... directory='example_parsed_data',
+    ... shape='wide',
+    ... output_format='polars').columns
+    ['Datetime', 'wind_project/Bango 973 Wind Farm', 'wind_area/Q1/WH']
 
-        >>> list(get_years_and_half_years(2022, 2023, 'calendar'))
-        [(2022, 1), (2022, 2), (2023, 1), (2023, 2)]
+    Args:
+        traces: list of dicts, the traces to read, see batch_multiple_reference_years.
+        start_year: int, start of time window to return trace data for.
+        end_year: int, end of time window (inclusive) to return trace data for.
+        reference_year: int, the reference year of the trace data to retrieve.
+        directory: str or pathlib.Path, see batch_multiple_reference_years.
+        year_type: str, 'fy' or 'calendar', see solar_project_single_reference_year.
+        shape: str, default 'long', see batch_multiple_reference_years.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
+
+    Returns: pd.DataFrame, see batch_multiple_reference_years, or the type given by output_format
+    """
+    directory = input_validation.parsed_directory(directory)
+    input_validation.start_year_before_end_year(start_year, end_year)
+    return generic_batch(
+        traces,
+        [(start_year, end_year, reference_year)],
+        year_type,
+        directory,
+        shape,
+        output_format,
+    )
+
+
+@validate_call
+def batch_multiple_reference_years(
+    traces: list[dict[str, str]],
+    reference_years: dict[int, int],
+    directory: str | Path,
+    year_type: Literal["fy", "calendar"] = "fy",
+    shape: BatchShape = "long",
+    output_format: OutputFormat = "pandas",
+) -> TraceData:
+    """Reads many traces of any type for the same reference year mapping in one query.
 
-        This returns all half-years for 2022 and 2023 in calendar year format.
+    All the files needed are found first and read concurrently by a single query, rather than by a call per trace.
+    Each trace is given by a dict with its 'type', one of 'solar_project', 'solar_area', 'wind_project',
+    'wind_area' or 'demand', and the fields identifying it, which are the arguments of the function reading that
+    type, e.g. {'type': 'solar_area', 'area': 'Q1', 'technology': 'SAT'}. Traces are labelled by their type and
+    fields joined by '/', e.g. 'solar_area/Q1/SAT'.
 
-        Using 'fy' (fiscal year) type:
+    Examples:
 
-        >>> list(get_years_and_half_years(2022, 2023, 'fy'))
-        [(2021, 2), (2022, 1), (2022, 2), (2023, 1)]
+    >>> batch_multiple_reference_years(
+    ... traces=[
+    ...     {'type': 'solar_project', 'project': 'Adelaide Desalination Plant Solar Farm'},
+    ...     {'type': 'wind_area', 'area': 'Q1', 'resource_quality': 'WH'},
+    ... ],
+    ... reference_years={2030: 2011, 2031: 2012},
+    ... directory='example_parsed_data',
+    ... output_format='polars').group_by('trace', maintain_order=True).len()
+    shape: (2, 2)
+    ┌─────────────────────────────────┬───────┐
+    │ trace                           ┆ len   │
+    │ ---                             ┆ ---   │
+    │ str                             ┆ u32   │
+    ╞═════════════════════════════════╪═══════╡
+    │ solar_project/Adelaide Desalin… ┆ 35040 │
+    │ wind_area/Q1/WH                 ┆ 35040 │
+    └─────────────────────────────────┴───────┘
 
-        This returns fiscal years 2021/22 and 2022/23. Note that:
-        - (2021, 2) represents July-December 2021 (first half of FY 2021/22)
-        - (2022, 1) represents January-June 2022 (second half of FY 2021/22)
-        - (2022, 2) represents July-December 2022 (first half of FY 2022/23)
-        - (2023, 1) represents January-June 2023 (second half of FY 2022/23)
+    Args:
+        traces: list of dicts, the type and identifying fields of each trace to read.
+        reference_years: dict{int: int}, a mapping of the which reference year (value) to retrieve data from for
+            each financial or calendar year (value).
+        directory: str or pathlib.Path, the directory containing the parsed traces of each type in the
+            subdirectories 'solar', 'wind' and 'demand', as created by parse_all_traces.
+        year_type: str, 'fy' or 'calendar', see solar_project_multiple_reference_years.
+        shape: str, default 'long', if 'long', the data has the columns trace, Datetime and Value, with the rows of
+            each trace in the order of traces. If 'wide', the data has a Datetime column and a column of values
+            for each trace, named by its label, with datetimes aligned across traces and null where a trace has no
+            value.
+        output_format: str, default 'pandas', the type of the data returned, see convert_output_format.
+
+    Returns: pd.DataFrame with the columns given by shape, or the type given by output_format
     """
-    if year_type == "calendar":
-        years = range(start_year, end_year + 1)
-        half_years = [1, 2]
-        years_and_half_years = itertools.product(years, half_years)
-    elif year_type == "fy":
-        years = range(start_year - 1, end_year + 1)
-        half_years = [1, 2]
-        years_and_half_years = list(itertools.product(years, half_years))[1:-1]
+    directory = input_validation.parsed_directory(directory)
+    year_ranges = [
+        (year, year, reference_year) for year, reference_year in reference_years.items()
+    ]
+    return generic_batch(
+        traces, year_ranges, year_type, directory, shape, output_format
+    )
+
+
+def generic_batch(
+    traces: list[dict[str, str]],
+    year_ranges: list[tuple[int, int, int]],
+    year_type: str,
+    directory: Path,
+    shape: BatchShape,
+    output_format: OutputFormat,
+) -> TraceData:
+    """Reads the year ranges of many traces with one query, returned in a long or wide shape."""
+    if not traces:
+        raise ValueError("At least one trace must be given.")
+    labels, scans = [], []
+    for trace in traces:
+        data_type, fields = _parse_trace_key(trace)
+        labels.append("/".join([data_type, *fields.values()]))
+        if data_type == "demand":
+            fields["area"] = fields.pop("subregion")
+        scans.append(
+            dict(
+                data_type=data_type,
+                year_ranges=year_ranges,
+                year_type=year_type,
+                directory=directory / data_type.split("_")[0],
+                **fields,
+            )
+        )
+    # The queries are run concurrently.
+    frames = _collect_all(scans)
+    if shape == "long":
+        data = pl.concat(
+            frame.select(pl.lit(label).alias("trace"), "Datetime", "Value")
+            for label, frame in zip(labels, frames)
+        )
+    elif all(frame["Datetime"].equals(frames[0]["Datetime"]) for frame in frames):
+        # Traces read with the same reference year mapping usually have the same datetimes, so the datetimes are
+        # already aligned and the value columns are used as they are.
+        data = pl.DataFrame(
+            [frames[0]["Datetime"]]
+            + [frame["Value"].alias(label) for label, frame in zip(labels, frames)]
+        )
     else:
-        raise ValueError(f"The year_type {year_type} is not recognised.")
-    return years_and_half_years
+        data = pl.concat(
+            frame.with_columns(pl.lit(label).alias("trace"))
+            for label, frame in zip(labels, frames)
+        ).pivot(on="trace", index="Datetime", values="Value", maintain_order=True)
+    return convert_output_format(data, output_format)
+
+
+def _parse_trace_key(trace: dict[str, str]) -> tuple[str, dict[str, str]]:
+    """Returns the type of a trace key and its fields, in the order they appear in labels."""
+    data_type = trace.get("type")
+    if data_type not in TRACE_KEY_FIELDS:
+        raise ValueError(
+            f"The trace {trace} must have a 'type' of {', '.join(TRACE_KEY_FIELDS)}."
+        )
+    expected = TRACE_KEY_FIELDS[data_type]
+    if set(trace) != {"type", *expected}:
+        raise ValueError(
+            f"The {data_type} trace {trace} must have the fields {', '.join(expected)}."
+        )
+    return data_type, {field: trace[field] for field in expected}
 
 
 def generic_multi_reference_year_mapping(
@@ -668,8 +880,9 @@ def generic_multi_reference_year_mapping(
     reference_year_mapping: dict[int, int],
     year_type: str,
     directory: str | Path,
+    output_format: OutputFormat = "pandas",
     **kwargs,
-) -> pd.DataFrame:
+) -> TraceData:
     """
     Retrieve data for multiple reference years for various types of energy data.
 
@@ -716,6 +929,7 @@ def generic_multi_reference_year_mapping(
              corresponding reference years.
         year_type (str): Type of year to use, either 'fy' (fiscal year) or 'calendar'.
         directory (str | Path): The directory where the data files are stored.
+        output_format (str): The type of the data returned, see convert_output_format.
         **kwargs: Additional keyword arguments specific to each data type:
             - For solar_project and wind_project: project (str)
             - For solar_area: area (str), technology (str)
@@ -724,17 +938,28 @@ def generic_multi_reference_year_mapping(
 
     Returns:
         pd.DataFrame: A DataFrame containing the requested data for all specified years, with 'Datetime' and 'Value'
-        columns.
+        columns, or the type given by output_format.
     """
-    data = []
-    for year, reference_year in reference_year_mapping.items():
-        data.append(
-            generic_single_reference_year(
-                data_type, year, year, reference_year, year_type, directory, **kwargs
-            )
+    year_ranges = [
+        (year, year, reference_year)
+        for year, reference_year in reference_year_mapping.items()
+    ]
+    if output_format == "pandas":
+        # Numbered within each year, as the index of the data of each year was kept when years were concatenated
+        # with pandas.
+        data = collect_trace_data(
+            data_type,
+            year_ranges,
+            year_type,
+            directory,
+            index_column="_index",
+            **kwargs,
         )
-    data = pd.concat(data)
-    return data
+        output = convert_output_format(data.drop("_index"), output_format)
+        output.index = pd.Index(data["_index"].to_numpy().astype("int64"))
+        return output
+    data = collect_trace_data(data_type, year_ranges, year_type, directory, **kwargs)
+    return convert_output_format(data, output_format)
 
 
 def generic_single_reference_year(
@@ -744,8 +969,9 @@ def generic_single_reference_year(
     reference_year: int,
     year_type: str,
     directory: str | Path,
+    output_format: OutputFormat = "pandas",
     **kwargs,
-) -> pd.DataFrame:
+) -> TraceData:
     """
     Retrieve data for a single reference year for various types of energy data.
 
@@ -761,6 +987,7 @@ def generic_single_reference_year(
         reference_year (int): The reference year for the data.
         year_type (str): Type of year to use, either 'fy' (fiscal year) or 'calendar'.
         directory (str | Path): The directory where the data files are stored.
+        output_format (str): The type of the data returned, see convert_output_format.
         **kwargs: Additional keyword arguments specific to each data type:
             - For solar_project and wind_project: project (str)
             - For solar_area: area (str), technology (str)
@@ -768,7 +995,8 @@ def generic_single_reference_year(
             - For demand: subregion (str), scenario (str), poe (str), demand_type (str)
 
     Returns:
-        pd.DataFrame: A DataFrame containing the requested data, with 'Datetime' and 'Value' columns.
+        pd.DataFrame: A DataFrame containing the requested data, with 'Datetime' and 'Value' columns, or the type
+        given by output_format.
 
     Examples:
         Retrieving solar project data:
@@ -815,20 +1043,293 @@ def generic_single_reference_year(
           of the year before start_year to June of end_year.
         - The resulting DataFrame includes data for all half-hourly intervals within
           the specified date range.
+        - The files read depend on the partition scheme recorded in the directory when
+          the data was parsed, if files contain data outside the date range it is
+          filtered out after reading. If the data was parsed with the consolidated
+          layout, the trace and date range are instead pushed down as filters when
+          reading the consolidated file.
+    """
+    data = collect_trace_data(
+        data_type,
+        [(start_year, end_year, reference_year)],
+        year_type,
+        directory,
+        **kwargs,
+    )
+    return convert_output_format(data, output_format)
+
+
+def scan_trace_data(
+    data_type: str,
+    year_ranges: list[tuple[int, int, int]],
+    year_type: str,
+    directory: str | Path,
+    index_column: str | None = None,
+    chunk_frames: Mapping[str, pl.DataFrame] | None = None,
+    **kwargs,
+) -> pl.LazyFrame:
+    """Returns a lazy query of the data of one trace for each (start_year, end_year, reference_year) in year_ranges,
+    concatenated in order.
+
+    The files of all the year ranges are found before the query is created, so the data is read by a single query,
+    which reads the files concurrently, and collected once. If the partitions of the files contain only whole years
+    of the year type, all the files are read by one scan. Otherwise, the files of each year range are scanned with
+    a filter on the time window of the range, which is pushed down to the parquet reader. The same applies to the
+    consolidated layout, where the trace and time window are pushed down as filters.
+
+    If chunk_frames is given, the data of the files of the partitioned layout is scanned from it instead, e.g. the
+    files read through the chunk cache (see chunk_cache.enable_chunk_cache).
+
+    If index_column is given, the files of each year range are scanned separately, and a column with this name
+    numbering the rows of each year range from 0 is added.
+
+    Args:
+        data_type (str): Type of data to retrieve, see generic_single_reference_year.
+        year_ranges (list[tuple[int, int, int]]): The start year, end year (inclusive) and reference year of each
+            range of data to read.
+        year_type (str): Type of year to use, either 'fy' (fiscal year) or 'calendar'.
+        directory (str | Path): The directory where the data files are stored.
+        index_column (str | None): The name of a column to number the rows of each year range in.
+        chunk_frames (Mapping[str, pl.DataFrame] | None): The data of each file of the partitioned layout.
+        **kwargs: Additional keyword arguments specific to each data type, see generic_single_reference_year.
+
+    Returns:
+        pl.LazyFrame: with 'Datetime' and 'Value' columns, and index_column if given.
+    """
+    store_options = read_store_options(directory)
+    if store_options["output_layout"] == "consolidated":
+        scans = []
+        for start_year, end_year, reference_year in year_ranges:
+            filepath = filepath_writer(
+                data_type,
+                Path(),
+                partition="AllYears",
+                reference_year=reference_year,
+                **kwargs,
+            )
+            scans.append(
+                scan_consolidated_trace(
+                    directory,
+                    trace_id_from_filepath(filepath, reference_year),
+                    reference_year,
+                    *get_time_window(start_year, end_year, year_type),
+                )
+            )
+        return pl.concat(_add_row_index(scans, index_column))
+
+    partition_scheme = store_options["partition_scheme"]
+    filepaths = partition_filepaths(
+        data_type, year_ranges, year_type, directory, partition_scheme, **kwargs
+    )
+    all_filepaths = [f for range_filepaths in filepaths for f in range_filepaths]
+    if chunk_frames is None:
+        scan_parquet = pl.scan_parquet
+    else:
+
+        def scan_parquet(paths):
+            return pl.concat([chunk_frames[f].lazy() for f in paths])
+
+    aligned = partitions_align_with_years(year_type, partition_scheme)
+    if aligned and index_column is None:
+        return scan_parquet(all_filepaths)
+    scans = []
+    for (start_year, end_year, _), range_filepaths in zip(year_ranges, filepaths):
+        window_start, window_end = get_time_window(start_year, end_year, year_type)
+        scan = scan_parquet(range_filepaths)
+        if not aligned:
+            scan = scan.filter(
+                (pl.col("Datetime") > window_start) & (pl.col("Datetime") <= window_end)
+            )
+        scans.append(scan)
+    return pl.concat(_add_row_index(scans, index_column))
+
+
+def collect_trace_data(
+    data_type: str,
+    year_ranges: list[tuple[int, int, int]],
+    year_type: str,
+    directory: str | Path,
+    index_column: str | None = None,
+    **kwargs,
+) -> pl.DataFrame:
+    """Returns the data of scan_trace_data, from the query cache if it is enabled (see
+    query_cache.enable_query_cache) and holds the result of the same query of the current source files.
+
+    Args and Returns: see scan_trace_data.
+    """
+    query_cache = get_query_cache()
+    if query_cache is None:
+        return _collect_trace_data(
+            data_type, year_ranges, year_type, directory, index_column, **kwargs
+        )
+
+    store_options = read_store_options(directory)
+    options_file = Path(directory) / STORE_OPTIONS_FILENAME
+    source_files = [options_file] if options_file.is_file() else []
+    if store_options["output_layout"] == "consolidated":
+        source_files.append(Path(directory) / CONSOLIDATED_FILENAME)
+    else:
+        source_files.extend(
+            _partitioned_filepaths(
+                data_type, year_ranges, year_type, directory, **kwargs
+            )
+        )
+    query = {
+        "data_type": data_type,
+        "year_ranges": year_ranges,
+        "year_type": year_type,
+        "directory": str(Path(directory).resolve()),
+        "index_column": index_column,
+        **kwargs,
+    }
+    key = query_cache.key(query, source_files)
+    data = query_cache.get(key)
+    if data is None:
+        data = _collect_trace_data(
+            data_type, year_ranges, year_type, directory, index_column, **kwargs
+        )
+        query_cache.put(key, data)
+    return data
+
+
+def _collect_trace_data(
+    data_type: str,
+    year_ranges: list[tuple[int, int, int]],
+    year_type: str,
+    directory: str | Path,
+    index_column: str | None = None,
+    **kwargs,
+) -> pl.DataFrame:
+    (data,) = _collect_all(
+        [
+            dict(
+                data_type=data_type,
+                year_ranges=year_ranges,
+                year_type=year_type,
+                directory=directory,
+                index_column=index_column,
+                **kwargs,
+            )
+        ]
+    )
+    return data
+
+
+def _collect_all(scans: list[dict]) -> list[pl.DataFrame]:
+    """Collects the scan_trace_data query of each dict of arguments in scans concurrently.
+
+    If the chunk cache is enabled, the files of the partitioned layout are read through the cache first, which reads
+    the files that aren't cached concurrently, and the queries are run over the data read.
+    """
+    chunk_cache = get_chunk_cache()
+    chunk_frames = None
+    if chunk_cache is not None:
+        filepaths = [f for scan in scans for f in _partitioned_filepaths(**scan)]
+        chunk_frames = dict(zip(filepaths, chunk_cache.read_parquet(filepaths)))
+    return pl.collect_all(
+        [scan_trace_data(**scan, chunk_frames=chunk_frames) for scan in scans]
+    )
+
+
+def _partitioned_filepaths(
+    data_type: str,
+    year_ranges: list[tuple[int, int, int]],
+    year_type: str,
+    directory: str | Path,
+    index_column: str | None = None,
+    **kwargs,
+) -> list[str]:
+    """Returns the files read by the scan_trace_data query of the arguments, or none if the layout is consolidated."""
+    store_options = read_store_options(directory)
+    if store_options["output_layout"] == "consolidated":
+        return []
+    filepaths = partition_filepaths(
+        data_type,
+        year_ranges,
+        year_type,
+        directory,
+        store_options["partition_scheme"],
+        **kwargs,
+    )
+    return [f for range_filepaths in filepaths for f in range_filepaths]
+
+
+def partition_filepaths(
+    data_type: str,
+    year_ranges: list[tuple[int, int, int]],
+    year_type: str,
+    directory: str | Path,
+    partition_scheme: str,
+    **kwargs,
+) -> list[list[str]]:
+    """Returns the filepaths of the partitions of one trace needed for each (start_year, end_year, reference_year)
+    in year_ranges, which may be glob patterns."""
+    return [
+        [
+            str(
+                filepath_writer(
+                    data_type,
+                    directory,
+                    partition=partition,
+                    reference_year=reference_year,
+                    **kwargs,
+                )
+            )
+            for partition in get_partition_labels(
+                start_year, end_year, year_type, partition_scheme
+            )
+        ]
+        for start_year, end_year, reference_year in year_ranges
+    ]
+
+
+def _add_row_index(
+    scans: list[pl.LazyFrame], index_column: str | None
+) -> list[pl.LazyFrame]:
+    if index_column is None:
+        return scans
+    return [scan.with_row_index(index_column) for scan in scans]
+
+
+def convert_output_format(data: pl.DataFrame, output_format: OutputFormat) -> TraceData:
+    """Converts trace data read with polars to the type given by output_format.
+
+    The formats are:
+        'pandas': a pandas.DataFrame with NumPy backed columns, which copies the data.
+        'polars': the polars.DataFrame itself.
+        'pyarrow': a pyarrow.Table sharing the buffers of the polars data.
+        'pandas_arrow': a pandas.DataFrame with columns backed by pyarrow arrays, sharing the buffers of the polars
+            data.
+        'numpy': a dict of NumPy arrays keyed by column name. The arrays are views of the polars data if it is stored
+            in a single chunk, otherwise the chunks of each column are copied into one array.
+
+    'pyarrow' and 'pandas_arrow' require pyarrow to be installed.
+
+    Examples:
+
+    >>> from datetime import datetime
+
+    >>> data = pl.DataFrame({'Datetime': [datetime(2030, 1, 1, 0, 30)], 'Value': [0.5]})
+
+    >>> convert_output_format(data, 'numpy')
+    {'Datetime': array(['2030-01-01T00:30:00.000000'], dtype='datetime64[us]'), 'Value': array([0.5])}
+
+    >>> convert_output_format(data, 'pandas_arrow').dtypes
+    Datetime    timestamp[us][pyarrow]
+    Value              double[pyarrow]
+    dtype: object
     """
-    years_and_half_years = get_years_and_half_years(start_year, end_year, year_type)
-    data = []
-    for i, (year, half_year) in enumerate(years_and_half_years):
-        filepath_args = {
-            "year": year,
-            "half_year": half_year,
-            "reference_year": reference_year,
-        }
-        filepath_args.update(kwargs)
-        filepath = filepath_writer(data_type, directory, **filepath_args)
-        data.append(pl.read_parquet(filepath))
-    data = pl.concat(data)
-    return data.to_pandas()
+    if output_format == "pandas":
+        return data.to_pandas()
+    elif output_format == "polars":
+        return data
+    elif output_format == "pyarrow":
+        return data.to_arrow()
+    elif output_format == "pandas_arrow":
+        return data.to_pandas(use_pyarrow_extension_array=True)
+    elif output_format == "numpy":
+        return {name: data[name].to_numpy() for name in data.columns}
+    raise ValueError(f"The output_format {output_format} is not recognised.")
 
 
 def filepath_writer(data_type: str, directory: Path, **kwargs):
@@ -840,22 +1341,21 @@ def filepath_writer(data_type: str, directory: Path, **kwargs):
 
 filepath_templates = {
     "solar_project": (
-        "RefYear{reference_year}/Project/{project}/RefYear{reference_year}_{project}_*_HalfYear{year}-"
-        "{half_year}.parquet"
+        "RefYear{reference_year}/Project/{project}/RefYear{reference_year}_{project}_*_{partition}.parquet"
     ),
     "solar_area": (
-        "RefYear{reference_year}/Area/{area}/{technology}/RefYear{reference_year}_{area}_{technology}_HalfYear{year}-"
-        "{half_year}.parquet"
+        "RefYear{reference_year}/Area/{area}/{technology}/RefYear{reference_year}_{area}_{technology}_"
+        "{partition}.parquet"
     ),
     "wind_project": (
-        "RefYear{reference_year}/Project/{project}/RefYear{reference_year}_{project}_HalfYear{year}-{half_year}.parquet"
+        "RefYear{reference_year}/Project/{project}/RefYear{reference_year}_{project}_{partition}.parquet"
     ),
     "wind_area": (
         "RefYear{reference_year}/Area/{area}/{resource_quality}/"
-        "RefYear{reference_year}_{area}_{resource_quality}_HalfYear{year}-{half_year}.parquet"
+        "RefYear{reference_year}_{area}_{resource_quality}_{partition}.parquet"
     ),
     "demand": (
         "{scenario}/RefYear{reference_year}/{area}/{poe}/{demand_type}/"
-        "{scenario}_RefYear{reference_year}_{area}_{poe}_{demand_type}_HalfYear{year}-{half_year}.parquet"
+        "{scenario}_RefYear{reference_year}_{area}_{poe}_{demand_type}_{partition}.parquet"
     ),
 }
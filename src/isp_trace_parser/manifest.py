@@ -0,0 +1,172 @@
+"""Records the inputs used to create each parsed trace, so unchanged traces can be skipped when re-parsing.
+
+Each parsed directory has a manifest with an entry per output trace. An entry stores a fingerprint of every input
+file, either its size and modification time or a hash of its content, the metadata the trace was saved with (which
+includes the output name given by the name mappings), and the files written for the trace.
+
+During a run, entries are appended to a journal as each trace is saved, and merged into the manifest when the run
+finishes. If a run is interrupted, the journal records the traces that were completed, so the next run can resume
+from where the interrupted run stopped.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Literal
+
+from isp_trace_parser.trace_restructure_helper_functions import ParseTask
+
+ChangeDetection = Literal["size_mtime", "hash"]
+
+MANIFEST_FILENAME = "parse_manifest.json"
+JOURNAL_FILENAME = "parse_journal.jsonl"
+ERROR_REPORT_FILENAME = "parse_errors.json"
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def shard_filename(filename: str, shard_index: int, num_shards: int) -> str:
+    """Returns the name of a run record file for one shard of a sharded run, so shards writing to the same parsed
+    directory keep separate records.
+
+    Examples:
+
+    >>> shard_filename(MANIFEST_FILENAME, 0, 4)
+    'parse_manifest.shard0of4.json'
+
+    >>> shard_filename(MANIFEST_FILENAME, 0, 1)
+    'parse_manifest.json'
+    """
+    if num_shards == 1:
+        return filename
+    stem, suffix = filename.split(".", 1)
+    return f"{stem}.shard{shard_index}of{num_shards}.{suffix}"
+
+
+def read_manifest(parsed_directory: Path, filename: str = MANIFEST_FILENAME) -> dict:
+    """Returns the manifest entries recorded in parsed_directory, keyed by task_key."""
+    manifest_file = Path(parsed_directory) / filename
+    if not manifest_file.is_file():
+        return {}
+    with open(manifest_file) as f:
+        return json.load(f)
+
+
+def write_manifest(
+    parsed_directory: Path, manifest: dict, filename: str = MANIFEST_FILENAME
+) -> None:
+    """Saves the manifest to parsed_directory, replacing the previous manifest atomically."""
+    manifest_file = Path(parsed_directory) / filename
+    temporary_file = manifest_file.with_suffix(".json.tmp")
+    with open(temporary_file, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temporary_file, manifest_file)
+
+
+def read_journal(parsed_directory: Path, filename: str = JOURNAL_FILENAME) -> dict:
+    """Returns the entries journaled in parsed_directory by an unfinished run, keyed by task_key.
+
+    A line that was only partly written when a run was interrupted is ignored.
+    """
+    journal_file = Path(parsed_directory) / filename
+    if not journal_file.is_file():
+        return {}
+    entries = {}
+    with open(journal_file) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            entries[record["key"]] = record["entry"]
+    return entries
+
+
+def append_to_journal(
+    parsed_directory: Path, key: str, entry: dict, filename: str = JOURNAL_FILENAME
+) -> None:
+    """Records a completed task in the journal of parsed_directory."""
+    with open(Path(parsed_directory) / filename, "a") as f:
+        f.write(json.dumps({"key": key, "entry": entry}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def remove_journal(parsed_directory: Path, filename: str = JOURNAL_FILENAME) -> None:
+    (Path(parsed_directory) / filename).unlink(missing_ok=True)
+
+
+def write_error_report(
+    parsed_directory: Path, errors: list[dict], filename: str = ERROR_REPORT_FILENAME
+) -> None:
+    """Saves the errors of the latest run to parsed_directory, or removes the report of a previous run if there
+    were no errors."""
+    report_file = Path(parsed_directory) / filename
+    if not errors:
+        report_file.unlink(missing_ok=True)
+        return
+    with open(report_file, "w") as f:
+        json.dump(errors, f, indent=2)
+
+
+def task_key(task: ParseTask) -> str:
+    """Returns the key identifying the output trace of a task, its output filepath without a partition label.
+
+    Examples:
+
+    >>> task = ParseTask([], {'name': 'Q1', 'reference_year': 2011}, lambda m: f"{m['name']}_{m['partition']}")
+    >>> task_key(task)
+    'Q1_AllYears'
+    """
+    return task.write_output_filepath({**task.metadata, "partition": "AllYears"})
+
+
+def fingerprint_file(filepath: Path, change_detection: ChangeDetection) -> list:
+    """Returns [size, modification time in ns] or ['sha256', hex digest] for a file."""
+    if change_detection == "size_mtime":
+        stat = Path(filepath).stat()
+        return [stat.st_size, stat.st_mtime_ns]
+    elif change_detection == "hash":
+        digest = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            while chunk := f.read(_HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return ["sha256", digest.hexdigest()]
+    raise ValueError(
+        f"The change_detection method {change_detection} is not recognised."
+    )
+
+
+def fingerprint_inputs(task: ParseTask, change_detection: ChangeDetection) -> dict:
+    """Returns the fingerprint of each input file of a task, keyed by filepath."""
+    return {str(f): fingerprint_file(f, change_detection) for f in sorted(task.files)}
+
+
+def create_manifest_entry(task: ParseTask, inputs: dict, outputs: list[str]) -> dict:
+    """Returns the manifest entry for a task, given its input fingerprints and the output files written relative to
+    its output directory."""
+    return {
+        "inputs": inputs,
+        "metadata": _as_json(task.metadata),
+        "outputs": sorted(outputs),
+    }
+
+
+def task_is_unchanged(task: ParseTask, inputs: dict, manifest: dict) -> bool:
+    """Whether the task's output was created from inputs with the same fingerprints and the same metadata, and is
+    still on disk."""
+    entry = manifest.get(task_key(task))
+    return (
+        entry is not None
+        and entry["inputs"] == inputs
+        and entry["metadata"] == _as_json(task.metadata)
+        and all(
+            (Path(task.output_directory) / output).is_file()
+            for output in entry["outputs"]
+        )
+    )
+
+
+def _as_json(metadata: dict) -> dict:
+    return json.loads(json.dumps(metadata, default=str))
@@ -1,79 +1,145 @@
 import re
+from typing import Literal
 
+import polars as pl
 
-def extract_solar_trace_metadata(filename):
-    # Case 1: Match filenames that have a name, a tech, followed by RefYear
-    pattern1 = re.compile(
-        r"^(?P<name>[A-Za-z0-9_\-]+)_(?P<technology>[A-Z]+)_RefYear(?P<reference_year>\d{4})\.csv$"
-    )
+# Match filenames that have a name, a tech, followed by RefYear
+SOLAR_PROJECT_PATTERN = re.compile(
+    r"^(?P<name>[A-Za-z0-9_\-]+)_(?P<technology>[A-Z]+)_RefYear(?P<reference_year>\d{4})\.csv$"
+)
 
-    # Case 2: Match filenames that have a rez, a name, and tech, followed by RefYear
-    pattern2 = re.compile(
-        r"^[A-Z]+_(?P<name>[A-Z0-9]+)_[A-Za-z0-9_\-]+_(?P<technology>[A-Z]+)_RefYear(?P<reference_year>\d{4})\.csv$"
-    )
+# Match filenames that have a rez, a name, and tech, followed by RefYear
+SOLAR_AREA_PATTERN = re.compile(
+    r"^[A-Z]+_(?P<name>[A-Z0-9]+)_[A-Za-z0-9_\-]+_(?P<technology>[A-Z]+)_RefYear(?P<reference_year>\d{4})\.csv$"
+)
 
-    # Try to match with pattern 2 first
-    match2 = pattern2.match(filename)
-    if match2:
-        match_data = match2.groupdict()
-        match_data["file_type"] = "area"
-        match_data["reference_year"] = int(match_data["reference_year"])
-        return match_data
+# Match filenames that have a simple name followed by RefYear
+WIND_PROJECT_PATTERN = re.compile(
+    r"^(?P<name>.*)_RefYear(?P<reference_year>\d{4})\.csv$"
+)
 
-    # Otherwise, try to match with pattern 1 (just name and year)
-    match1 = pattern1.match(filename)
-    if match1:
-        match_data = match1.groupdict()
-        match_data["file_type"] = "project"
-        match_data["reference_year"] = int(match_data["reference_year"])
-        return match_data
+# Match filenames that have a resource type and a name followed by RefYear
+WIND_AREA_PATTERN = re.compile(
+    r"^(?P<name>[A-Z0-9]+)_(?P<resource_quality>W[A-Z]+)_[A-Za-z_\-]+_RefYear(?P<reference_year>\d{4})\.csv$"
+)
 
-    raise ValueError(f"Filename '{filename}' does not match the expected pattern")
+DEMAND_PATTERN = re.compile(
+    r"^(?P<subregion>[A-Z]+)_RefYear_(?P<reference_year>\d{4})_(?P<scenario>[A-Z_]+)_(?P<poe>POE\d{2})_(?P<demand_type>["
+    r"A-Z_]+)\.csv$"
+)
 
+# The patterns tried for each trace type, in order, with the file_type of files matching each pattern.
+FILENAME_PATTERNS = {
+    "solar": [(SOLAR_AREA_PATTERN, "area"), (SOLAR_PROJECT_PATTERN, "project")],
+    "wind": [(WIND_AREA_PATTERN, "area"), (WIND_PROJECT_PATTERN, "project")],
+    "demand": [(DEMAND_PATTERN, None)],
+}
 
-def extract_wind_trace_metadata(filename):
-    # Case 1: Match filenames that have a simple name followed by RefYear
-    pattern1 = re.compile(r"^(?P<name>.*)_RefYear(?P<reference_year>\d{4})\.csv$")
+# The metadata fields taken unchanged from the filenames of each trace type, which can be filtered on before tasks are
+# planned. The demand scenario is excluded as it's renamed by the scenario mapping.
+FILENAME_FILTER_FIELDS = {
+    "solar": ["file_type", "technology", "reference_year"],
+    "wind": ["file_type", "resource_quality", "reference_year"],
+    "demand": ["subregion", "poe", "demand_type", "reference_year"],
+}
 
-    # Case 2: Match filenames that have a resource type and a name followed by RefYear
-    pattern2 = re.compile(
-        r"^(?P<name>[A-Z0-9]+)_(?P<resource_quality>W[A-Z]+)_[A-Za-z_\-]+_RefYear(?P<reference_year>\d{4})\.csv$"
-    )
+TraceType = Literal["solar", "wind", "demand"]
 
-    # Try to match with pattern 2 first
-    match2 = pattern2.match(filename)
-    if match2:
-        match_data = match2.groupdict()
-        match_data["file_type"] = "area"
-        match_data["reference_year"] = int(match_data["reference_year"])
-        return match_data
 
-    # Otherwise, try to match with pattern 1 (just name and year)
-    match1 = pattern1.match(filename)
-    if match1:
-        match_data = match1.groupdict()
-        match_data["file_type"] = "project"
-        match_data["reference_year"] = int(match_data["reference_year"])
-        return match_data
+def extract_solar_trace_metadata(filename):
+    return extract_metadata_dicts([filename], "solar")[0]
+
 
-    raise ValueError(f"Filename '{filename}' does not match the expected pattern")
+def extract_wind_trace_metadata(filename):
+    return extract_metadata_dicts([filename], "wind")[0]
 
 
 def extract_demand_trace_metadata(filename):
-    # Regex pattern to match the structure of the filename
-    pattern = re.compile(
-        r"^(?P<subregion>[A-Z]+)_RefYear_(?P<reference_year>\d{4})_(?P<scenario>[A-Z_]+)_(?P<poe>POE\d{2})_(?P<demand_type>["
-        r"A-Z_]+)\.csv$"
+    return extract_metadata_dicts([filename], "demand")[0]
+
+
+def extract_metadata_dicts(filenames: list[str], trace_type: TraceType) -> list[dict]:
+    """Returns the metadata of each filename as a dict, with the fields of the pattern the filename matches.
+
+    The metadata is extracted by extract_metadata_table, so both give the same metadata.
+
+    Examples:
+
+    >>> extract_metadata_dicts(['BANGOWF1_RefYear2011.csv'], 'wind')
+    [{'name': 'BANGOWF1', 'reference_year': 2011, 'file_type': 'project'}]
+
+    Raises:
+        ValueError: if a filename doesn't match any of the patterns of the trace type.
+    """
+    metadata = extract_metadata_table(filenames, trace_type)
+    unmatched = metadata.filter(~pl.col("matched"))
+    if not unmatched.is_empty():
+        raise ValueError(
+            f"Filename '{unmatched['filename'][0]}' does not match the expected pattern"
+        )
+    return [
+        {field: value for field, value in row.items() if value is not None}
+        for row in metadata.drop("filename", "matched").iter_rows(named=True)
+    ]
+
+
+def extract_metadata_table(filenames: list[str], trace_type: TraceType) -> pl.DataFrame:
+    """Extracts the metadata of many files from their filenames in one vectorised pass.
+
+    Gives the same metadata as extract_solar_trace_metadata, extract_wind_trace_metadata or
+    extract_demand_trace_metadata, as a table with a row per filename. Fields that a file's pattern doesn't have are
+    null, and the 'matched' column is False for filenames that don't match any pattern.
+
+    Examples:
+
+    >>> extract_metadata_table(
+    ... ['Q1_WH_Far_North_QLD_RefYear2011.csv', 'BANGOWF1_RefYear2011.csv', 'notes.csv'], 'wind'
+    ... ).drop('filename')
+    shape: (3, 5)
+    ┌──────────┬──────────────────┬────────────────┬───────────┬─────────┐
+    │ name     ┆ resource_quality ┆ reference_year ┆ file_type ┆ matched │
+    │ ---      ┆ ---              ┆ ---            ┆ ---       ┆ ---     │
+    │ str      ┆ str              ┆ i64            ┆ str       ┆ bool    │
+    ╞══════════╪══════════════════╪════════════════╪═══════════╪═════════╡
+    │ Q1       ┆ WH               ┆ 2011           ┆ area      ┆ true    │
+    │ BANGOWF1 ┆ null             ┆ 2011           ┆ project   ┆ true    │
+    │ null     ┆ null             ┆ null           ┆ null      ┆ false   │
+    └──────────┴──────────────────┴────────────────┴───────────┴─────────┘
+    """
+    patterns = FILENAME_PATTERNS[trace_type]
+    metadata = pl.DataFrame({"filename": pl.Series(filenames, dtype=pl.String)})
+    # Each pattern's groups are extracted once, all groups of a pattern are null if the filename doesn't match it.
+    metadata = metadata.with_columns(
+        pl.col("filename").str.extract_groups(pattern.pattern).alias(f"_pattern{i}")
+        for i, (pattern, _) in enumerate(patterns)
+    )
+    matches = [
+        pl.col(f"_pattern{i}")
+        .struct.field(next(iter(pattern.groupindex)))
+        .is_not_null()
+        for i, (pattern, _) in enumerate(patterns)
+    ]
+
+    columns = []
+    fields = dict.fromkeys(f for pattern, _ in patterns for f in pattern.groupindex)
+    for field in fields:
+        value = pl.coalesce(
+            pl.col(f"_pattern{i}").struct.field(field)
+            for i, (pattern, _) in enumerate(patterns)
+            if field in pattern.groupindex
+        )
+        if field == "reference_year":
+            value = value.cast(pl.Int64)
+        columns.append(value.alias(field))
+
+    if any(file_type is not None for _, file_type in patterns):
+        file_type = pl.lit(None, dtype=pl.String)
+        for (_, pattern_file_type), match in reversed(list(zip(patterns, matches))):
+            file_type = (
+                pl.when(match).then(pl.lit(pattern_file_type)).otherwise(file_type)
+            )
+        columns.append(file_type.alias("file_type"))
+
+    return metadata.select(
+        "filename", *columns, pl.any_horizontal(matches).alias("matched")
     )
-
-    # Match the pattern against the filename
-    match = pattern.match(filename)
-
-    if match:
-        # If the filename matches the pattern, return a dictionary of captured groups
-        match_data = match.groupdict()
-        match_data["reference_year"] = int(match_data["reference_year"])
-        return match_data
-    else:
-        # If the pattern does not match, raise an error or return None
-        raise ValueError(f"Filename '{filename}' does not match the expected pattern")
@@ -0,0 +1,180 @@
+"""Loads the name mapping configs in isp_trace_name_mapping_configs once per process.
+
+The mappings are maintained as YAML files, which are slow to parse, so they are also saved in a compiled JSON file,
+along with indexes from each AEMO trace name to the output names it is used for. The compiled file records a hash of
+each YAML file it was created from, and a mapping is loaded from its YAML file instead if the YAML file has been
+edited since the compiled file was created. After editing a mapping, recompile with:
+
+    python -m isp_trace_parser.name_mappings
+"""
+
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+from types import MappingProxyType
+from typing import Literal, Mapping, Sequence
+
+MAPPING_CONFIGS_DIRECTORY = Path(__file__).parent.parent / Path(
+    "isp_trace_name_mapping_configs"
+)
+COMPILED_MAPPINGS_FILENAME = "compiled_name_mappings.json"
+
+MappingName = Literal[
+    "solar_project_mapping",
+    "solar_area_mapping",
+    "wind_project_mapping",
+    "wind_area_mapping",
+    "demand_scenario_mapping",
+]
+MAPPING_NAMES = MappingName.__args__
+
+# The mappings from output names to AEMO trace names, which have a trace name index. The demand scenario mapping is
+# already keyed by the AEMO scenario name.
+TRACE_NAME_MAPPINGS = (
+    "solar_project_mapping",
+    "solar_area_mapping",
+    "wind_project_mapping",
+    "wind_area_mapping",
+)
+
+
+@functools.cache
+def load_name_mapping(mapping_name: MappingName) -> Mapping:
+    """Returns a name mapping config as it is written in its YAML file, as a read-only mapping.
+
+    The mapping is shared by every caller in the process, so nested mappings are also read-only and lists are
+    returned as tuples.
+
+    Examples:
+
+    >>> load_name_mapping('demand_scenario_mapping')['STEP_CHANGE']
+    'Step Change'
+
+    >>> load_name_mapping('wind_project_mapping')['Bango 973 Wind Farm']['CSVFile']
+    'BANGOWF1'
+    """
+    compiled = _load_compiled_mappings()
+    if _source_hash(mapping_name) == compiled["sources"].get(mapping_name):
+        mapping = compiled["mappings"][mapping_name]
+    else:
+        import yaml
+
+        with open(_source_file(mapping_name), "r") as f:
+            mapping = yaml.safe_load(f)
+    return _freeze(mapping)
+
+
+@functools.cache
+def load_trace_name_index(
+    mapping_name: MappingName,
+) -> Mapping[str, tuple[tuple[str, int, int], ...]]:
+    """Returns an index from each AEMO trace name in a mapping to the output names it is used for, see
+    create_trace_name_index.
+
+    Examples:
+
+    >>> load_trace_name_index('wind_project_mapping')['SNOWSTH1']
+    (('Snowtown S2 Wind Farm', 38, 0),)
+    """
+    if mapping_name not in TRACE_NAME_MAPPINGS:
+        raise ValueError(f"The {mapping_name} doesn't map output names to trace names.")
+    compiled = _load_compiled_mappings()
+    if _source_hash(mapping_name) == compiled["sources"].get(mapping_name):
+        index = compiled["trace_name_indexes"][mapping_name]
+    else:
+        index = create_trace_name_index(load_name_mapping(mapping_name))
+    return MappingProxyType(
+        {name: tuple(map(tuple, outputs)) for name, outputs in index.items()}
+    )
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def trace_names(mapping_value: str | Sequence[str] | Mapping) -> list[str]:
+    """Returns the AEMO trace names an output name is mapped to.
+
+    Examples:
+
+    >>> trace_names('Q1')
+    ['Q1']
+
+    >>> trace_names({'Station Name': 'Snowtown', 'CSVFile': ['SNOWSTH1', 'SNOWNTH1']})
+    ['SNOWSTH1', 'SNOWNTH1']
+    """
+    if isinstance(mapping_value, Mapping):
+        mapping_value = mapping_value["CSVFile"]
+    return [mapping_value] if isinstance(mapping_value, str) else list(mapping_value)
+
+
+def create_trace_name_index(mapping: Mapping) -> dict[str, list[list]]:
+    """Inverts a mapping from output names to AEMO trace names, giving the output names of each trace name.
+
+    Each output name is given with its position in the mapping and the position of the trace name in its trace names.
+
+    Examples:
+
+    >>> create_trace_name_index({'A': ['X', 'Y'], 'B': 'X'})
+    {'X': [['A', 0, 0], ['B', 1, 0]], 'Y': [['A', 0, 1]]}
+    """
+    index = {}
+    for output_index, (output_name, mapping_value) in enumerate(mapping.items()):
+        for input_index, name in enumerate(trace_names(mapping_value)):
+            index.setdefault(name, []).append([output_name, output_index, input_index])
+    return index
+
+
+def compile_name_mappings(directory: Path = MAPPING_CONFIGS_DIRECTORY) -> Path:
+    """Saves the mappings and trace name indexes of the YAML configs in directory to the compiled JSON file, replacing
+    the previous file atomically, and returns the path of the file."""
+    import yaml
+
+    compiled = {"sources": {}, "mappings": {}, "trace_name_indexes": {}}
+    for mapping_name in MAPPING_NAMES:
+        source = Path(directory) / f"{mapping_name}.yaml"
+        compiled["sources"][mapping_name] = hashlib.sha256(
+            source.read_bytes()
+        ).hexdigest()
+        with open(source, "r") as f:
+            mapping = yaml.safe_load(f)
+        compiled["mappings"][mapping_name] = mapping
+        if mapping_name in TRACE_NAME_MAPPINGS:
+            compiled["trace_name_indexes"][mapping_name] = create_trace_name_index(
+                mapping
+            )
+    compiled_file = Path(directory) / COMPILED_MAPPINGS_FILENAME
+    temporary_file = compiled_file.with_suffix(f".{os.getpid()}.tmp")
+    with open(temporary_file, "w") as f:
+        json.dump(compiled, f, indent=1)
+        f.write("\n")
+    os.replace(temporary_file, compiled_file)
+    return compiled_file
+
+
+@functools.cache
+def _load_compiled_mappings() -> dict:
+    compiled_file = MAPPING_CONFIGS_DIRECTORY / COMPILED_MAPPINGS_FILENAME
+    if not compiled_file.is_file():
+        return {"sources": {}}
+    with open(compiled_file, "r") as f:
+        return json.load(f)
+
+
+def _source_file(mapping_name: MappingName) -> Path:
+    return MAPPING_CONFIGS_DIRECTORY / f"{mapping_name}.yaml"
+
+
+@functools.cache
+def _source_hash(mapping_name: MappingName) -> str:
+    return hashlib.sha256(_source_file(mapping_name).read_bytes()).hexdigest()
+
+
+if __name__ == "__main__":
+    print(f"Saved {compile_name_mappings()}")
@@ -0,0 +1,159 @@
+import os
+from typing import Callable, Iterable, Iterator, Literal
+
+from pydantic import BaseModel, Field
+
+_JOBLIB_BACKENDS = {"process": "loky", "thread": "threading"}
+
+# Read by Polars when its thread pool is created, the first time it's used in a worker process.
+_POLARS_MAX_THREADS = "POLARS_MAX_THREADS"
+
+
+class ParallelConfig(BaseModel):
+    """A Pydantic class configuring how the parse functions run their tasks concurrently.
+
+    Examples:
+
+    Use at most four worker processes, leaving the rest of the machine free for other jobs.
+
+    >>> config = ParallelConfig(n_workers=4)
+
+    Run tasks one at a time in the calling process, e.g. when debugging.
+
+    >>> config = ParallelConfig(backend='sequential')
+
+    >>> config.resolve_n_workers(n_tasks=10)
+    1
+
+    Run two worker processes, each with a Polars thread pool of four threads.
+
+    >>> config = ParallelConfig(n_workers=2, threads_per_worker=4)
+
+    Attributes:
+        n_workers: int, the maximum number of workers. By default, two fewer than the number of CPUs available to
+            the process, and at least one. Fewer workers are started if there are fewer tasks than workers.
+        backend: str, 'process' (default) runs tasks in separate worker processes, 'thread' runs tasks in a thread
+            pool in the calling process, and 'sequential' runs tasks one after the other in the calling process.
+            Tasks are always run sequentially if only one worker is used.
+        batch_size: int or 'auto', the number of tasks sent to a worker at once, see joblib.Parallel.
+        pre_dispatch: int or str, the number of tasks dispatched ahead of the workers, given as a number or an
+            expression of n_jobs, see joblib.Parallel.
+        threads_per_worker: int, the number of threads used by Polars, Arrow, and other libraries with thread pools in
+            each worker process. By default, the CPUs the config allows, n_workers or its default, are divided between
+            the workers started, so the thread pools of the workers use no more CPUs than n_workers allows, and
+            workers don't compete for CPUs with each other's thread pools. Only applies to the 'process' backend,
+            with the other backends tasks share the thread pools of the calling process.
+        max_write_workers: int, optional, the number of threads each task uses to write the partitions of its trace
+            concurrently. By default partitions are written one at a time, which suits local disks, writing
+            concurrently can be faster on network file systems.
+    """
+
+    n_workers: int | None = Field(default=None, ge=1)
+    backend: Literal["process", "thread", "sequential"] = "process"
+    batch_size: int | Literal["auto"] = "auto"
+    pre_dispatch: int | str = "2*n_jobs"
+    threads_per_worker: int | None = Field(default=None, ge=1)
+    max_write_workers: int | None = Field(default=None, ge=1)
+
+    def resolve_n_workers(self, n_tasks: int | None = None) -> int:
+        """Returns the number of workers to use for n_tasks tasks."""
+        if self.backend == "sequential":
+            return 1
+        n_workers = self.n_workers
+        if n_workers is None:
+            n_workers = max(1, available_cpu_count() - 2)
+        if n_tasks is not None:
+            n_workers = min(n_workers, max(1, n_tasks))
+        return n_workers
+
+    def resolve_threads_per_worker(self, n_workers: int) -> int:
+        """Returns the number of threads each of n_workers worker processes should use."""
+        if self.threads_per_worker is not None:
+            return self.threads_per_worker
+        return max(1, self.resolve_n_workers() // n_workers)
+
+
+def available_cpu_count() -> int:
+    """Returns the number of CPUs the current process can run on, which may be fewer than os.cpu_count()."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def resolve_parallel_config(
+    use_concurrency: bool, parallel_config: ParallelConfig | None
+) -> ParallelConfig:
+    """Combines the use_concurrency flag of the parse functions with an optional ParallelConfig."""
+    if not use_concurrency:
+        return ParallelConfig(backend="sequential")
+    if parallel_config is None:
+        return ParallelConfig()
+    return parallel_config
+
+
+def run_tasks(
+    func: Callable, task_args: Iterable[tuple], parallel_config: ParallelConfig
+) -> list:
+    """Calls func with each tuple of arguments in task_args, as configured by parallel_config.
+
+    Returns:
+        list of the values returned by func, in the order of task_args.
+    """
+    return list(_run_tasks(func, task_args, parallel_config, return_as="generator"))
+
+
+def run_tasks_as_completed(
+    func: Callable, task_args: Iterable[tuple], parallel_config: ParallelConfig
+) -> Iterator:
+    """Calls func with each tuple of arguments in task_args, yielding the values returned as tasks complete.
+
+    Values are yielded in order of completion rather than the order of task_args, so the caller can record the
+    progress of long runs as it happens.
+    """
+    return _run_tasks(func, task_args, parallel_config, return_as="generator_unordered")
+
+
+def _run_tasks(
+    func: Callable,
+    task_args: Iterable[tuple],
+    parallel_config: ParallelConfig,
+    return_as: str,
+) -> Iterator:
+    task_args = list(task_args)
+    n_workers = parallel_config.resolve_n_workers(len(task_args))
+    if n_workers == 1:
+        yield from (func(*args) for args in task_args)
+        return
+    # joblib is imported when it is first needed, as it is slow to import and isn't needed by sequential runs.
+    from joblib import Parallel, delayed
+
+    tasks = (delayed(func)(*args) for args in task_args)
+    parallel_kwargs = dict(
+        n_jobs=n_workers,
+        batch_size=parallel_config.batch_size,
+        pre_dispatch=parallel_config.pre_dispatch,
+        return_as=return_as,
+    )
+    if parallel_config.backend == "process":
+        n_threads = parallel_config.resolve_threads_per_worker(n_workers)
+        backend = thread_limited_process_backend(n_threads)
+    else:
+        backend = _JOBLIB_BACKENDS[parallel_config.backend]
+    yield from Parallel(backend=backend, **parallel_kwargs)(tasks)
+
+
+def thread_limited_process_backend(n_threads: int):
+    """Returns a joblib process backend whose worker processes limit their thread pools to n_threads threads.
+
+    The limits are passed to the workers in the environment they are started with, so the environment and joblib
+    configuration of the calling process are left unchanged. joblib limits the OpenMP and BLAS thread pools, which
+    Arrow also uses to size its thread pool, and Polars is limited through the POLARS_MAX_THREADS environment
+    variable. Worker processes are restarted when the limit changes, so existing workers never run with a different
+    limit.
+    """
+    from joblib.parallel import LokyBackend
+
+    class ThreadLimitedLokyBackend(LokyBackend):
+        MAX_NUM_THREADS_VARS = [*LokyBackend.MAX_NUM_THREADS_VARS, _POLARS_MAX_THREADS]
+
+    return ThreadLimitedLokyBackend(inner_max_num_threads=n_threads)
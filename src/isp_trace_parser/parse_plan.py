@@ -0,0 +1,242 @@
+"""Describes planned parse tasks as a table, so a parse can be inspected before it is run, and run from the table.
+
+The table is created from the tasks planned by the parse functions without parsing any traces or writing any files.
+Only the first and last lines of each input file are read, to find the dates the trace covers.
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+from pydantic import NonNegativeInt, validate_call
+
+from isp_trace_parser.manifest import ChangeDetection, task_key
+from isp_trace_parser.parallel import ParallelConfig, resolve_parallel_config
+from isp_trace_parser.parsed_store import (
+    CONSOLIDATED_FILENAME,
+    OutputLayout,
+    PartitionScheme,
+    add_partition_as_column,
+    write_store_options,
+)
+from isp_trace_parser.scheduler import run_parse_tasks
+from isp_trace_parser.trace_restructure_helper_functions import (
+    ErrorHandling,
+    ParseTask,
+)
+
+INTERVALS_PER_DAY = 48
+
+# Enough to contain the last line of a trace file, which has 48 values.
+_LAST_LINE_BYTES = 8192
+
+PARSE_PLAN_SCHEMA = {
+    "trace": pl.String,
+    "output_directory": pl.String,
+    "inputs": pl.List(pl.String),
+    "outputs": pl.List(pl.String),
+    "estimated_bytes": pl.Int64,
+    "estimated_rows": pl.Int64,
+    "partition_scheme": pl.String,
+    "output_layout": pl.String,
+    "shard_index": pl.Int64,
+    "num_shards": pl.Int64,
+    "task": pl.Object,
+}
+
+
+def read_trace_dates(filepath: Path) -> tuple[date, date]:
+    """Returns the first and last day of data in an AEMO trace CSV, reading only its first and last lines."""
+    with open(filepath, "rb") as f:
+        f.readline()
+        first_line = f.readline()
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - _LAST_LINE_BYTES))
+        last_lines = f.read().rstrip().splitlines()
+    if not first_line.strip() or not last_lines:
+        raise ValueError(f"{filepath} contains no trace data.")
+    return _parse_row_date(first_line, filepath), _parse_row_date(
+        last_lines[-1], filepath
+    )
+
+
+def _parse_row_date(line: bytes, filepath: Path) -> date:
+    try:
+        year, month, day = (int(v) for v in line.split(b",", 3)[:3])
+        return date(year, month, day)
+    except ValueError:
+        raise ValueError(f"{filepath} does not start with Year, Month and Day columns.")
+
+
+def get_output_partitions(
+    first_day: date, last_day: date, partition_scheme: PartitionScheme
+) -> list[str]:
+    """Returns the labels of the partitions a trace covering first_day to last_day is saved in.
+
+    Examples:
+
+    >>> get_output_partitions(date(2030, 7, 1), date(2031, 6, 30), 'year')
+    ['Year2030', 'Year2031']
+
+    >>> get_output_partitions(date(2030, 7, 1), date(2031, 6, 30), 'financial_year')
+    ['FinancialYear2031']
+    """
+    first_interval = datetime(first_day.year, first_day.month, first_day.day, 0, 30)
+    last_interval = datetime(last_day.year, last_day.month, last_day.day) + timedelta(
+        days=1
+    )
+    days = pl.datetime_range(
+        first_interval, last_interval, interval="1d", eager=True
+    ).append(pl.Series([last_interval]))
+    partitions = add_partition_as_column(
+        pl.DataFrame({"Datetime": days}), partition_scheme
+    )["Partition"]
+    return partitions.unique(maintain_order=True).to_list()
+
+
+def create_parse_plan(
+    tasks: list[ParseTask],
+    partition_scheme: PartitionScheme,
+    output_layout: OutputLayout,
+    shard_index: int = 0,
+    num_shards: int = 1,
+) -> pl.DataFrame:
+    """Returns a table describing the parse tasks, with a row per output trace.
+
+    Columns:
+        trace: the key identifying the trace in the manifest of its output directory.
+        output_directory: the parsed directory the trace is saved in.
+        inputs: the input files read for the trace.
+        outputs: the files the trace is saved in, with the consolidated layout the file is shared by all traces.
+        estimated_bytes: the total size of the input files, which is what the cost of a task scales with.
+        estimated_rows: the number of half-hourly values in the parsed trace.
+        partition_scheme and output_layout: the options the trace is saved with.
+        shard_index and num_shards: the shard the tasks were selected for.
+        task: the ParseTask, used by run_parse_plan.
+    """
+    rows = []
+    for task in tasks:
+        dates = [read_trace_dates(f) for f in task.files]
+        first_day = min(d[0] for d in dates)
+        last_day = max(d[1] for d in dates)
+        output_directory = Path(task.output_directory)
+        if output_layout == "consolidated":
+            outputs = [output_directory / CONSOLIDATED_FILENAME]
+        else:
+            outputs = [
+                output_directory
+                / task.write_output_filepath({**task.metadata, "partition": partition})
+                for partition in get_output_partitions(
+                    first_day, last_day, partition_scheme
+                )
+            ]
+        rows.append(
+            {
+                "trace": task_key(task),
+                "output_directory": str(output_directory),
+                "inputs": [str(f) for f in task.files],
+                "outputs": [str(f) for f in outputs],
+                "estimated_bytes": sum(Path(f).stat().st_size for f in task.files),
+                "estimated_rows": ((last_day - first_day).days + 1) * INTERVALS_PER_DAY,
+                "partition_scheme": partition_scheme,
+                "output_layout": output_layout,
+                "shard_index": shard_index,
+                "num_shards": num_shards,
+            }
+        )
+    columns = {
+        name: pl.Series(name, [row[name] for row in rows], dtype=dtype)
+        for name, dtype in PARSE_PLAN_SCHEMA.items()
+        if name != "task"
+    }
+    columns["task"] = pl.Series("task", tasks, dtype=pl.Object)
+    return pl.DataFrame(columns)
+
+
+@validate_call(config={"arbitrary_types_allowed": True})
+def run_parse_plan(
+    parse_plan: pl.DataFrame,
+    use_concurrency: bool = True,
+    parallel_config: ParallelConfig | None = None,
+    incremental: bool = False,
+    change_detection: ChangeDetection = "size_mtime",
+    errors: ErrorHandling = "raise",
+    max_retries: NonNegativeInt = 0,
+):
+    """Runs the tasks in a table returned by a parse function called with plan=True.
+
+    Rows can be removed from the table before it is run, e.g. to parse only the traces in some output directories.
+    If the table was created for a shard, the run records are kept in the files of that shard.
+    The result is the same as calling the parse function without plan=True.
+
+    Examples:
+
+    >>> from isp_trace_parser import parse_solar_traces
+
+    >>> parse_plan = parse_solar_traces(
+    ... input_directory='example_input_data/solar',
+    ... parsed_directory='example_parsed_data/solar',
+    ... plan=True,
+    ... )
+
+    >>> first_trace = parse_plan.sort('trace').row(0, named=True)
+
+    >>> from pathlib import Path
+
+    >>> [Path(f).as_posix() for f in first_trace['inputs']]
+    ['example_input_data/solar/REZ_Q1_Far_North_QLD_SAT_RefYear2011.csv']
+
+    >>> Path(first_trace['outputs'][0]).as_posix()
+    'example_parsed_data/solar/RefYear2011/Area/Q1/SAT/RefYear2011_Q1_SAT_HalfYear2021-2.parquet'
+
+    >>> first_trace['estimated_rows']
+    596064
+
+    Running the plan parses the traces into example_parsed_data/solar, so it isn't run here.
+
+    >>> run_parse_plan(parse_plan)  # doctest: +SKIP
+
+    Args:
+        parse_plan: polars.DataFrame, the table of tasks returned by parse_solar_traces, parse_wind_traces,
+            parse_demand_traces or parse_all_traces called with plan=True.
+        use_concurrency: boolean, default True, specifies whether to use parallel processing.
+        parallel_config: ParallelConfig, optional, see scheduler.parse_trace_directories.
+        incremental: boolean, default False, see scheduler.parse_trace_directories.
+        change_detection: str, default 'size_mtime', see scheduler.parse_trace_directories.
+        errors: str, default 'raise', see scheduler.parse_trace_directories.
+        max_retries: int, default 0, see scheduler.parse_trace_directories.
+
+    Returns: None, or if errors is 'collect', a list of dicts describing the traces that failed to parse.
+    """
+    options = parse_plan.select(
+        "partition_scheme", "output_layout", "shard_index", "num_shards"
+    ).unique()
+    if options.height > 1:
+        raise ValueError(
+            "All tasks in a parse plan must use the same partition_scheme, output_layout and shard."
+        )
+    tasks = parse_plan["task"].to_list()
+    if not tasks:
+        return [] if errors == "collect" else None
+    partition_scheme, output_layout, shard_index, num_shards = options.row(0)
+    for output_directory in parse_plan["output_directory"].unique(maintain_order=True):
+        write_store_options(
+            Path(output_directory),
+            partition_scheme=partition_scheme,
+            output_layout=output_layout,
+        )
+    run_errors = run_parse_tasks(
+        tasks,
+        partition_scheme,
+        output_layout,
+        resolve_parallel_config(use_concurrency, parallel_config),
+        incremental,
+        change_detection,
+        errors,
+        max_retries,
+        shard_index=shard_index,
+        num_shards=num_shards,
+    )
+    if errors == "collect":
+        return run_errors
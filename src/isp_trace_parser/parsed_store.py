@@ -0,0 +1,281 @@
+"""Describes how parsed trace data is laid out on disk.
+
+Each parsed directory records the options it was written with in a small JSON file, so the get_data functions can
+read data from any directory regardless of the options used when parsing.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Literal
+
+import polars as pl
+
+PartitionScheme = Literal["half_year", "year", "financial_year", "whole_trace"]
+OutputLayout = Literal["partitioned", "consolidated"]
+
+STORE_OPTIONS_FILENAME = "parse_options.json"
+
+# Used for directories parsed before the options file was introduced.
+DEFAULT_STORE_OPTIONS = {
+    "partition_scheme": "half_year",
+    "output_layout": "partitioned",
+}
+
+CONSOLIDATED_FILENAME = "traces.parquet"
+STAGING_DIRECTORY = "_staging"
+CONSOLIDATED_SORT_ORDER = ["trace_id", "reference_year", "Datetime"]
+# One leap year of half-hourly intervals, so row group statistics can prune by trace and by year.
+CONSOLIDATED_ROW_GROUP_SIZE = 48 * 366
+
+
+def write_store_options(parsed_directory: Path, **options) -> None:
+    """Records the options used to parse data into parsed_directory.
+
+    Raises:
+        ValueError: if the directory already contains data parsed with different options, as mixing options would
+            leave the directory unreadable.
+    """
+    options = {**DEFAULT_STORE_OPTIONS, **options}
+    existing_options = read_store_options(parsed_directory, default=None)
+    if existing_options is not None and existing_options != options:
+        raise ValueError(
+            f"{parsed_directory} contains data parsed with the options {existing_options}, which differ from "
+            f"the options requested {options}. Parse into an empty directory instead."
+        )
+    parsed_directory.mkdir(parents=True, exist_ok=True)
+    # Written to a file unique to this process and then moved into place, so processes parsing shards into the
+    # same directory never read a partly written file.
+    options_file = parsed_directory / STORE_OPTIONS_FILENAME
+    temporary_file = options_file.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(temporary_file, "w") as f:
+        json.dump(options, f, indent=2)
+        f.write("\n")
+    os.replace(temporary_file, options_file)
+
+
+def read_store_options(
+    parsed_directory: Path, default: dict | None = DEFAULT_STORE_OPTIONS
+) -> dict | None:
+    """Returns the options recorded in parsed_directory, or default if none have been recorded."""
+    options_file = Path(parsed_directory) / STORE_OPTIONS_FILENAME
+    if not options_file.is_file():
+        return None if default is None else dict(default)
+    with open(options_file) as f:
+        return {**DEFAULT_STORE_OPTIONS, **json.load(f)}
+
+
+def add_partition_as_column(
+    trace: pl.DataFrame, partition_scheme: PartitionScheme
+) -> pl.DataFrame:
+    """Sorts the trace by 'Datetime' and adds a 'Partition' column with the label of the file each row is saved in.
+
+    Labels are 'HalfYear<year>-<half>', 'Year<year>', 'FinancialYear<year ending>', or 'AllYears' depending on the
+    partition scheme. 'Datetime' gives the end of each interval, so one second is subtracted before determining
+    which partition an interval belongs to.
+
+    Examples:
+
+    >>> trace = pl.DataFrame({
+    ... 'Datetime': [datetime(2030, 7, 1, 0, 0), datetime(2030, 7, 1, 0, 30)],
+    ... 'Value': [1.0, 2.0],
+    ... })
+
+    >>> add_partition_as_column(trace, 'financial_year')['Partition'].to_list()
+    ['FinancialYear2030', 'FinancialYear2031']
+
+    >>> add_partition_as_column(trace, 'half_year')['Partition'].to_list()
+    ['HalfYear2030-1', 'HalfYear2030-2']
+    """
+    interval = pl.col("Datetime") - pl.duration(seconds=1)
+    if partition_scheme == "half_year":
+        half = pl.when(interval.dt.month() < 7).then(pl.lit("1")).otherwise(pl.lit("2"))
+        label = pl.format("HalfYear{}-{}", interval.dt.year(), half)
+    elif partition_scheme == "year":
+        label = pl.format("Year{}", interval.dt.year())
+    elif partition_scheme == "financial_year":
+        label = pl.format(
+            "FinancialYear{}",
+            interval.dt.year() + (interval.dt.month() >= 7).cast(pl.Int32),
+        )
+    elif partition_scheme == "whole_trace":
+        label = pl.lit("AllYears")
+    else:
+        raise ValueError(f"The partition scheme {partition_scheme} is not recognised.")
+    return trace.sort("Datetime").with_columns(label.alias("Partition"))
+
+
+def format_partition_label(metadata: dict) -> str:
+    """Returns the partition label used in output filenames.
+
+    The label is taken from the 'partition' key, or for half-yearly partitions it can be given as just the half-year,
+    e.g. '2030-1', under the key 'hy'.
+    """
+    if "partition" in metadata:
+        return metadata["partition"]
+    return f"HalfYear{metadata['hy']}"
+
+
+def get_partition_labels(
+    start_year: int, end_year: int, year_type: str, partition_scheme: PartitionScheme
+) -> list[str]:
+    """Returns the labels of the partitions containing data for a range of years.
+
+    Examples:
+
+    >>> get_partition_labels(2030, 2031, 'fy', 'year')
+    ['Year2029', 'Year2030', 'Year2031']
+
+    >>> get_partition_labels(2030, 2031, 'fy', 'financial_year')
+    ['FinancialYear2030', 'FinancialYear2031']
+
+    >>> get_partition_labels(2030, 2030, 'fy', 'half_year')
+    ['HalfYear2029-2', 'HalfYear2030-1']
+    """
+    if year_type not in ("fy", "calendar"):
+        raise ValueError(f"The year_type {year_type} is not recognised.")
+    fy = year_type == "fy"
+    if partition_scheme == "half_year":
+        if fy:
+            half_years = [(start_year - 1, 2)]
+            half_years += [(y, h) for y in range(start_year, end_year) for h in (1, 2)]
+            half_years += [(end_year, 1)]
+        else:
+            half_years = [
+                (y, h) for y in range(start_year, end_year + 1) for h in (1, 2)
+            ]
+        return [f"HalfYear{y}-{h}" for y, h in half_years]
+    elif partition_scheme == "year":
+        first_year = start_year - 1 if fy else start_year
+        return [f"Year{y}" for y in range(first_year, end_year + 1)]
+    elif partition_scheme == "financial_year":
+        last_year = end_year if fy else end_year + 1
+        return [f"FinancialYear{y}" for y in range(start_year, last_year + 1)]
+    elif partition_scheme == "whole_trace":
+        return ["AllYears"]
+    raise ValueError(f"The partition scheme {partition_scheme} is not recognised.")
+
+
+def partitions_align_with_years(
+    year_type: str, partition_scheme: PartitionScheme
+) -> bool:
+    """Whether partitions contain only whole years of the year type, in which case reads don't need filtering."""
+    return partition_scheme == "half_year" or (
+        (partition_scheme, year_type)
+        in [("year", "calendar"), ("financial_year", "fy")]
+    )
+
+
+def get_time_window(
+    start_year: int, end_year: int, year_type: str
+) -> tuple[datetime, datetime]:
+    """Returns the (exclusive) start and (inclusive) end of the interval ending datetimes in a range of years.
+
+    Examples:
+
+    >>> get_time_window(2030, 2031, 'fy')
+    (datetime.datetime(2029, 7, 1, 0, 0), datetime.datetime(2031, 7, 1, 0, 0))
+    """
+    if year_type == "fy":
+        return datetime(start_year - 1, 7, 1), datetime(end_year, 7, 1)
+    elif year_type == "calendar":
+        return datetime(start_year, 1, 1), datetime(end_year + 1, 1, 1)
+    raise ValueError(f"The year_type {year_type} is not recognised.")
+
+
+def trace_id_from_filepath(filepath: str | Path, reference_year: int) -> str:
+    """Returns the key identifying a trace in the consolidated layout.
+
+    The key is the directory the trace would be saved in by the partitioned layout, with the reference year removed.
+
+    Examples:
+
+    >>> trace_id_from_filepath(
+    ... 'RefYear2011/Area/Q1/WH/RefYear2011_Q1_WH_HalfYear2030-1.parquet', 2011)
+    'Area/Q1/WH'
+    """
+    parts = Path(filepath).parent.parts
+    return "/".join(part for part in parts if part != f"RefYear{reference_year}")
+
+
+def stage_trace_for_consolidation(
+    trace: pl.DataFrame,
+    file_metadata: dict,
+    output_directory: Path,
+    write_output_filepath: callable,
+) -> None:
+    """Saves a trace to the staging area of output_directory, ready to be merged by consolidate_staged_traces.
+
+    Each trace is staged in its own file, so traces can be staged concurrently by separate processes.
+    """
+    filepath = write_output_filepath({**file_metadata, "partition": "AllYears"})
+    reference_year = int(file_metadata["reference_year"])
+    staging_filepath = output_directory / STAGING_DIRECTORY / filepath
+    staging_filepath.parent.mkdir(parents=True, exist_ok=True)
+    trace.select(
+        pl.lit(trace_id_from_filepath(filepath, reference_year)).alias("trace_id"),
+        pl.lit(reference_year, dtype=pl.Int32).alias("reference_year"),
+        pl.col("Datetime"),
+        pl.col("Value"),
+    ).write_parquet(staging_filepath)
+
+
+def consolidate_staged_traces(parsed_directory: Path) -> None:
+    """Merges the staged traces into the single consolidated parquet file in parsed_directory.
+
+    Traces already in the consolidated file are replaced by staged traces with the same trace_id and reference_year.
+    The file is sorted by trace_id, reference_year, and Datetime, and written with row groups of about a year, so
+    that reads filtering on these columns only decode the row groups they need. The new file replaces the old one
+    atomically, and the staging area is removed once the merge is complete.
+    """
+    staging_directory = parsed_directory / STAGING_DIRECTORY
+    staged_files = sorted(staging_directory.rglob("*.parquet"))
+    if not staged_files:
+        shutil.rmtree(staging_directory, ignore_errors=True)
+        return
+
+    traces = pl.scan_parquet(staged_files)
+    consolidated_file = parsed_directory / CONSOLIDATED_FILENAME
+    if consolidated_file.is_file():
+        staged_keys = traces.select("trace_id", "reference_year").unique()
+        existing_traces = (
+            pl.scan_parquet(consolidated_file)
+            .with_columns(pl.col("trace_id").cast(pl.String))
+            .join(staged_keys, on=["trace_id", "reference_year"], how="anti")
+        )
+        traces = pl.concat([existing_traces, traces])
+
+    # trace_id is sorted as a string and then saved as a categorical, so it is written with dictionary encoding and
+    # each row stores an index into the small set of trace names rather than the name itself.
+    temporary_file = consolidated_file.with_suffix(".parquet.tmp")
+    traces.sort(CONSOLIDATED_SORT_ORDER).with_columns(
+        pl.col("trace_id").cast(pl.Categorical)
+    ).sink_parquet(temporary_file, row_group_size=CONSOLIDATED_ROW_GROUP_SIZE)
+    os.replace(temporary_file, consolidated_file)
+    shutil.rmtree(staging_directory)
+
+
+def scan_consolidated_trace(
+    parsed_directory: Path,
+    trace_id: str,
+    reference_year: int,
+    start: datetime,
+    end: datetime,
+) -> pl.LazyFrame:
+    """Returns a lazy query of the values of one trace with interval ending datetimes in (start, end] from the
+    consolidated file.
+
+    The filters are pushed down to the parquet reader, so only row groups that can contain matching rows are read.
+    """
+    return (
+        pl.scan_parquet(Path(parsed_directory) / CONSOLIDATED_FILENAME)
+        .filter(
+            (pl.col("trace_id") == trace_id)
+            & (pl.col("reference_year") == reference_year)
+            & (pl.col("Datetime") > start)
+            & (pl.col("Datetime") <= end)
+        )
+        .select("Datetime", "Value")
+    )
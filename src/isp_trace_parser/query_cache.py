@@ -0,0 +1,253 @@
+"""An opt-in, on-disk cache of the results of get_data queries, shared by processes using the same cache directory.
+
+Jobs often read the same full-horizon trace many times, e.g. a project with a standard 2025-2050 reference year
+mapping, which assembles about 50 half-year files on every call. When the cache is enabled, the result of each
+*_single_reference_year and *_multiple_reference_years query is saved as one uncompressed Arrow IPC file, which is
+read back without decoding. Files are named by a hash of the query and the modification time and size of the source
+files it reads, so results of files that have been re-parsed are never returned, and stale entries are evicted,
+oldest used first, once the files in the cache directory exceed max_bytes.
+
+Entries are written to a temporary file and moved into place with os.replace, so processes sharing the directory
+only ever see complete files. An entry removed by another process while being read is treated as a miss, as is an
+entry that can't be read, e.g. one truncated by a full disk, which is also deleted.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+import polars as pl
+
+DEFAULT_MAX_BYTES = 10 * 1024**3
+ENTRY_SUFFIX = ".arrow"
+
+
+class QueryCacheStats(NamedTuple):
+    """Counts of the reads of a QueryCache in this process, and the entries in its directory.
+
+    Attributes:
+        hits: int, the number of queries read from the cache.
+        misses: int, the number of queries read from the source files.
+        evictions: int, the number of entries this process evicted to stay within max_bytes.
+        entries: int, the number of entries in the cache directory.
+        size_bytes: int, the size of the entries in the cache directory.
+        max_bytes: int, the budget of the cache.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        reads = self.hits + self.misses
+        return self.hits / reads if reads else 0.0
+
+
+class QueryCache:
+    """A cache of query results saved in directory, limited to max_bytes on disk.
+
+    Examples:
+
+    >>> import tempfile
+
+    >>> cache = QueryCache(tempfile.mkdtemp())
+
+    >>> source = 'example_parsed_data/wind/RefYear2011/Area/Q1/WH/RefYear2011_Q1_WH_HalfYear2030-1.parquet'
+
+    >>> key = cache.key({'area': 'Q1', 'year': 2030}, [source])
+
+    >>> cache.get(key) is None
+    True
+
+    >>> cache.put(key, pl.read_parquet(source))
+
+    >>> cache.get(key).height
+    8688
+
+    >>> cache.stats().hits, cache.stats().misses, cache.stats().entries
+    (1, 1, 1)
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative.")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def key(self, query: dict, source_files: list[str | Path]) -> str:
+        """Returns the key of the result of query, which reads source_files.
+
+        Glob patterns in source_files are expanded, and the modification time and size of each file is part of the
+        key, so the key changes whenever a source file is rewritten.
+        """
+        sources = []
+        for source in source_files:
+            source = str(source)
+            files = sorted(glob.glob(source)) if glob.has_magic(source) else [source]
+            for file in files:
+                stat = os.stat(file)
+                sources.append([file, stat.st_mtime_ns, stat.st_size])
+        content = json.dumps({"query": query, "sources": sources}, sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, key: str) -> pl.DataFrame | None:
+        """Returns the result saved under key, or None if there isn't one or it can't be read.
+
+        Entries that can't be read are deleted, so the result is saved again by the next put.
+        """
+        filepath = self._filepath(key)
+        try:
+            data = pl.read_ipc(filepath)
+        except FileNotFoundError:
+            data = None
+        except (OSError, pl.exceptions.PolarsError):
+            try:
+                filepath.unlink(missing_ok=True)
+            except OSError:
+                # Another process has the entry open, it is replaced by the next put or evicted later.
+                pass
+            data = None
+        else:
+            # The modification time records when the entry was last used, for eviction. The entry may have been
+            # evicted by another process since it was read, which doesn't affect the data read.
+            try:
+                os.utime(filepath)
+            except OSError:
+                pass
+        with self._lock:
+            if data is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return data
+
+    def put(self, key: str, data: pl.DataFrame) -> None:
+        """Saves data under key, then evicts the least recently used entries if the cache exceeds max_bytes.
+
+        Results larger than max_bytes aren't saved, nor are results whose entry file can't be written. Entries that
+        can't be removed, e.g. because another process has them open, are skipped when evicting.
+        """
+        if data.estimated_size() > self.max_bytes:
+            return
+        descriptor, temporary = tempfile.mkstemp(
+            dir=self.directory, prefix=f".{key}", suffix=".tmp"
+        )
+        os.close(descriptor)
+        try:
+            data.rechunk().write_ipc(temporary, compression="uncompressed")
+            os.replace(temporary, self._filepath(key))
+        except OSError:
+            # E.g. the entry is open in another process on Windows, the result isn't saved but the query succeeds.
+            Path(temporary).unlink(missing_ok=True)
+            return
+        except BaseException:
+            Path(temporary).unlink(missing_ok=True)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        size = sum(stat.st_size for _, stat in entries)
+        for filepath, stat in sorted(entries, key=lambda entry: entry[1].st_mtime_ns):
+            if size <= self.max_bytes:
+                break
+            try:
+                filepath.unlink()
+            except FileNotFoundError:
+                # Already evicted by another process.
+                size -= stat.st_size
+            except OSError:
+                # The entry can't be removed while another process has it open on some platforms, e.g. Windows, so
+                # it is kept and newer entries are evicted instead.
+                pass
+            else:
+                with self._lock:
+                    self._evictions += 1
+                size -= stat.st_size
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        entries = []
+        for filepath in self.directory.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                entries.append((filepath, filepath.stat()))
+            except FileNotFoundError:
+                pass
+        return entries
+
+    def _filepath(self, key: str) -> Path:
+        return self.directory / f"{key}{ENTRY_SUFFIX}"
+
+    def stats(self) -> QueryCacheStats:
+        entries = self._entries()
+        with self._lock:
+            return QueryCacheStats(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(entries),
+                sum(stat.st_size for _, stat in entries),
+                self.max_bytes,
+            )
+
+    def clear(self) -> None:
+        """Removes all entries from the cache directory and resets the statistics."""
+        for filepath, _ in self._entries():
+            filepath.unlink(missing_ok=True)
+        with self._lock:
+            self._hits = self._misses = self._evictions = 0
+
+
+_query_cache: QueryCache | None = None
+
+
+def enable_query_cache(
+    directory: str | Path, max_bytes: int = DEFAULT_MAX_BYTES
+) -> QueryCache:
+    """Saves the results of the get_data *_single_reference_year and *_multiple_reference_years functions in
+    directory, see QueryCache.
+
+    Processes enabling the cache with the same directory share its entries, so each query only needs to be read from
+    the source files once.
+
+    Examples:
+
+    >>> import tempfile
+
+    >>> cache = enable_query_cache(tempfile.mkdtemp(), max_bytes=2 * 1024**3)
+
+    >>> disable_query_cache()
+
+    Args:
+        directory: str or Path, the directory to save results in, created if it doesn't exist.
+        max_bytes: int, default 10 GiB, the size on disk of the entries the cache can hold.
+
+    Returns: the QueryCache used, whose stats() give the hits and misses of the get_data functions.
+    """
+    global _query_cache
+    _query_cache = QueryCache(directory, max_bytes)
+    return _query_cache
+
+
+def disable_query_cache() -> None:
+    """Stops using the query cache in this process, the saved entries are kept."""
+    global _query_cache
+    _query_cache = None
+
+
+def get_query_cache() -> QueryCache | None:
+    """Returns the cache used by the get_data functions, or None if caching isn't enabled."""
+    return _query_cache
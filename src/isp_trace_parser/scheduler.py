@@ -0,0 +1,369 @@
+"""Runs planned parse tasks, skipping unchanged traces and recording what was parsed, and what failed, in each output
+directory."""
+
+import functools
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from pydantic import BaseModel
+
+from isp_trace_parser.manifest import (
+    ERROR_REPORT_FILENAME,
+    JOURNAL_FILENAME,
+    MANIFEST_FILENAME,
+    ChangeDetection,
+    append_to_journal,
+    create_manifest_entry,
+    fingerprint_inputs,
+    read_journal,
+    read_manifest,
+    remove_journal,
+    shard_filename,
+    task_is_unchanged,
+    task_key,
+    write_error_report,
+    write_manifest,
+)
+from isp_trace_parser.parallel import (
+    ParallelConfig,
+    resolve_parallel_config,
+    run_tasks_as_completed,
+)
+from isp_trace_parser.parsed_store import (
+    OutputLayout,
+    PartitionScheme,
+    consolidate_staged_traces,
+    write_store_options,
+)
+from isp_trace_parser.trace_restructure_helper_functions import (
+    ErrorHandling,
+    ParseTask,
+    describe_error,
+    run_parse_task,
+)
+
+
+class TraceDirectory(NamedTuple):
+    """A directory of traces of one type to parse, see parse_trace_directories.
+
+    Attributes:
+        plan_directory: the function planning the tasks of the trace type, e.g. solar_traces.plan_solar_directory.
+        input_directory: Path, the directory of AEMO trace CSVs to parse.
+        parsed_directory: Path, the directory the parsed traces are saved in.
+        filters: the metadata filter of the trace type, or None to parse all traces.
+    """
+
+    plan_directory: Callable[..., list[ParseTask]]
+    input_directory: Path
+    parsed_directory: Path
+    filters: BaseModel | None = None
+
+
+# Allowance for formatting and writing an output trace, in bytes of input CSV, used when estimating task costs.
+_OUTPUT_TRACE_COST = 2_000_000
+
+
+def estimate_task_cost(task: ParseTask) -> int:
+    """Estimates the relative cost of running a task from the size of its input files and the number of traces.
+
+    Each input file is read and formatted, and each task writes one output trace, so the cost is the total input
+    size plus a fixed allowance per trace.
+    """
+    input_size = 0
+    for filepath in task.files:
+        try:
+            input_size += Path(filepath).stat().st_size
+        except OSError:
+            pass
+    return input_size + _OUTPUT_TRACE_COST
+
+
+def order_tasks_largest_first(tasks: list[ParseTask]) -> list[ParseTask]:
+    """Orders tasks by decreasing estimated cost.
+
+    Starting the longest tasks first stops them from running on their own at the end of a run, while the other
+    workers are idle, so the run takes close to the total work divided by the number of workers.
+    """
+    costs = {id(task): estimate_task_cost(task) for task in tasks}
+    return sorted(tasks, key=lambda task: costs[id(task)], reverse=True)
+
+
+def select_shard(
+    tasks: list[ParseTask],
+    shard_index: int,
+    num_shards: int,
+    output_layout: OutputLayout = "partitioned",
+) -> list[ParseTask]:
+    """Returns the tasks in one of num_shards shards, balanced by estimated cost.
+
+    Tasks are assigned largest first to the shard with the smallest total cost so far. Ties are broken by the task's
+    output directory name and task_key, so every process planning the same input files assigns each task to the same
+    shard, and the shards write disjoint sets of outputs.
+
+    Raises:
+        ValueError: if shard_index isn't less than num_shards, or if the output layout is consolidated, which saves
+            all traces in one file and so can't be written by several processes at once.
+    """
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(
+            f"shard_index must be less than num_shards, got {shard_index} and {num_shards}."
+        )
+    if num_shards == 1:
+        return tasks
+    if output_layout == "consolidated":
+        raise ValueError("The consolidated output layout can't be parsed in shards.")
+
+    costs = {id(task): estimate_task_cost(task) for task in tasks}
+    ordered_tasks = sorted(
+        tasks,
+        key=lambda task: (
+            -costs[id(task)],
+            Path(task.output_directory).name,
+            task_key(task),
+        ),
+    )
+    shard_costs = [0] * num_shards
+    shard_tasks = []
+    for task in ordered_tasks:
+        shard = min(range(num_shards), key=lambda s: (shard_costs[s], s))
+        shard_costs[shard] += costs[id(task)]
+        if shard == shard_index:
+            shard_tasks.append(task)
+    return shard_tasks
+
+
+def parse_trace_directories(
+    trace_directories: list[TraceDirectory],
+    use_concurrency: bool = True,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
+    parallel_config: ParallelConfig | None = None,
+    incremental: bool = False,
+    change_detection: ChangeDetection = "size_mtime",
+    errors: ErrorHandling = "raise",
+    max_retries: int = 0,
+    plan: bool = False,
+    shard_index: int = 0,
+    num_shards: int = 1,
+):
+    """Plans the tasks of each trace directory, then runs them in a single pool of workers, or returns the plan.
+
+    This is the run shared by parse_solar_traces, parse_wind_traces, parse_demand_traces and parse_all_traces, whose
+    options are described here.
+
+    Args:
+        trace_directories: list of TraceDirectory, the directories to plan and parse.
+        use_concurrency: boolean, default True, specifies whether to use parallel processing.
+        partition_scheme: str, default 'half_year', the period of data saved in each parquet file, one of
+            'half_year', 'year' (calendar year), 'financial_year', or 'whole_trace'. The "HalfYear<year>-<half of
+            year>" component of the filenames is replaced with "Year<year>", "FinancialYear<year ending>", or
+            "AllYears" respectively. The scheme is recorded in the parsed directory and the get_data functions
+            read data saved with any scheme.
+        output_layout: str, default 'partitioned', either 'partitioned', which saves each trace in the directory
+            structure described by each parse function, or 'consolidated', which saves all traces in a single parquet
+            file, 'traces.parquet', sorted by trace, reference year and datetime. The get_data functions read data
+            saved with either layout, with the consolidated layout they read only the parts of the file needed for
+            the requested trace and years. partition_scheme does not apply to the consolidated layout.
+        parallel_config: ParallelConfig, optional, the number of workers, backend, batch size and pre-dispatch
+            used when use_concurrency is True. By default, worker processes are used, leaving two CPUs free.
+        incremental: boolean, default False, if True, traces are only parsed if their input files, or the metadata
+            they are saved with (including the output name from the name mappings), have changed since they were
+            last parsed into the parsed directory, or if their output files are missing. The inputs and outputs of
+            each trace are recorded in 'parse_manifest.json' in the parsed directory on every run.
+        change_detection: str, default 'size_mtime', how changes to input files are detected when incremental is
+            True, 'size_mtime' compares file sizes and modification times, and 'hash' compares SHA-256 hashes of
+            the file contents, which is slower but ignores files that are rewritten without changing.
+        errors: str, default 'raise', what happens when a trace can't be parsed, e.g. because of a malformed CSV or
+            a filename that doesn't match the expected pattern. With 'raise' the exception is raised, stopping the
+            run. With 'collect' the other traces are still parsed, and the failures are returned as a list of
+            dicts and saved in 'parse_errors.json' in the parsed directory. With either option, traces are recorded
+            in 'parse_journal.jsonl' in the parsed directory as they are saved, so if a run is stopped, re-running
+            the same parse resumes from where it stopped.
+        max_retries: int, default 0, the number of times a trace that fails to parse is retried before it's treated
+            as an error.
+        plan: boolean, default False, if True, nothing is parsed or written, instead a polars.DataFrame describing
+            the traces that would be parsed is returned, with a row per output trace giving its input files, output
+            files, the total size of its inputs in bytes and the number of half-hourly values it will contain. The
+            table can be run with run_parse_plan.
+        shard_index: int, default 0, which of num_shards shards of the traces to parse.
+        num_shards: int, default 1, the number of shards to split the traces into, so they can be parsed by
+            separate processes or machines writing to the same parsed directory. Traces are assigned to shards
+            by their estimated cost (based on input file sizes), so shards take about the same time, and the
+            assignment is the same on every machine given the same input files. Traces of all the trace directories
+            are split into shards together. Each shard keeps its own manifest, journal and error report, e.g.
+            'parse_manifest.shard0of4.json'. Sharding can't be used with the consolidated output layout.
+
+    Returns: None, or if errors is 'collect', a list of dicts describing the traces that failed to parse, or if plan
+        is True, a polars.DataFrame describing the parse tasks.
+    """
+    # Imported here as parse_plan imports this module to run plans.
+    from isp_trace_parser.parse_plan import create_parse_plan
+
+    tasks = []
+    planning_errors = [] if errors == "collect" else None
+    for plan_directory, input_directory, parsed_directory, filters in trace_directories:
+        tasks += plan_directory(
+            input_directory, parsed_directory, filters, planning_errors
+        )
+
+    tasks = select_shard(tasks, shard_index, num_shards, output_layout)
+    if plan:
+        return create_parse_plan(
+            tasks, partition_scheme, output_layout, shard_index, num_shards
+        )
+
+    for trace_directory in trace_directories:
+        write_store_options(
+            trace_directory.parsed_directory,
+            partition_scheme=partition_scheme,
+            output_layout=output_layout,
+        )
+    run_errors = run_parse_tasks(
+        tasks,
+        partition_scheme,
+        output_layout,
+        resolve_parallel_config(use_concurrency, parallel_config),
+        incremental,
+        change_detection,
+        errors,
+        max_retries,
+        planning_errors,
+        shard_index,
+        num_shards,
+    )
+    if errors == "collect":
+        return run_errors
+
+
+def run_parse_tasks(
+    tasks: list[ParseTask],
+    partition_scheme: PartitionScheme,
+    output_layout: OutputLayout,
+    parallel_config: ParallelConfig,
+    incremental: bool = False,
+    change_detection: ChangeDetection = "size_mtime",
+    errors: ErrorHandling = "raise",
+    max_retries: int = 0,
+    planning_errors: list[dict] | None = None,
+    shard_index: int = 0,
+    num_shards: int = 1,
+) -> list[dict]:
+    """Runs parse tasks, largest first, in a single pool of workers.
+
+    Tasks are saved in their output_directory, with the consolidated layout each output directory is consolidated
+    once all tasks have finished.
+
+    Each completed task is recorded in the journal of its output directory as soon as it finishes, and tasks already
+    in the journal, left by an interrupted run, are skipped. When all tasks have been attempted, the journal is merged
+    into the manifest of the output directory. If incremental is True, tasks whose inputs and metadata match the
+    manifest, and whose outputs still exist, are also skipped.
+
+    A failing task is retried up to max_retries times. If it still fails, and errors is 'raise', the exception is
+    raised, stopping the run, otherwise the failure is added to the list of errors returned and saved in the error
+    report of the output directory, and the other tasks continue.
+
+    If the tasks are one of num_shards shards, the manifest, journal and error report of each shard are kept in
+    separate files, so shards can run at the same time in the same output directories.
+
+    Returns:
+        list of dicts describing the tasks that failed, including any planning_errors.
+    """
+    directories = dict.fromkeys(Path(task.output_directory) for task in tasks)
+    directories.update(
+        dict.fromkeys(Path(e["output_directory"]) for e in planning_errors or [])
+    )
+    manifest_filename = shard_filename(MANIFEST_FILENAME, shard_index, num_shards)
+    journal_filename = shard_filename(JOURNAL_FILENAME, shard_index, num_shards)
+    error_report_filename = shard_filename(
+        ERROR_REPORT_FILENAME, shard_index, num_shards
+    )
+    manifests = {d: read_manifest(d, manifest_filename) for d in directories}
+    journals = {d: read_journal(d, journal_filename) for d in directories}
+
+    inputs = {id(task): fingerprint_inputs(task, change_detection) for task in tasks}
+    tasks = [
+        task
+        for task in tasks
+        if not task_is_unchanged(
+            task, inputs[id(task)], journals[Path(task.output_directory)]
+        )
+        and not (
+            incremental
+            and task_is_unchanged(
+                task, inputs[id(task)], manifests[Path(task.output_directory)]
+            )
+        )
+    ]
+    tasks = order_tasks_largest_first(tasks)
+
+    run_errors = list(planning_errors or [])
+    results = run_tasks_as_completed(
+        functools.partial(
+            _run_parse_task_isolated,
+            partition_scheme=partition_scheme,
+            output_layout=output_layout,
+            errors=errors,
+            max_retries=max_retries,
+            max_write_workers=parallel_config.max_write_workers,
+        ),
+        ((i, task) for i, task in enumerate(tasks)),
+        parallel_config,
+    )
+    for i, task_outputs, error in results:
+        task = tasks[i]
+        directory = Path(task.output_directory)
+        if error is not None:
+            run_errors.append(error)
+            continue
+        entry = create_manifest_entry(task, inputs[id(task)], task_outputs)
+        append_to_journal(directory, task_key(task), entry, journal_filename)
+        journals[directory][task_key(task)] = entry
+
+    for directory in directories:
+        if output_layout == "consolidated":
+            consolidate_staged_traces(directory)
+        manifests[directory].update(journals[directory])
+        write_manifest(directory, manifests[directory], manifest_filename)
+        remove_journal(directory, journal_filename)
+        write_error_report(
+            directory,
+            [e for e in run_errors if Path(e["output_directory"]) == directory],
+            error_report_filename,
+        )
+    return run_errors
+
+
+def _run_parse_task_isolated(
+    index: int,
+    task: ParseTask,
+    partition_scheme: PartitionScheme,
+    output_layout: OutputLayout,
+    errors: ErrorHandling,
+    max_retries: int,
+    max_write_workers: int | None = None,
+) -> tuple[int, list[str] | None, dict | None]:
+    """Runs a task in a worker, returning (index, outputs, None) on success, or (index, None, error) on failure if
+    errors is 'collect'."""
+    for attempt in range(1, max_retries + 2):
+        try:
+            outputs = run_parse_task(
+                task,
+                partition_scheme=partition_scheme,
+                output_layout=output_layout,
+                max_write_workers=max_write_workers,
+            )
+            return index, outputs, None
+        except Exception as exception:
+            if attempt <= max_retries:
+                continue
+            if errors == "raise":
+                raise
+            error = describe_error(
+                task.files,
+                exception,
+                task.output_directory,
+                stage="parsing",
+                attempts=attempt,
+            )
+            error["trace"] = task_key(task)
+            return index, None, error
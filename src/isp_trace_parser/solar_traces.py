@@ -1,25 +1,29 @@
-import functools
-import os
 from pathlib import Path
 from typing import Literal, Optional
 
-import yaml
-from joblib import Parallel, delayed
-from pydantic import BaseModel, validate_call
+import polars as pl
+from pydantic import BaseModel, NonNegativeInt, PositiveInt, validate_call
 
 from isp_trace_parser import input_validation
-from isp_trace_parser.metadata_extractors import extract_solar_trace_metadata
+from isp_trace_parser.manifest import ChangeDetection
+from isp_trace_parser.metadata_extractors import extract_metadata_dicts
+from isp_trace_parser.parallel import (
+    ParallelConfig,
+)
+from isp_trace_parser.parsed_store import (
+    OutputLayout,
+    PartitionScheme,
+    format_partition_label,
+)
+from isp_trace_parser.scheduler import TraceDirectory, parse_trace_directories
 from isp_trace_parser.trace_restructure_helper_functions import (
-    check_filter_by_metadata,
-    get_all_filepaths,
-    get_just_filepaths,
-    get_metadata_for_writing_save_name,
-    get_metadata_that_matches_reference_year,
-    get_metadata_that_matches_trace_names,
-    get_unique_project_and_area_names_in_input_files,
-    get_unique_reference_years_in_metadata,
-    overwrite_metadata_trace_name_with_output_name,
-    process_and_save_files,
+    ErrorHandling,
+    ParseTask,
+    metadata_table_from_dict,
+    name_mapping_table,
+    plan_tasks_from_metadata_table,
+    run_parse_task,
+    scan_input_files,
 )
 
 
@@ -63,6 +67,16 @@ def parse_solar_traces(
     parsed_directory: str | Path,
     use_concurrency: bool = True,
     filters: SolarMetadataFilter | None = None,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
+    parallel_config: ParallelConfig | None = None,
+    incremental: bool = False,
+    change_detection: ChangeDetection = "size_mtime",
+    errors: ErrorHandling = "raise",
+    max_retries: NonNegativeInt = 0,
+    plan: bool = False,
+    shard_index: NonNegativeInt = 0,
+    num_shards: PositiveInt = 1,
 ):
     """Takes a directory with AEMO solar trace data and reformats the data, saving it to a new directory.
 
@@ -75,8 +89,8 @@ def parse_solar_traces(
     the data files with a directory structure that mirrors the new file naming convention. Firstly, the data format is
     changed to a two column format with a column "Datetime" specifying the end of the half hour period the measurement
     is for in the format %Y-%m-%d %HH:%MM%:%SS, and a column "Value" specifying the measurement value. The data is saved
-    in parquet format in half-yearly chunks to improved read speeds. The files are saved with the following
-    directory structure and naming convention:
+    in parquet format in half-yearly chunks to improved read speeds (see the partition_scheme option for other
+    chunk sizes). The files are saved with the following directory structure and naming convention:
 
     For projects:
          "RefYear<reference year>/Project/<project name>/"
@@ -100,9 +114,13 @@ def parse_solar_traces(
 
     Parse whole directory of trace data.
 
+    >>> import tempfile
+
+    >>> parsed_directory = tempfile.TemporaryDirectory()
+
     >>> parse_solar_traces(
     ... input_directory='example_input_data/solar',
-    ... parsed_directory='example_parsed_data/solar',
+    ... parsed_directory=parsed_directory.name,
     ... use_concurrency=False
     ... )
 
@@ -121,11 +139,12 @@ def parse_solar_traces(
 
     >>> parse_solar_traces(
     ... input_directory='example_input_data/solar',
-    ... parsed_directory='example_parsed_data/solar',
+    ... parsed_directory=parsed_directory.name,
     ... filters=metadata_filters,
     ... use_concurrency=False
     ... )
 
+    >>> parsed_directory.cleanup()
 
     Args:
         input_directory: str or pathlib.Path, path to data to parse.
@@ -133,59 +152,77 @@ def parse_solar_traces(
         use_concurrency: boolean, default True, specifies whether to use parallel processing
         filters: dict{str: list[str]}, dict that specifies which traces to parse, if a component
             of the metadata is missing from the dict no filtering on that component occurs. See example.
+        partition_scheme, output_layout, parallel_config, incremental, change_detection, errors, max_retries, plan,
+            shard_index and num_shards: the options shared by the parse functions, see
+            scheduler.parse_trace_directories.
 
-    Returns: None
+    Returns: None, or if errors is 'collect', a list of dicts describing the traces that failed to parse, or if plan
+        is True, a polars.DataFrame describing the parse tasks.
     """
-    input_directory = input_validation.input_directory(input_directory)
-    parsed_directory = input_validation.parsed_directory(parsed_directory)
-
-    files = get_all_filepaths(input_directory)
-    file_metadata = extract_metadata_for_all_solar_files(files)
-    with open(
-        Path(__file__).parent.parent
-        / Path("isp_trace_name_mapping_configs/solar_project_mapping.yaml"),
-        "r",
-    ) as f:
-        project_name_mapping = yaml.safe_load(f)
-    with open(
-        Path(__file__).parent.parent
-        / Path("isp_trace_name_mapping_configs/solar_area_mapping.yaml"),
-        "r",
-    ) as f:
-        area_name_mapping = yaml.safe_load(f)
-    name_mappings = {**project_name_mapping, **area_name_mapping}
-
-    project_and_area_input_names = get_unique_project_and_area_names_in_input_files(
-        file_metadata
+    trace_directory = TraceDirectory(
+        plan_solar_directory,
+        input_validation.input_directory(input_directory),
+        input_validation.parsed_directory(parsed_directory),
+        filters,
     )
-    name_mappings = {
-        k: v for k, v in name_mappings.items() if v in project_and_area_input_names
-    }
-
-    project_and_area_output_names, project_and_area_input_names = zip(
-        *name_mappings.items()
+    return parse_trace_directories(
+        [trace_directory],
+        use_concurrency=use_concurrency,
+        partition_scheme=partition_scheme,
+        output_layout=output_layout,
+        parallel_config=parallel_config,
+        incremental=incremental,
+        change_detection=change_detection,
+        errors=errors,
+        max_retries=max_retries,
+        plan=plan,
+        shard_index=shard_index,
+        num_shards=num_shards,
     )
 
-    partial_func = functools.partial(
-        restructure_solar_files,
-        all_input_file_metadata=file_metadata,
-        output_directory=parsed_directory,
-        filters=filters,
+
+def plan_solar_directory(
+    input_directory: Path,
+    parsed_directory: Path,
+    filters: SolarMetadataFilter | None = None,
+    errors: list[dict] | None = None,
+) -> list[ParseTask]:
+    """
+    Plans the parse tasks for all solar project and area traces in input_directory, to be saved in parsed_directory.
+
+    If errors is a list, input files that can't be planned are skipped and described in errors, otherwise an
+    exception is raised.
+
+    Returns:
+        A list of ParseTask, one for each output trace.
+    """
+    file_metadata = scan_input_files(
+        input_directory,
+        "solar",
+        filters,
+        parsed_directory,
+        errors,
+    )
+    project_name_mapping = name_mapping_table("solar_project_mapping")
+    area_name_mapping = name_mapping_table("solar_area_mapping")
+    # The area outputs are numbered after the project outputs, as the output index identifies each output.
+    name_mappings = pl.concat(
+        [
+            project_name_mapping,
+            area_name_mapping.with_columns(
+                pl.col("output_index") + project_name_mapping.height
+            ),
+        ]
     )
 
-    if use_concurrency:
-        max_workers = os.cpu_count() - 2
-        Parallel(n_jobs=max_workers)(
-            delayed(partial_func)(save_name, old_trace_name)
-            for save_name, old_trace_name in zip(
-                project_and_area_output_names, project_and_area_input_names
-            )
-        )
-    else:
-        for save_name, old_trace_name in zip(
-            project_and_area_output_names, project_and_area_input_names
-        ):
-            partial_func(save_name, old_trace_name)
+    tasks = plan_tasks_from_metadata_table(
+        file_metadata,
+        name_mappings,
+        ["technology"],
+        write_output_solar_filepath,
+        filters,
+    )
+    return [task._replace(output_directory=parsed_directory) for task in tasks]
 
 
 def restructure_solar_files(
@@ -194,6 +231,8 @@ def restructure_solar_files(
     all_input_file_metadata: dict[Path, dict[str, str]],
     output_directory: str | Path,
     filters: SolarMetadataFilter = None,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
 ) -> None:
     """
     Restructures solar trace files and saves them in a new format.
@@ -207,6 +246,8 @@ def restructure_solar_files(
         all_input_file_metadata: Metadata for all input files.
         output_directory: Directory where restructured files will be saved.
         filters: Filters to apply to the metadata (SolarMetadataFilter).
+        partition_scheme: The period of data saved in each output file.
+        output_layout: 'partitioned' or 'consolidated', see scheduler.parse_trace_directories.
 
     Returns:
         None: Files are saved to disk, but the function doesn't return any value.
@@ -226,30 +267,15 @@ def restructure_solar_files(
 
         # This will process 'file1.csv' and save it with the new name 'NewProject1' in the specified output directory
     """
-
-    metadata_for_trace_files = get_metadata_that_matches_trace_names(
-        input_trace_names, all_input_file_metadata
+    tasks = plan_tasks_from_metadata_table(
+        metadata_table_from_dict(all_input_file_metadata),
+        name_mapping_table({output_project_or_area_name: input_trace_names}),
+        ["technology"],
+        write_output_solar_filepath,
+        filters,
     )
-    reference_years = get_unique_reference_years_in_metadata(metadata_for_trace_files)
-    for year in reference_years:
-        files_for_year = get_metadata_that_matches_reference_year(
-            year, metadata_for_trace_files
-        )
-        techs = get_unique_techs_in_metadata(files_for_year)
-        for tech in techs:
-            files_for_tech = get_metadata_that_matches_tech(tech, files_for_year)
-            metadata = get_metadata_for_writing_save_name(files_for_tech)
-            metadata = overwrite_metadata_trace_name_with_output_name(
-                metadata, output_project_or_area_name
-            )
-            parse_file = check_filter_by_metadata(metadata, filters)
-            if parse_file:
-                process_and_save_files(
-                    get_just_filepaths(files_for_tech),
-                    metadata,
-                    write_output_solar_filepath,
-                    output_directory,
-                )
+    for task in tasks:
+        run_parse_task(task, output_directory, partition_scheme, output_layout)
 
 
 def write_output_solar_filepath(metadata: dict[str, str]) -> str:
@@ -268,12 +294,12 @@ def write_output_solar_filepath(metadata: dict[str, str]) -> str:
     if m["file_type"] == "project":
         return (
             f"RefYear{m['reference_year']}/{m['file_type'].capitalize()}/{name}/"
-            f"RefYear{m['reference_year']}_{name}_{m['technology']}_HalfYear{m['hy']}.parquet"
+            f"RefYear{m['reference_year']}_{name}_{m['technology']}_{format_partition_label(m)}.parquet"
         )
     else:
         return (
             f"RefYear{m['reference_year']}/{m['file_type'].capitalize()}/{name}/{m['technology']}/"
-            f"RefYear{m['reference_year']}_{name}_{m['technology']}_HalfYear{m['hy']}.parquet"
+            f"RefYear{m['reference_year']}_{name}_{m['technology']}_{format_partition_label(m)}.parquet"
         )
 
 
@@ -289,42 +315,5 @@ def extract_metadata_for_all_solar_files(
     Returns:
         A dictionary with filepaths as keys and metadata dicts as values.
     """
-    file_metadata = [extract_solar_trace_metadata(str(f.name)) for f in filepaths]
+    file_metadata = extract_metadata_dicts([f.name for f in filepaths], "solar")
     return dict(zip(filepaths, file_metadata))
-
-
-def get_unique_techs_in_metadata(
-    metadata_for_trace_files: dict[Path, dict[str, str]],
-) -> list[str]:
-    """
-    Gets unique technologies from the metadata of trace files.
-
-    Args:
-        metadata_for_trace_files: Dictionary containing metadata for trace files.
-
-    Returns:
-        A list of unique technologies.
-    """
-    return list(
-        set(metadata["technology"] for metadata in metadata_for_trace_files.values())
-    )
-
-
-def get_metadata_that_matches_tech(
-    tech: str, metadata_for_trace_files: dict[Path, dict[str, str]]
-) -> dict[Path, dict[str, str]]:
-    """
-    Filters metadata to only include files matching a specific technology.
-
-    Args:
-        tech: The technology to filter by.
-        metadata_for_trace_files: Dictionary containing metadata for trace files.
-
-    Returns:
-        A dictionary of metadata for files matching the specified technology.
-    """
-    return {
-        f: metadata
-        for f, metadata in metadata_for_trace_files.items()
-        if metadata["technology"] == tech
-    }
@@ -1,11 +1,14 @@
-from datetime import timedelta
+from typing import Literal
 
+import numpy as np
 import polars as pl
 from pydantic import config, validate_call
 
 
 @validate_call(config=config.ConfigDict(arbitrary_types_allowed=True))
-def trace_formatter(trace_data: pl.DataFrame) -> pl.DataFrame:
+def trace_formatter(
+    trace_data: pl.DataFrame, method: Literal["unpivot", "reshape"] = "unpivot"
+) -> pl.DataFrame:
     """
     Takes trace data in the AEMO format and converts it to a format with 'Datetime' and 'Data' columns.
 
@@ -42,11 +45,32 @@ def trace_formatter(trace_data: pl.DataFrame) -> pl.DataFrame:
     │ 2024-06-03 00:00:00 ┆ 18.9  │
     └─────────────────────┴───────┘
 
+    The 'reshape' method gives the same result without unpivoting or sorting the half-hourly data. Because each row of
+    AEMO data is a day and the value columns are in chronological order, the values can be flattened row by row, and
+    the 'Datetime' column calculated from the date of each row.
 
+    >>> trace_formatter(aemo_format_data, method='reshape')
+    shape: (6, 2)
+    ┌─────────────────────┬───────┐
+    │ Datetime            ┆ Value │
+    │ ---                 ┆ ---   │
+    │ datetime[μs]        ┆ f64   │
+    ╞═════════════════════╪═══════╡
+    │ 2024-06-01 00:30:00 ┆ 11.2  │
+    │ 2024-06-01 01:00:00 ┆ 30.7  │
+    │ 2024-06-02 00:00:00 ┆ 17.1  │
+    │ 2024-06-02 00:30:00 ┆ 15.3  │
+    │ 2024-06-02 01:00:00 ┆ 20.4  │
+    │ 2024-06-03 00:00:00 ┆ 18.9  │
+    └─────────────────────┴───────┘
 
     Args:
         trace_data: A `polars.DataFrame` with 'Year', 'Month', 'Day', and columns labeled '01' to '48' representing
                     half-hour intervals.
+        method: str, 'unpivot' or 'reshape', default 'unpivot'. 'unpivot' melts the data into long format and then
+            sorts it by 'Datetime'. 'reshape' flattens the value columns row by row and so avoids sorting the
+            half-hourly data, this is considerably faster for long traces. Days supplied out of order are sorted
+            before reshaping, so both methods return the same result.
 
     Returns:
         A `polars.DataFrame` with:
@@ -54,9 +78,10 @@ def trace_formatter(trace_data: pl.DataFrame) -> pl.DataFrame:
         - 'Data': A column containing the data for each half-hour period.
     """
 
-    # Need both padded 1-9 and not padded because AEMO data files can have both.
-    value_vars = [f"{i:02d}" for i in range(1, 49)] + [str(i) for i in range(1, 10)]
-    value_vars = [v for v in value_vars if v in trace_data.columns]
+    value_vars = get_value_columns(trace_data)
+
+    if method == "reshape":
+        return _reshape_trace(trace_data, value_vars)
 
     trace_data = trace_data.unpivot(
         index=["Year", "Month", "Day"],
@@ -65,39 +90,59 @@ def trace_formatter(trace_data: pl.DataFrame) -> pl.DataFrame:
         value_name="Value",
     )
 
-    def get_hour(time_label):
-        return timedelta(hours=int(time_label) // 2)
-
-    def get_minute(time_label):
-        return timedelta(minutes=int(time_label) % 2 * 30)
-
-    trace_data = trace_data.with_columns(
-        [
-            pl.col("time_label")
-            .map_elements(get_hour, return_dtype=pl.Duration)
-            .alias("Hour"),
-            pl.col("time_label")
-            .map_elements(get_minute, return_dtype=pl.Duration)
-            .alias("Minute"),
-            (
-                pl.col("Year").cast(pl.Utf8).str.zfill(2)
-                + "-"
-                + pl.col("Month").cast(pl.Utf8).str.zfill(2)
-                + "-"
-                + pl.col("Day").cast(pl.Utf8).str.zfill(2)
-                + " 00:00:00"
-            )
-            .str.strptime(pl.Datetime)
-            .alias("Datetime"),
-        ]
-    )
-
+    # Half-hour n of a day ends n * 30 minutes after midnight, so the interval ending datetime can be built with native
+    # expressions rather than per-row Python callbacks.
     trace_data = (
         trace_data.with_columns(
-            [(pl.col("Datetime") + pl.col("Hour") + pl.col("Minute")).alias("Datetime")]
+            (
+                pl.datetime(pl.col("Year"), pl.col("Month"), pl.col("Day"))
+                + pl.duration(minutes=pl.col("time_label").cast(pl.Int64) * 30)
+            ).alias("Datetime")
         )
         .select(["Datetime", "Value"])
         .sort("Datetime")
     )
 
     return trace_data
+
+
+def get_value_columns(trace_data: pl.DataFrame) -> list[str]:
+    """Returns the half-hourly value columns present in AEMO format trace data."""
+    # Need both padded 1-9 and not padded because AEMO data files can have both.
+    value_vars = [f"{i:02d}" for i in range(1, 49)] + [str(i) for i in range(1, 10)]
+    return [v for v in value_vars if v in trace_data.columns]
+
+
+def _reshape_trace(trace_data: pl.DataFrame, value_vars: list[str]) -> pl.DataFrame:
+    """Flattens the value columns of AEMO format trace data row-major, avoiding an unpivot and a sort."""
+    value_vars = sorted(value_vars, key=int)
+    day_starts = (
+        trace_data.select(pl.datetime(pl.col("Year"), pl.col("Month"), pl.col("Day")))
+        .to_series()
+        .to_numpy()
+    )
+
+    # Only the days need ordering, which is cheap compared to sorting every half hour.
+    if len(day_starts) > 1 and not (day_starts[1:] >= day_starts[:-1]).all():
+        trace_data = trace_data.sort(["Year", "Month", "Day"])
+        day_starts = np.sort(day_starts)
+
+    half_hour_ends = np.array([int(v) for v in value_vars]) * np.timedelta64(30, "m")
+    datetimes = (day_starts[:, np.newaxis] + half_hour_ends).ravel()
+
+    value_data = trace_data.select(value_vars)
+    value_dtype = value_data.lazy().select(pl.concat_list(value_vars)).collect_schema()
+    value_dtype = value_dtype.dtypes()[0].inner
+    values = pl.Series("Value", value_data.to_numpy().ravel())
+
+    # Nulls become NaN in the NumPy array, so they are restored from a flattened null mask.
+    if sum(value_data.null_count().row(0)) > 0:
+        null_mask = value_data.select(pl.all().is_null()).to_numpy().ravel()
+        values = values.scatter(np.flatnonzero(null_mask), None)
+
+    datetimes = pl.Series("Datetime", datetimes)
+    if (datetimes.len() > 1) and (datetimes[1:] > datetimes[:-1]).all():
+        # Lets later sorts on Datetime be skipped.
+        datetimes = datetimes.set_sorted()
+
+    return pl.DataFrame([datetimes, values.cast(value_dtype)])
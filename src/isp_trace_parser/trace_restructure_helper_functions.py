@@ -1,17 +1,158 @@
-from datetime import timedelta
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Collection, Literal, Mapping, NamedTuple
 
 import polars as pl
 from pydantic import BaseModel
 
-from isp_trace_parser.trace_formatter import trace_formatter
+from isp_trace_parser.metadata_extractors import (
+    FILENAME_FILTER_FIELDS,
+    TraceType,
+    extract_metadata_table,
+)
+from isp_trace_parser.name_mappings import (
+    MappingName,
+    load_trace_name_index,
+    trace_names,
+)
+from isp_trace_parser.parsed_store import (
+    CONSOLIDATED_FILENAME,
+    OutputLayout,
+    PartitionScheme,
+    add_partition_as_column,
+    stage_trace_for_consolidation,
+)
+from isp_trace_parser.trace_formatter import get_value_columns, trace_formatter
+
+DATE_COLUMNS = ["Year", "Month", "Day"]
+_COUNT_SUFFIX = "_count"
+
+ErrorHandling = Literal["raise", "collect"]
+
+
+def get_all_filepaths(directory: Path, max_workers: int | None = None) -> list[Path]:
+    """Returns the CSV files in directory and its subdirectories, sorted by path.
+
+    Directories are listed with os.scandir, which gets the type of each entry without a separate stat call, and each
+    level of subdirectories is listed concurrently by a thread pool of max_workers threads, as listing large trees on
+    network file systems is dominated by waiting for each directory listing.
+    """
+    return sorted(Path(path) for path, _ in _list_csv_files(directory, max_workers))
+
+
+def _list_csv_files(
+    directory: Path, max_workers: int | None = None
+) -> list[tuple[str, str]]:
+    """Returns the path and name of the CSV files in directory and its subdirectories, as strings, in no order."""
+    if not Path(directory).is_dir():
+        raise ValueError(f"{directory} not found.")
+    files = []
+    directories = [str(directory)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while directories:
+            subdirectories = []
+            for directory_files, directory_subdirectories in executor.map(
+                _scan_directory, directories
+            ):
+                files += directory_files
+                subdirectories += directory_subdirectories
+            directories = subdirectories
+    return files
+
+
+def _scan_directory(directory: str) -> tuple[list[tuple[str, str]], list[str]]:
+    # The suffix is matched as Path.rglob does, ignoring case on case-insensitive platforms such as Windows.
+    files, subdirectories = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            elif os.path.normcase(entry.name).endswith(".csv") and entry.is_file():
+                files.append((entry.path, entry.name))
+    return files, subdirectories
+
+
+def scan_input_files(
+    input_directory: Path,
+    trace_type: TraceType,
+    filters: BaseModel | None = None,
+    output_directory: Path | None = None,
+    errors: list[dict] | None = None,
+) -> pl.DataFrame:
+    """Finds the CSV files in input_directory and extracts their metadata from their filenames, keeping only files
+    allowed by the filters.
+
+    Only the filters on the fields saved unchanged from the filename metadata are applied, see
+    metadata_extractors.FILENAME_FILTER_FIELDS. Filters on other fields, such as names given by the name mappings,
+    are applied when tasks are planned. Pruning files here means they are never grouped, mapped or planned.
+
+    If errors is a list, files with names that don't match the expected pattern are skipped and described in errors,
+    otherwise a ValueError is raised.
+
+    Returns:
+        polars.DataFrame with a 'filepath' column and a column for each metadata field, see extract_metadata_table.
+    """
+    files = _list_csv_files(input_directory)
+    metadata = extract_metadata_table([name for _, name in files], trace_type)
+    metadata = metadata.with_columns(
+        pl.Series("filepath", [path for path, _ in files], dtype=pl.String)
+    )
+    for filepath in metadata.filter(~pl.col("matched"))["filepath"]:
+        exception = ValueError(
+            f"Filename '{Path(filepath).name}' does not match the expected pattern"
+        )
+        if errors is None:
+            raise exception
+        errors.append(
+            describe_error([Path(filepath)], exception, output_directory, "planning")
+        )
+    metadata = metadata.filter(pl.col("matched")).drop("filename", "matched")
+    return filter_metadata_table(metadata, filters, FILENAME_FILTER_FIELDS[trace_type])
 
 
-def get_all_filepaths(directory: Path) -> list[Path]:
-    if directory.is_dir():
-        return [path for path in Path(directory).rglob("*.csv") if path.is_file()]
-    else:
-        raise ValueError(f"{directory} not found.")
+def filter_metadata_table(
+    metadata: pl.DataFrame,
+    filters: BaseModel | None,
+    fields: Collection[str] | None = None,
+) -> pl.DataFrame:
+    """Keeps the rows of a metadata table allowed by the filters, optionally applying only the filters on the given
+    fields.
+
+    As with check_filter_by_metadata, rows with a null value for a field, because their files don't have that field,
+    aren't filtered on it.
+    """
+    if filters is None:
+        return metadata
+    conditions = [
+        pl.col(field).is_null() | pl.col(field).is_in(allowed_values)
+        for field, allowed_values in filters.model_dump(exclude_unset=True).items()
+        if allowed_values is not None
+        and field in metadata.columns
+        and (fields is None or field in fields)
+    ]
+    if not conditions:
+        return metadata
+    return metadata.filter(*conditions)
+
+
+def describe_error(
+    files: list[Path],
+    exception: Exception,
+    output_directory: Path | None,
+    stage: Literal["planning", "parsing"],
+    attempts: int = 1,
+) -> dict:
+    """Describes an error parsing the given input files, for the error report of a parse run."""
+    return {
+        "stage": stage,
+        "files": [str(f) for f in files],
+        "output_directory": str(output_directory),
+        "error": f"{type(exception).__name__}: {exception}",
+        "traceback": "".join(traceback.format_exception(exception)),
+        "attempts": attempts,
+    }
 
 
 def read_trace_csv(file: Path) -> pl.DataFrame:
@@ -20,129 +161,408 @@ def read_trace_csv(file: Path) -> pl.DataFrame:
     return data
 
 
-def read_and_format_traces(files: list[Path]) -> list[pl.DataFrame]:
-    traces = []
+def read_format_and_average_traces(files: list[Path]) -> pl.DataFrame:
+    """Reads the trace CSVs in files and returns their average as a single formatted trace.
+
+    Traces are read one at a time and folded into a running sum and count of the values, so peak memory does not
+    depend on the number of traces being averaged. While the raw traces cover the same days, which is the case for
+    the DUID traces of a multi-unit wind project, the running total is kept in the AEMO format and only formatted
+    once, after all traces have been added.
+    """
+    if len(files) == 1:
+        return trace_formatter(read_trace_csv(files[0]), method="reshape")
+    running_total = None
     for f in files:
-        trace_data = read_trace_csv(f)
-        trace_data = trace_formatter(trace_data)
-        traces.append(trace_data)
-    return traces
+        running_total = add_trace_to_running_total(running_total, read_trace_csv(f))
+    return calculate_mean_from_running_total(running_total)
+
+
+def add_trace_to_running_total(
+    running_total: pl.DataFrame | None, raw_trace: pl.DataFrame
+) -> pl.DataFrame:
+    """Adds the values of an AEMO format trace to a running sum and count of trace values.
+
+    The running total has 'Year', 'Month', and 'Day' columns, and a sum and count column for each half-hourly value
+    column, while all the traces added are aligned with it. If a trace is not aligned, the running total is converted
+    to a 'Datetime' indexed format with 'Sum' and 'Count' columns, and traces are added by joining on 'Datetime'.
+    Missing values are excluded from both the sum and the count.
+    """
+    raw_trace = _pad_value_column_names(raw_trace)
+    if running_total is None:
+        return _start_running_total(raw_trace)
+
+    if "Datetime" not in running_total.columns:
+        if _raw_trace_aligned_with_running_total(raw_trace, running_total):
+            return running_total.with_columns(
+                expression
+                for c in get_value_columns(raw_trace)
+                for expression in _add_to_sum_and_count(c, raw_trace.get_column(c))
+            )
+        running_total = _format_running_total(running_total)
+
+    trace = trace_formatter(raw_trace, method="reshape")
+    running_total = running_total.join(trace, on="Datetime", how="full", coalesce=True)
+    return running_total.select(
+        pl.col("Datetime"),
+        (pl.col("Sum").fill_null(0.0) + pl.col("Value").fill_null(0.0)).alias("Sum"),
+        (
+            pl.col("Count").fill_null(0) + pl.col("Value").is_not_null().cast(pl.UInt32)
+        ).alias("Count"),
+    )
 
 
-def calculate_average_trace(traces: list[pl.DataFrame]) -> pl.DataFrame:
-    combined_traces = pl.concat(traces)
-    average_trace = combined_traces.group_by("Datetime").agg(
-        [pl.col("Value").mean().alias("Value")]
+def calculate_mean_from_running_total(running_total: pl.DataFrame) -> pl.DataFrame:
+    """Divides a running sum of trace values by the count, returning a formatted trace."""
+    if "Datetime" in running_total.columns:
+        mean_trace = running_total.select(pl.col("Datetime"), _mean("Sum", "Count"))
+        return mean_trace.sort("Datetime")
+    value_columns = [c for c in running_total.columns if c.endswith(_COUNT_SUFFIX)]
+    value_columns = [c.removesuffix(_COUNT_SUFFIX) for c in value_columns]
+    mean_trace = running_total.select(
+        DATE_COLUMNS + [_mean(c, f"{c}{_COUNT_SUFFIX}").alias(c) for c in value_columns]
+    )
+    return trace_formatter(mean_trace, method="reshape")
+
+
+def _start_running_total(raw_trace: pl.DataFrame) -> pl.DataFrame:
+    return raw_trace.select(
+        DATE_COLUMNS
+        + [
+            expression
+            for c in get_value_columns(raw_trace)
+            for expression in (
+                pl.col(c).fill_null(0.0).cast(pl.Float64),
+                pl.col(c).is_not_null().cast(pl.UInt32).alias(f"{c}{_COUNT_SUFFIX}"),
+            )
+        ]
     )
-    return average_trace
 
 
-def add_half_year_as_column(trace: pl.DataFrame) -> pl.DataFrame:
-    def calculate_half_year(dt):
-        dt -= timedelta(seconds=1)
-        if dt.month < 7:
-            half_year = f"{dt.year}-1"
-        else:
-            half_year = f"{dt.year}-2"
-        return half_year
+def _add_to_sum_and_count(column: str, values: pl.Series) -> list[pl.Expr]:
+    return [
+        pl.col(column) + values.fill_null(0.0),
+        pl.col(f"{column}{_COUNT_SUFFIX}") + values.is_not_null().cast(pl.UInt32),
+    ]
 
-    trace = trace.sort("Datetime")
 
-    trace = trace.with_columns(
-        (pl.col("Datetime").map_elements(calculate_half_year, pl.String).alias("HY"))
+def _mean(sum_column: str, count_column: str) -> pl.Expr:
+    return (
+        pl.when(pl.col(count_column) > 0)
+        .then(pl.col(sum_column) / pl.col(count_column))
+        .alias("Value")
     )
 
-    return trace
 
+def _raw_trace_aligned_with_running_total(
+    raw_trace: pl.DataFrame, running_total: pl.DataFrame
+) -> bool:
+    return (
+        raw_trace.height == running_total.height
+        and all(c in running_total.columns for c in get_value_columns(raw_trace))
+        and len(get_value_columns(raw_trace)) == len(get_value_columns(running_total))
+        and raw_trace.select(DATE_COLUMNS).equals(running_total.select(DATE_COLUMNS))
+    )
 
-def save_half_year_chunk_of_trace(
-    chunk: pl.DataFrame,
-    file_metadata: dict[str, str],
-    half_year: tuple[str],
-    output_directory: Path,
-    write_output_filepath: callable,
-) -> None:
-    file_metadata["hy"] = half_year[0]
-    data = chunk.drop("HY")
-    path_in_output_directory = write_output_filepath(file_metadata)
-    save_filepath = output_directory / path_in_output_directory
-    save_filepath.parent.mkdir(parents=True, exist_ok=True)
-    data.write_parquet(save_filepath)
 
+def _format_running_total(running_total: pl.DataFrame) -> pl.DataFrame:
+    value_columns = get_value_columns(running_total)
+    sums = trace_formatter(
+        running_total.select(DATE_COLUMNS + value_columns), method="reshape"
+    )
+    counts = trace_formatter(
+        running_total.select(
+            DATE_COLUMNS
+            + [pl.col(f"{c}{_COUNT_SUFFIX}").alias(c) for c in value_columns]
+        ),
+        method="reshape",
+    )
+    return sums.select(
+        pl.col("Datetime"),
+        pl.col("Value").alias("Sum"),
+        counts.get_column("Value").alias("Count"),
+    )
 
-def process_and_save_files(
-    files: list[Path],
-    file_metadata: dict[str, str],
-    write_output_filepath: callable,
-    output_directory: str | Path,
-) -> None:
-    traces = read_and_format_traces(files)
 
-    if len(traces) > 1:
-        trace = calculate_average_trace(traces)
-    else:
-        trace = traces[0]
+def _pad_value_column_names(trace_data: pl.DataFrame) -> pl.DataFrame:
+    return trace_data.rename(
+        {
+            str(i): f"{i:02d}"
+            for i in range(1, 10)
+            if str(i) in trace_data.columns and f"{i:02d}" not in trace_data.columns
+        }
+    )
 
-    trace = add_half_year_as_column(trace)
 
-    for half_year, chunk in trace.group_by("HY"):
-        save_half_year_chunk_of_trace(
-            chunk, file_metadata, half_year, output_directory, write_output_filepath
+def write_trace_partitions(
+    trace: pl.DataFrame,
+    file_metadata: dict[str, str],
+    output_directory: Path,
+    write_output_filepath: callable,
+    max_write_workers: int | None = None,
+) -> list[str]:
+    """Writes each partition of a trace labelled by add_partition_as_column to a separate parquet file.
+
+    The trace is sorted by 'Datetime', so each partition is a contiguous block of rows and can be written as a
+    zero-copy slice of the trace. Every output directory is created once before any partitions are written.
+
+    Args:
+        trace: `polars.DataFrame` with 'Datetime', 'Value', and 'Partition' columns, sorted by 'Datetime'.
+        file_metadata: Metadata used by write_output_filepath to name the output files, the label of each
+            partition is added under the key 'partition'.
+        output_directory: Directory the output filepaths are relative to.
+        write_output_filepath: Function returning the filepath for a partition given its metadata.
+        max_write_workers: If greater than one, partitions are written concurrently by a thread pool of this size.
+
+    Returns:
+        The filepaths written, relative to output_directory.
+    """
+    data = trace.select(["Datetime", "Value"])
+    partition_runs = trace.select(pl.col("Partition").rle()).unnest("Partition")
+
+    partitions = []
+    output_filepaths = []
+    offset = 0
+    for length, partition in partition_runs.iter_rows():
+        output_filepath = write_output_filepath(
+            {**file_metadata, "partition": partition}
         )
+        partitions.append(
+            (data.slice(offset, length), output_directory / output_filepath)
+        )
+        output_filepaths.append(str(output_filepath))
+        offset += length
 
+    for directory in {save_filepath.parent for _, save_filepath in partitions}:
+        directory.mkdir(parents=True, exist_ok=True)
 
-def get_metadata_that_matches_trace_names(
-    trace_names: list[str] | str, all_input_file_metadata: dict[Path, dict[str, str]]
-) -> dict[Path, dict[str, str]]:
-    if isinstance(trace_names, str):
-        trace_names = [trace_names]
-    return {
-        f: metadata
-        for f, metadata in all_input_file_metadata.items()
-        if metadata["name"] in trace_names
-    }
+    if max_write_workers is not None and max_write_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_write_workers) as executor:
+            list(executor.map(lambda p: p[0].write_parquet(p[1]), partitions))
+    else:
+        for partition, save_filepath in partitions:
+            partition.write_parquet(save_filepath)
+    return output_filepaths
 
 
-def get_unique_reference_years_in_metadata(
-    metadata_for_trace_files: dict[Path, dict[str, str]],
+def save_trace(
+    trace: pl.DataFrame,
+    file_metadata: dict[str, str],
+    write_output_filepath: callable,
+    output_directory: str | Path,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
+    max_write_workers: int | None = None,
 ) -> list[str]:
-    return list(
-        set(
-            metadata["reference_year"] for metadata in metadata_for_trace_files.values()
+    """Saves a formatted trace using the partition scheme and output layout of the parsed directory.
+
+    With the 'consolidated' layout the trace is staged, and is added to the consolidated file once all traces have
+    been parsed.
+
+    Returns:
+        The filepaths the trace is saved in, relative to output_directory.
+    """
+    if output_layout == "consolidated":
+        stage_trace_for_consolidation(
+            trace, file_metadata, Path(output_directory), write_output_filepath
         )
+        return [CONSOLIDATED_FILENAME]
+    trace = add_partition_as_column(trace, partition_scheme)
+    return write_trace_partitions(
+        trace,
+        file_metadata,
+        Path(output_directory),
+        write_output_filepath,
+        max_write_workers,
     )
 
 
-def get_metadata_that_matches_reference_year(
-    year: str, metadata_for_trace_files: dict[Path, dict[str, str]]
-) -> dict[str | Path, dict[str, str]]:
-    return {
-        f: metadata
-        for f, metadata in metadata_for_trace_files.items()
-        if metadata["reference_year"] == year
-    }
+class ParseTask(NamedTuple):
+    """The input files and output metadata for one parsed trace.
+
+    Tasks are planned in the parent process, so each worker only receives the files it needs to read.
+    """
+
+    files: list[Path]
+    metadata: dict[str, str]
+    write_output_filepath: Callable
+    output_directory: Path | None = None
+
+
+def metadata_table_from_dict(
+    all_input_file_metadata: Mapping[Path, dict[str, str]],
+) -> pl.DataFrame:
+    """Returns metadata given as a dict of metadata keyed by filepath as a metadata table, with a row per file, for
+    plan_tasks_from_metadata_table.
+
+    Examples:
+
+    >>> metadata_table_from_dict({Path('DUID1_RefYear2011.csv'): {'name': 'DUID1', 'reference_year': 2011}})
+    shape: (1, 3)
+    ┌───────┬────────────────┬───────────────────────┐
+    │ name  ┆ reference_year ┆ filepath              │
+    │ ---   ┆ ---            ┆ ---                   │
+    │ str   ┆ i64            ┆ str                   │
+    ╞═══════╪════════════════╪═══════════════════════╡
+    │ DUID1 ┆ 2011           ┆ DUID1_RefYear2011.csv │
+    └───────┴────────────────┴───────────────────────┘
+    """
+    rows = [
+        {**metadata, "filepath": str(filepath)}
+        for filepath, metadata in all_input_file_metadata.items()
+    ]
+    return pl.from_dicts(rows, infer_schema_length=None)
+
+
+def name_mapping_table(
+    name_mapping: Mapping[str, str | list[str] | dict] | MappingName,
+) -> pl.DataFrame:
+    """Returns a name mapping as a table with a row for each input trace name of each output name.
+
+    Mapping values can be given in any of the forms accepted by name_mappings.trace_names. If the name of a mapping
+    config is given, the table is created from the trace name index of the config, see
+    name_mappings.load_trace_name_index.
+
+    Examples:
+
+    >>> name_mapping_table({'Project': ['DUID1', 'DUID2'], 'Area': 'Q1'})
+    shape: (3, 4)
+    ┌─────────────┬───────┬──────────────┬─────────────┐
+    │ output_name ┆ name  ┆ output_index ┆ input_index │
+    │ ---         ┆ ---   ┆ ---          ┆ ---         │
+    │ str         ┆ str   ┆ i64          ┆ i64         │
+    ╞═════════════╪═══════╪══════════════╪═════════════╡
+    │ Project     ┆ DUID1 ┆ 0            ┆ 0           │
+    │ Project     ┆ DUID2 ┆ 0            ┆ 1           │
+    │ Area        ┆ Q1    ┆ 1            ┆ 0           │
+    └─────────────┴───────┴──────────────┴─────────────┘
+
+    >>> name_mapping_table('wind_area_mapping').height
+    43
+    """
+    if isinstance(name_mapping, str):
+        rows = [
+            (output_name, input_name, output_index, input_index)
+            for input_name, outputs in load_trace_name_index(name_mapping).items()
+            for output_name, output_index, input_index in outputs
+        ]
+    else:
+        rows = [
+            (output_name, input_name, output_index, input_index)
+            for output_index, (output_name, input_names) in enumerate(
+                name_mapping.items()
+            )
+            for input_index, input_name in enumerate(trace_names(input_names))
+        ]
+    return pl.DataFrame(
+        rows,
+        schema={
+            "output_name": pl.String,
+            "name": pl.String,
+            "output_index": pl.Int64,
+            "input_index": pl.Int64,
+        },
+        orient="row",
+    )
 
 
-def get_metadata_for_writing_save_name(
-    metadata_for_trace_files: dict[Path, dict[str, str]],
-) -> dict[str, str]:
-    return next(iter(metadata_for_trace_files.values()))
+def plan_tasks_from_metadata_table(
+    metadata: pl.DataFrame,
+    name_mapping: pl.DataFrame,
+    group_by: list[str],
+    write_output_filepath: Callable,
+    filters: BaseModel | None = None,
+) -> list[ParseTask]:
+    """Plans a task for each output trace, joining the metadata table of the input files to a name mapping table.
+
+    The input files of each output name are grouped by reference year and the metadata fields in group_by, and the
+    files in each group are averaged to create one output trace. Files are ordered by the position of their trace name
+    in the name mapping, then by filepath. Groups excluded by the filters are skipped.
+    """
+    if metadata.is_empty() or name_mapping.is_empty():
+        return []
+    metadata_fields = [c for c in metadata.columns if c != "filepath"]
+    files = (
+        name_mapping.join(metadata, on="name")
+        .sort("output_index", "input_index", "filepath")
+        .with_columns(pl.col("output_name").alias("name"))
+    )
+    files = filter_metadata_table(files, filters)
+    group_keys = ["output_index", "reference_year"] + group_by
+    groups = files.group_by(group_keys, maintain_order=True).agg(
+        pl.col("filepath"),
+        pl.col([f for f in metadata_fields if f not in group_keys]).first(),
+    )
 
+    tasks = []
+    for filepaths, *values in groups.select("filepath", *metadata_fields).rows():
+        task_metadata = {
+            field: value
+            for field, value in zip(metadata_fields, values)
+            if value is not None
+        }
+        files = [Path(f) for f in filepaths]
+        tasks.append(ParseTask(files, task_metadata, write_output_filepath))
+    return tasks
+
+
+def run_parse_task(
+    task: ParseTask,
+    output_directory: str | Path | None = None,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
+    max_write_workers: int | None = None,
+) -> list[str]:
+    """Parses and saves the trace for one task, in output_directory if given, or else the task's output_directory.
+
+    The partitions of the trace are written concurrently by max_write_workers threads, see write_trace_partitions.
+
+    Returns:
+        The filepaths the trace is saved in, relative to the output directory.
+    """
+    return process_and_save_files(
+        task.files,
+        task.metadata,
+        task.write_output_filepath,
+        output_directory if output_directory is not None else task.output_directory,
+        partition_scheme,
+        output_layout,
+        max_write_workers,
+    )
 
-def overwrite_metadata_trace_name_with_output_name(
-    metadata: dict[str, str], save_name: str
-) -> dict[str, str]:
-    metadata["name"] = save_name
-    return metadata
+
+def process_and_save_files(
+    files: list[Path],
+    file_metadata: dict[str, str],
+    write_output_filepath: callable,
+    output_directory: str | Path,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
+    max_write_workers: int | None = None,
+) -> list[str]:
+    trace = read_format_and_average_traces(files)
+    return save_trace(
+        trace,
+        file_metadata,
+        write_output_filepath,
+        output_directory,
+        partition_scheme,
+        output_layout,
+        max_write_workers,
+    )
 
 
 def check_filter_by_metadata(
-    metadata: dict[str, str], filters: BaseModel | None
+    metadata: dict[str, str],
+    filters: BaseModel | None,
+    fields: Collection[str] | None = None,
 ) -> bool:
+    """Whether the metadata is allowed by the filters, optionally checking only the filters on the given fields."""
     if filters is None:
         return True
 
     for field, allowed_values in filters.model_dump(exclude_unset=True).items():
+        if fields is not None and field not in fields:
+            continue
         if field in metadata and allowed_values is not None:
             if metadata[field] not in allowed_values:
                 return False
@@ -150,28 +570,35 @@ def check_filter_by_metadata(
     return True
 
 
-def get_unique_project_and_area_names_in_input_files(
-    metadata_for_trace_files: dict[Path, dict[str, str]],
-) -> list[str]:
-    names = []
-    for filepath, meta_data in metadata_for_trace_files.items():
-        names.append(meta_data["name"])
-    return list(set(names))
-
-
 def filter_mapping_by_names_in_input_files(
-    name_mapping: dict[str, str | list[str]], names_in_input_files: list[str]
-) -> dict[str, str | list[str]]:
-    filtered_mapping = {}
-    for output_name, input_name in name_mapping.items():
-        if isinstance(input_name, list):
-            if input_name[0] in names_in_input_files:
-                filtered_mapping[output_name] = input_name
-        else:
-            if input_name in names_in_input_files:
-                filtered_mapping[output_name] = input_name
-    return filtered_mapping
-
-
-def get_just_filepaths(metadata_for_files):
-    return [file for file, metadata in metadata_for_files.items()]
+    mapping_name: MappingName, names_in_input_files: pl.Series
+) -> pl.DataFrame:
+    """Returns the name mapping table of a mapping config, keeping the output names whose first input trace name is in
+    the input files.
+
+    The output names are found by looking up each name in the input files in the trace name index of the config.
+
+    Examples:
+
+    >>> name_mapping = filter_mapping_by_names_in_input_files('wind_project_mapping', pl.Series(['SNOWSTH1']))
+
+    >>> name_mapping.select('output_name', 'name')
+    shape: (2, 2)
+    ┌───────────────────────┬──────────┐
+    │ output_name           ┆ name     │
+    │ ---                   ┆ ---      │
+    │ str                   ┆ str      │
+    ╞═══════════════════════╪══════════╡
+    │ Snowtown S2 Wind Farm ┆ SNOWSTH1 │
+    │ Snowtown S2 Wind Farm ┆ SNOWNTH1 │
+    └───────────────────────┴──────────┘
+    """
+    trace_name_index = load_trace_name_index(mapping_name)
+    available_outputs = {
+        output_name
+        for name in names_in_input_files.unique()
+        for output_name, _, input_index in trace_name_index.get(name, ())
+        if input_index == 0
+    }
+    name_mapping = name_mapping_table(mapping_name)
+    return name_mapping.filter(pl.col("output_name").is_in(list(available_outputs)))
@@ -1,25 +1,29 @@
-import functools
-import os
 from pathlib import Path
 from typing import Literal, Optional
 
-import yaml
-from joblib import Parallel, delayed
-from pydantic import BaseModel, validate_call
+from pydantic import BaseModel, NonNegativeInt, PositiveInt, validate_call
 
 from isp_trace_parser import input_validation
-from isp_trace_parser.metadata_extractors import extract_wind_trace_metadata
+from isp_trace_parser.manifest import ChangeDetection
+from isp_trace_parser.metadata_extractors import extract_metadata_dicts
+from isp_trace_parser.parallel import (
+    ParallelConfig,
+)
+from isp_trace_parser.parsed_store import (
+    OutputLayout,
+    PartitionScheme,
+    format_partition_label,
+)
+from isp_trace_parser.scheduler import TraceDirectory, parse_trace_directories
 from isp_trace_parser.trace_restructure_helper_functions import (
-    check_filter_by_metadata,
+    ErrorHandling,
+    ParseTask,
     filter_mapping_by_names_in_input_files,
-    get_all_filepaths,
-    get_metadata_for_writing_save_name,
-    get_metadata_that_matches_reference_year,
-    get_metadata_that_matches_trace_names,
-    get_unique_project_and_area_names_in_input_files,
-    get_unique_reference_years_in_metadata,
-    overwrite_metadata_trace_name_with_output_name,
-    process_and_save_files,
+    metadata_table_from_dict,
+    name_mapping_table,
+    plan_tasks_from_metadata_table,
+    run_parse_task,
+    scan_input_files,
 )
 
 
@@ -63,6 +67,16 @@ def parse_wind_traces(
     parsed_directory: str | Path,
     use_concurrency: bool = True,
     filters: WindMetadataFilter | None = None,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
+    parallel_config: ParallelConfig | None = None,
+    incremental: bool = False,
+    change_detection: ChangeDetection = "size_mtime",
+    errors: ErrorHandling = "raise",
+    max_retries: NonNegativeInt = 0,
+    plan: bool = False,
+    shard_index: NonNegativeInt = 0,
+    num_shards: PositiveInt = 1,
 ):
     """Takes a directory with AEMO wind trace data and reformats the data, saving it to a new directory.
 
@@ -76,8 +90,8 @@ def parse_wind_traces(
     the data files with a directory structure that mirrors the new file naming convention. Firstly, the data format is
     changed to a two column format with a column "Datetime" specifying the end of the half hour period the measurement
     is for in the format %Y-%m-%d %HH:%MM%:%SS, and a column "Value" specifying the measurement value. The data is saved
-    in parquet format in half-yearly chunks to improved read speeds. The files are saved with the following
-    directory structure and naming convention:
+    in parquet format in half-yearly chunks to improved read speeds (see the partition_scheme option for other
+    chunk sizes). The files are saved with the following directory structure and naming convention:
 
     For projects:
          "RefYear<reference year>/Project/<project name>/"
@@ -101,9 +115,13 @@ def parse_wind_traces(
 
     Parse whole directory of trace data.
 
+    >>> import tempfile
+
+    >>> parsed_directory = tempfile.TemporaryDirectory()
+
     >>> parse_wind_traces(
     ... input_directory='example_input_data/wind',
-    ... parsed_directory='example_parsed_data/wind',
+    ... parsed_directory=parsed_directory.name,
     ... use_concurrency=False
     ... )
 
@@ -122,11 +140,12 @@ def parse_wind_traces(
 
     >>> parse_wind_traces(
     ... input_directory='example_input_data/wind',
-    ... parsed_directory='example_parsed_data/wind',
+    ... parsed_directory=parsed_directory.name,
     ... filters=metadata_filters,
     ... use_concurrency=False
     ... )
 
+    >>> parsed_directory.cleanup()
 
     Args:
         input_directory: str or pathlib.Path, path to data to parse.
@@ -134,80 +153,80 @@ def parse_wind_traces(
         use_concurrency: boolean, default True, specifies whether to use parallel processing
         filters: dict{str: list[str]}, dict that specifies which traces to parse, if a component
             of the metadata is missing from the dict no filtering on that component occurs. See example.
+        partition_scheme, output_layout, parallel_config, incremental, change_detection, errors, max_retries, plan,
+            shard_index and num_shards: the options shared by the parse functions, see
+            scheduler.parse_trace_directories.
 
-    Returns: None
+    Returns: None, or if errors is 'collect', a list of dicts describing the traces that failed to parse, or if plan
+        is True, a polars.DataFrame describing the parse tasks.
     """
-    input_directory = input_validation.input_directory(input_directory)
-    parsed_directory = input_validation.parsed_directory(parsed_directory)
-
-    files = get_all_filepaths(input_directory)
-    file_metadata = extract_metadata_for_all_wind_files(files)
-
-    with open(
-        Path(__file__).parent.parent
-        / Path("isp_trace_name_mapping_configs/wind_project_mapping.yaml"),
-        "r",
-    ) as f:
-        project_name_mappings = yaml.safe_load(f)
-
-    project_name_mappings = restructure_wind_project_mapping(project_name_mappings)
-
-    with open(
-        Path(__file__).parent.parent
-        / Path("isp_trace_name_mapping_configs/wind_area_mapping.yaml"),
-        "r",
-    ) as f:
-        area_name_mappings = yaml.safe_load(f)
-
-    project_and_area_input_names = get_unique_project_and_area_names_in_input_files(
-        file_metadata
+    trace_directory = TraceDirectory(
+        plan_wind_directory,
+        input_validation.input_directory(input_directory),
+        input_validation.parsed_directory(parsed_directory),
+        filters,
+    )
+    return parse_trace_directories(
+        [trace_directory],
+        use_concurrency=use_concurrency,
+        partition_scheme=partition_scheme,
+        output_layout=output_layout,
+        parallel_config=parallel_config,
+        incremental=incremental,
+        change_detection=change_detection,
+        errors=errors,
+        max_retries=max_retries,
+        plan=plan,
+        shard_index=shard_index,
+        num_shards=num_shards,
     )
 
-    area_name_mappings = filter_mapping_by_names_in_input_files(
-        area_name_mappings, project_and_area_input_names
+
+def plan_wind_directory(
+    input_directory: Path,
+    parsed_directory: Path,
+    filters: WindMetadataFilter | None = None,
+    errors: list[dict] | None = None,
+) -> list[ParseTask]:
+    """
+    Plans the parse tasks for all wind project and area traces in input_directory, to be saved in parsed_directory.
+
+    If errors is a list, input files that can't be planned are skipped and described in errors, otherwise an
+    exception is raised.
+
+    Returns:
+        A list of ParseTask, one for each output trace.
+    """
+    file_metadata = scan_input_files(
+        input_directory,
+        "wind",
+        filters,
+        parsed_directory,
+        errors,
     )
-    area_output_names, area_input_names = zip(*area_name_mappings.items())
 
+    area_name_mappings = filter_mapping_by_names_in_input_files(
+        "wind_area_mapping", file_metadata["name"]
+    )
     project_name_mappings = filter_mapping_by_names_in_input_files(
-        project_name_mappings, project_and_area_input_names
+        "wind_project_mapping", file_metadata["name"]
     )
-    project_output_names, project_input_names = zip(*project_name_mappings.items())
 
-    area_partial_func = functools.partial(
-        restructure_wind_area_files,
-        all_input_file_metadata=file_metadata,
-        output_directory=parsed_directory,
-        filters=filters,
+    tasks = plan_tasks_from_metadata_table(
+        file_metadata,
+        area_name_mappings,
+        ["resource_quality"],
+        write_output_wind_area_filepath,
+        filters,
     )
-
-    project_partial_func = functools.partial(
-        restructure_wind_project_files,
-        all_input_file_metadata=file_metadata,
-        output_directory=parsed_directory,
-        filters=filters,
+    tasks += plan_tasks_from_metadata_table(
+        file_metadata,
+        project_name_mappings,
+        [],
+        write_output_wind_project_filepath,
+        filters,
     )
-
-    if use_concurrency:
-        max_workers = os.cpu_count() - 2
-
-        Parallel(n_jobs=max_workers)(
-            delayed(area_partial_func)(save_name, old_trace_name)
-            for save_name, old_trace_name in zip(area_output_names, area_input_names)
-        )
-
-        Parallel(n_jobs=max_workers)(
-            delayed(project_partial_func)(save_name, old_trace_name)
-            for save_name, old_trace_name in zip(
-                project_output_names, project_input_names
-            )
-        )
-
-    else:
-        for save_name, old_trace_name in zip(area_output_names, area_input_names):
-            area_partial_func(save_name, old_trace_name)
-
-        for save_name, old_trace_name in zip(project_output_names, project_input_names):
-            project_partial_func(save_name, old_trace_name)
+    return [task._replace(output_directory=parsed_directory) for task in tasks]
 
 
 def restructure_wind_area_files(
@@ -216,6 +235,8 @@ def restructure_wind_area_files(
     all_input_file_metadata: dict,
     output_directory: str | Path,
     filters: dict[str, list[str]] | None = None,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
 ) -> None:
     """
     Restructures wind area trace files and saves them in a new format.
@@ -244,35 +265,21 @@ def restructure_wind_area_files(
         output_directory (str | Path): Directory where restructured files will be saved.
         filters (dict[str, list[str]] | None, optional): Filters to apply to the metadata.
                                                          Keys are metadata fields, values are lists of allowed values.
+        partition_scheme (str): The period of data saved in each output file.
+        output_layout (str): 'partitioned' or 'consolidated', see scheduler.parse_trace_directories.
 
     Returns:
         None: Files are saved to disk, but the function doesn't return any value.
     """
-    metadata_for_trace_files = get_metadata_that_matches_trace_names(
-        input_trace_names, all_input_file_metadata
+    tasks = plan_tasks_from_metadata_table(
+        metadata_table_from_dict(all_input_file_metadata),
+        name_mapping_table({output_area_name: input_trace_names}),
+        ["resource_quality"],
+        write_output_wind_area_filepath,
+        filters,
     )
-    reference_years = get_unique_reference_years_in_metadata(metadata_for_trace_files)
-    for year in reference_years:
-        files_for_year = get_metadata_that_matches_reference_year(
-            year, metadata_for_trace_files
-        )
-        resource_qualities = get_unique_resource_quality_in_metadata(files_for_year)
-        for resource_quality in resource_qualities:
-            files_for_resource_quality = get_metadata_that_matches_resource_quality(
-                resource_quality, files_for_year
-            )
-            metadata = get_metadata_for_writing_save_name(files_for_resource_quality)
-            metadata = overwrite_metadata_trace_name_with_output_name(
-                metadata, output_area_name
-            )
-            parse_file = check_filter_by_metadata(metadata, filters)
-            if parse_file:
-                process_and_save_files(
-                    files_for_resource_quality,
-                    metadata,
-                    write_output_wind_area_filepath,
-                    output_directory,
-                )
+    for task in tasks:
+        run_parse_task(task, output_directory, partition_scheme, output_layout)
 
 
 def restructure_wind_project_files(
@@ -281,30 +288,21 @@ def restructure_wind_project_files(
     all_input_file_metadata: dict,
     output_directory: str | Path,
     filters: dict[str, list[str]] | None = None,
+    partition_scheme: PartitionScheme = "half_year",
+    output_layout: OutputLayout = "partitioned",
 ) -> None:
     """
     Restructures wind project trace files and saves them in a new format.
     """
-    metadata_for_trace_files = get_metadata_that_matches_trace_names(
-        input_trace_names, all_input_file_metadata
+    tasks = plan_tasks_from_metadata_table(
+        metadata_table_from_dict(all_input_file_metadata),
+        name_mapping_table({output_project_name: input_trace_names}),
+        [],
+        write_output_wind_project_filepath,
+        filters,
     )
-    reference_years = get_unique_reference_years_in_metadata(metadata_for_trace_files)
-    for year in reference_years:
-        files_for_year = get_metadata_that_matches_reference_year(
-            year, metadata_for_trace_files
-        )
-        metadata = get_metadata_for_writing_save_name(files_for_year)
-        metadata = overwrite_metadata_trace_name_with_output_name(
-            metadata, output_project_name
-        )
-        parse_file = check_filter_by_metadata(metadata, filters)
-        if parse_file:
-            process_and_save_files(
-                files_for_year,
-                metadata,
-                write_output_wind_project_filepath,
-                output_directory,
-            )
+    for task in tasks:
+        run_parse_task(task, output_directory, partition_scheme, output_layout)
 
 
 def write_output_wind_project_filepath(metadata: dict) -> str:
@@ -317,7 +315,7 @@ def write_output_wind_project_filepath(metadata: dict) -> str:
     name = m["name"].replace(" ", "_")
     return (
         f"RefYear{m['reference_year']}/{m['file_type'].capitalize()}/{name}/"
-        f"RefYear{m['reference_year']}_{name}_HalfYear{m['hy']}.parquet"
+        f"RefYear{m['reference_year']}_{name}_{format_partition_label(m)}.parquet"
     )
 
 
@@ -331,7 +329,7 @@ def write_output_wind_area_filepath(metadata: dict) -> str:
     name = m["name"].replace(" ", "_")
     return (
         f"RefYear{m['reference_year']}/{m['file_type'].capitalize()}/{name}/{m['resource_quality']}/"
-        f"RefYear{m['reference_year']}_{name}_{m['resource_quality']}_HalfYear{m['hy']}.parquet"
+        f"RefYear{m['reference_year']}_{name}_{m['resource_quality']}_{format_partition_label(m)}.parquet"
     )
 
 
@@ -353,26 +351,5 @@ def extract_metadata_for_all_wind_files(filepaths: list) -> dict:
 
     Returns a dict with filepaths as keys and metadata dicts as values.
     """
-    file_metadata = [extract_wind_trace_metadata(str(f.name)) for f in filepaths]
+    file_metadata = extract_metadata_dicts([f.name for f in filepaths], "wind")
     return dict(zip(filepaths, file_metadata))
-
-
-def get_unique_resource_quality_in_metadata(
-    metadata_for_trace_files: dict[str:str],
-) -> list:
-    return list(
-        set(
-            metadata["resource_quality"]
-            for metadata in metadata_for_trace_files.values()
-        )
-    )
-
-
-def get_metadata_that_matches_resource_quality(
-    resource_quality: str, metadata_for_trace_files: dict[str:str]
-) -> dict[str:str]:
-    return {
-        f: metadata
-        for f, metadata in metadata_for_trace_files.items()
-        if metadata["resource_quality"] == resource_quality
-    }
@@ -0,0 +1,147 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from isp_trace_parser import WindMetadataFilter, get_data, parse_wind_traces
+
+DIRECTORY = "example_parsed_data"
+REFERENCE_YEARS = {2030: 2011, 2031: 2012, 2029: 2011}
+
+TRACES = [
+    (
+        {"type": "solar_project", "project": "Adelaide Desalination Plant Solar Farm"},
+        lambda **kwargs: get_data.solar_project_multiple_reference_years(
+            project="Adelaide Desalination Plant Solar Farm",
+            directory=f"{DIRECTORY}/solar",
+            **kwargs,
+        ),
+    ),
+    (
+        {"type": "wind_area", "area": "Q1", "resource_quality": "WH"},
+        lambda **kwargs: get_data.wind_area_multiple_reference_years(
+            area="Q1", resource_quality="WH", directory=f"{DIRECTORY}/wind", **kwargs
+        ),
+    ),
+    (
+        {"type": "wind_project", "project": "Bango 973 Wind Farm"},
+        lambda **kwargs: get_data.wind_project_multiple_reference_years(
+            project="Bango 973 Wind Farm", directory=f"{DIRECTORY}/wind", **kwargs
+        ),
+    ),
+    (
+        {
+            "type": "demand",
+            "subregion": "CNSW",
+            "scenario": "Green Energy Exports",
+            "poe": "POE10",
+            "demand_type": "OPSO_MODELLING",
+        },
+        lambda **kwargs: get_data.demand_multiple_reference_years(
+            subregion="CNSW",
+            scenario="Green Energy Exports",
+            poe="POE10",
+            demand_type="OPSO_MODELLING",
+            directory=f"{DIRECTORY}/demand",
+            **kwargs,
+        ),
+    ),
+]
+
+
+def _read_each_trace(year_type):
+    return [
+        read(
+            reference_years=REFERENCE_YEARS, year_type=year_type, output_format="polars"
+        )
+        for _, read in TRACES
+    ]
+
+
+@pytest.mark.parametrize("year_type", ["fy", "calendar"])
+def test_long_batch_matches_reading_each_trace(year_type):
+    result = get_data.batch_multiple_reference_years(
+        [key for key, _ in TRACES],
+        REFERENCE_YEARS,
+        DIRECTORY,
+        year_type,
+        output_format="polars",
+    )
+    assert result["trace"].unique(maintain_order=True).to_list() == [
+        "solar_project/Adelaide Desalination Plant Solar Farm",
+        "wind_area/Q1/WH",
+        "wind_project/Bango 973 Wind Farm",
+        "demand/CNSW/Green Energy Exports/POE10/OPSO_MODELLING",
+    ]
+    assert_frame_equal(result.drop("trace"), pl.concat(_read_each_trace(year_type)))
+
+
+def test_wide_batch_aligns_traces_on_datetime():
+    result = get_data.batch_multiple_reference_years(
+        [key for key, _ in TRACES],
+        REFERENCE_YEARS,
+        DIRECTORY,
+        shape="wide",
+        output_format="polars",
+    )
+    assert result.columns[0] == "Datetime"
+    for column, data in zip(result.columns[1:], _read_each_trace("fy")):
+        assert_frame_equal(
+            result.select("Datetime", pl.col(column).alias("Value")), data
+        )
+
+
+def test_single_reference_year_batch_matches_single_trace_read():
+    key, _ = TRACES[1]
+    result = get_data.batch_single_reference_year(
+        [key], 2030, 2031, 2011, DIRECTORY, shape="wide", output_format="polars"
+    )
+    expected = get_data.wind_area_single_reference_year(
+        2030, 2031, 2011, "Q1", "WH", f"{DIRECTORY}/wind", output_format="polars"
+    )
+    assert_frame_equal(result.rename({"wind_area/Q1/WH": "Value"}), expected)
+
+
+@pytest.mark.parametrize(
+    "traces",
+    [
+        [],
+        [{"type": "solar", "project": "A"}],
+        [{"type": "wind_area", "area": "Q1"}],
+        [{"type": "wind_project", "project": "A", "area": "Q1"}],
+    ],
+)
+def test_invalid_trace_keys_raise(traces):
+    with pytest.raises(ValueError):
+        get_data.batch_multiple_reference_years(traces, REFERENCE_YEARS, DIRECTORY)
+
+
+def test_wide_batch_aligns_traces_with_different_datetimes(tmp_path):
+    parse_wind_traces(
+        "example_input_data/wind",
+        tmp_path / "wind",
+        use_concurrency=False,
+        filters=WindMetadataFilter(reference_year=[2011]),
+    )
+    (truncated_file,) = (tmp_path / "wind").rglob("*_Q1_WH_HalfYear2030-1.parquet")
+    pl.read_parquet(truncated_file).head(100).write_parquet(truncated_file)
+
+    result = get_data.batch_multiple_reference_years(
+        [key for key, _ in TRACES[1:3]],
+        {2030: 2011},
+        tmp_path,
+        shape="wide",
+        output_format="polars",
+    )
+    area = get_data.wind_area_multiple_reference_years(
+        {2030: 2011}, "Q1", "WH", tmp_path / "wind", output_format="polars"
+    )
+    project = get_data.wind_project_multiple_reference_years(
+        {2030: 2011}, "Bango 973 Wind Farm", tmp_path / "wind", output_format="polars"
+    )
+    assert area.height < project.height == result.height
+    expected = project.join(area, on="Datetime", how="left", suffix="_area").select(
+        "Datetime",
+        pl.col("Value_area").alias("wind_area/Q1/WH"),
+        pl.col("Value").alias("wind_project/Bango 973 Wind Farm"),
+    )
+    assert_frame_equal(result.sort("Datetime"), expected.sort("Datetime"))
@@ -0,0 +1,138 @@
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import polars as pl
+import pytest
+from pandas.testing import assert_frame_equal
+
+from isp_trace_parser import disable_chunk_cache, enable_chunk_cache, get_data
+from isp_trace_parser.chunk_cache import ChunkCache
+
+WIND_DIRECTORY = "example_parsed_data/wind"
+REFERENCE_YEARS = {2030: 2011, 2031: 2012, 2029: 2011}
+
+
+@pytest.fixture
+def chunk_cache():
+    yield enable_chunk_cache()
+    disable_chunk_cache()
+
+
+def _write_files(directory, count, rows=1000):
+    filepaths = []
+    for i in range(count):
+        filepath = directory / f"{i}.parquet"
+        pl.DataFrame({"Value": [float(i)] * rows}).write_parquet(filepath)
+        filepaths.append(str(filepath))
+    return filepaths
+
+
+def _read_wind_area():
+    return get_data.wind_area_multiple_reference_years(
+        REFERENCE_YEARS, "Q1", "WH", WIND_DIRECTORY
+    )
+
+
+def test_get_data_results_are_the_same_with_the_cache():
+    expected = _read_wind_area()
+    enable_chunk_cache()
+    try:
+        assert_frame_equal(_read_wind_area(), expected)
+        assert_frame_equal(_read_wind_area(), expected)
+    finally:
+        disable_chunk_cache()
+
+
+def test_repeated_query_is_read_from_the_cache(chunk_cache):
+    _read_wind_area()
+    misses = chunk_cache.stats().misses
+    _read_wind_area()
+    stats = chunk_cache.stats()
+    assert stats.misses == misses
+    assert stats.hits == misses == stats.entries
+    assert stats.hit_rate == 0.5
+
+
+def test_each_file_is_read_once(chunk_cache, monkeypatch):
+    reads = Counter()
+    scan_parquet = pl.scan_parquet
+
+    def counted_scan_parquet(source, *args, **kwargs):
+        reads.update(map(str, [source] if isinstance(source, str) else source))
+        return scan_parquet(source, *args, **kwargs)
+
+    monkeypatch.setattr(pl, "scan_parquet", counted_scan_parquet)
+    _read_wind_area()
+    assert len(reads) == chunk_cache.stats().misses
+    assert set(reads.values()) == {1}
+    _read_wind_area()
+    assert set(reads.values()) == {1}
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    filepaths = _write_files(tmp_path, 3)
+    file_size = pl.read_parquet(filepaths[0]).estimated_size()
+    cache = ChunkCache(max_bytes=2 * file_size)
+    cache.read_parquet(filepaths[:2])
+    cache.read_parquet(filepaths[:1])
+    cache.read_parquet(filepaths[2:])
+    stats = cache.stats()
+    assert (stats.evictions, stats.entries, stats.size_bytes) == (1, 2, 2 * file_size)
+    cache.read_parquet([filepaths[0], filepaths[2]])
+    assert cache.stats().hits == 3
+
+
+def test_files_larger_than_the_budget_are_not_cached(tmp_path):
+    filepaths = _write_files(tmp_path, 1)
+    cache = ChunkCache(max_bytes=10)
+    (data,) = cache.read_parquet(filepaths)
+    assert data.height == 1000
+    assert cache.stats().entries == 0
+
+
+def test_rewritten_files_are_read_again(tmp_path):
+    (filepath,) = _write_files(tmp_path, 1)
+    cache = ChunkCache()
+    cache.read_parquet([filepath])
+    pl.DataFrame({"Value": [5.0]}).write_parquet(filepath)
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    (data,) = cache.read_parquet([filepath])
+    assert data["Value"].to_list() == [5.0]
+    assert (cache.stats().misses, cache.stats().entries) == (2, 1)
+
+
+def test_glob_patterns_are_expanded(tmp_path):
+    filepaths = _write_files(tmp_path, 3)
+    cache = ChunkCache()
+    (data,) = cache.read_parquet([str(tmp_path / "*.parquet")])
+    assert data["Value"].to_list() == sorted([0.0, 1.0, 2.0] * 1000)
+    cache.read_parquet(filepaths)
+    assert cache.stats().hits == 3
+    with pytest.raises(FileNotFoundError):
+        cache.read_parquet([str(tmp_path / "missing*.parquet")])
+
+
+def test_concurrent_reads_keep_the_cache_consistent(tmp_path):
+    filepaths = _write_files(tmp_path, 20, rows=100)
+    file_size = pl.read_parquet(filepaths[0]).estimated_size()
+    cache = ChunkCache(max_bytes=8 * file_size)
+
+    def read(i):
+        selected = [filepaths[(i + j) % 20] for j in range(4)]
+        data = cache.read_parquet(selected)
+        return [frame["Value"][0] for frame in data] == [
+            float((i + j) % 20) for j in range(4)
+        ]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(read, range(200)))
+    stats = cache.stats()
+    assert stats.hits + stats.misses == 800
+    assert stats.size_bytes == stats.entries * file_size <= 8 * file_size
+
+
+def test_negative_budget_raises():
+    with pytest.raises(ValueError):
+        ChunkCache(max_bytes=-1)
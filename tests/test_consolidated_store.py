@@ -0,0 +1,138 @@
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from pandas.testing import assert_frame_equal
+
+from isp_trace_parser import (
+    get_data,
+    parse_demand_traces,
+    parse_solar_traces,
+    parse_wind_traces,
+)
+from isp_trace_parser.wind_traces import WindMetadataFilter
+
+QUERIES = {
+    "solar": [
+        (
+            get_data.solar_project_single_reference_year,
+            dict(project="Adelaide Desalination Plant Solar Farm"),
+        ),
+        (get_data.solar_area_single_reference_year, dict(area="Q1", technology="SAT")),
+    ],
+    "wind": [
+        (
+            get_data.wind_project_single_reference_year,
+            dict(project="Bango 973 Wind Farm"),
+        ),
+        (
+            get_data.wind_area_single_reference_year,
+            dict(area="Q1", resource_quality="WH"),
+        ),
+    ],
+    "demand": [
+        (
+            get_data.demand_single_reference_year,
+            dict(
+                subregion="CNSW",
+                scenario="Green Energy Exports",
+                poe="POE10",
+                demand_type="OPSO_MODELLING",
+            ),
+        ),
+    ],
+}
+
+PARSERS = {
+    "solar": parse_solar_traces,
+    "wind": parse_wind_traces,
+    "demand": parse_demand_traces,
+}
+
+
+@pytest.mark.parametrize("trace_type", ["solar", "wind", "demand"])
+def test_consolidated_layout_matches_partitioned_layout(tmp_path, trace_type):
+    partitioned_directory = tmp_path / "partitioned"
+    consolidated_directory = tmp_path / "consolidated"
+    for directory, output_layout in [
+        (partitioned_directory, "partitioned"),
+        (consolidated_directory, "consolidated"),
+    ]:
+        directory.mkdir()
+        PARSERS[trace_type](
+            f"example_input_data/{trace_type}",
+            directory,
+            use_concurrency=False,
+            output_layout=output_layout,
+        )
+
+    assert sorted(p.name for p in consolidated_directory.iterdir()) == [
+        "parse_manifest.json",
+        "parse_options.json",
+        "traces.parquet",
+    ]
+
+    for get_trace, kwargs in QUERIES[trace_type]:
+        for year_type in ["fy", "calendar"]:
+            for reference_year in [2011, 2012]:
+                query = dict(
+                    start_year=2030,
+                    end_year=2031,
+                    reference_year=reference_year,
+                    year_type=year_type,
+                    **kwargs,
+                )
+                expected = get_trace(directory=partitioned_directory, **query)
+                result = get_trace(directory=consolidated_directory, **query)
+                assert_frame_equal(result, expected)
+
+
+def test_consolidated_file_layout(tmp_path):
+    parse_wind_traces(
+        "example_input_data/wind",
+        tmp_path,
+        use_concurrency=False,
+        output_layout="consolidated",
+    )
+    traces = pl.read_parquet(tmp_path / "traces.parquet")
+    assert traces.columns == ["trace_id", "reference_year", "Datetime", "Value"]
+    assert traces.equals(traces.sort(["trace_id", "reference_year", "Datetime"]))
+    assert sorted(traces["trace_id"].unique()) == [
+        "Area/Q1/WH",
+        "Project/Bango_973_Wind_Farm",
+    ]
+
+
+def test_consolidated_trace_id_is_dictionary_encoded(tmp_path):
+    parse_wind_traces(
+        "example_input_data/wind",
+        tmp_path,
+        use_concurrency=False,
+        output_layout="consolidated",
+    )
+    parquet_file = pq.ParquetFile(tmp_path / "traces.parquet")
+    assert pa.types.is_dictionary(parquet_file.schema_arrow.field("trace_id").type)
+    trace_id_column = parquet_file.schema_arrow.get_field_index("trace_id")
+    for row_group in range(parquet_file.metadata.num_row_groups):
+        column = parquet_file.metadata.row_group(row_group).column(trace_id_column)
+        assert column.has_dictionary_page
+        assert "RLE_DICTIONARY" in column.encodings
+
+
+def test_reparsing_replaces_traces_in_consolidated_file(tmp_path):
+    parse_wind_traces(
+        "example_input_data/wind",
+        tmp_path,
+        use_concurrency=False,
+        output_layout="consolidated",
+    )
+    before = pl.read_parquet(tmp_path / "traces.parquet")
+    parse_wind_traces(
+        "example_input_data/wind",
+        tmp_path,
+        use_concurrency=False,
+        output_layout="consolidated",
+        filters=WindMetadataFilter(file_type=["area"], reference_year=[2011]),
+    )
+    after = pl.read_parquet(tmp_path / "traces.parquet")
+    assert after.equals(before)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import polars as pl
+
+from isp_trace_parser.parsed_store import add_partition_as_column
+
+
+def test_half_year_labels_use_interval_ending_timestamps():
+    trace = pl.DataFrame(
+        {
+            "Datetime": [
+                datetime(2031, 1, 1, 0, 0),
+                datetime(2030, 7, 1, 0, 30),
+                datetime(2030, 7, 1, 0, 0),
+                datetime(2030, 1, 1, 0, 30),
+            ],
+            "Value": [4.0, 3.0, 2.0, 1.0],
+        }
+    )
+    labelled = add_partition_as_column(trace, "half_year")
+    assert labelled["Value"].to_list() == [1.0, 2.0, 3.0, 4.0]
+    assert labelled["Partition"].to_list() == [
+        "HalfYear2030-1",
+        "HalfYear2030-1",
+        "HalfYear2030-2",
+        "HalfYear2030-2",
+    ]
@@ -0,0 +1,97 @@
+import os
+import shutil
+
+import polars as pl
+import pytest
+
+from isp_trace_parser import parse_demand_traces
+
+INPUT_FILES = [
+    "CNSW_RefYear_2011_HYDROGEN_EXPORT_POE10_OPSO_MODELLING.csv",
+    "CNSW_RefYear_2012_HYDROGEN_EXPORT_POE10_OPSO_MODELLING.csv",
+]
+
+
+@pytest.fixture
+def input_directory(tmp_path):
+    directory = tmp_path / "input"
+    directory.mkdir()
+    for filename in INPUT_FILES:
+        shutil.copy(f"example_input_data/demand/{filename}", directory / filename)
+    return directory
+
+
+def _output_mtimes(parsed_directory, reference_year):
+    return {
+        p: p.stat().st_mtime_ns
+        for p in parsed_directory.rglob(f"*RefYear{reference_year}*.parquet")
+    }
+
+
+def _parse(input_directory, parsed_directory, **kwargs):
+    parse_demand_traces(
+        input_directory, parsed_directory, use_concurrency=False, **kwargs
+    )
+
+
+def test_unchanged_inputs_are_skipped(tmp_path, input_directory):
+    parsed_directory = tmp_path / "parsed"
+    _parse(input_directory, parsed_directory)
+    assert (parsed_directory / "parse_manifest.json").is_file()
+    before = _output_mtimes(parsed_directory, 2011)
+
+    _parse(input_directory, parsed_directory, incremental=True)
+    assert _output_mtimes(parsed_directory, 2011) == before
+
+    _parse(input_directory, parsed_directory, incremental=False)
+    after = _output_mtimes(parsed_directory, 2011)
+    assert all(after[p] != before[p] for p in before)
+
+
+def test_only_changed_inputs_are_reparsed(tmp_path, input_directory):
+    parsed_directory = tmp_path / "parsed"
+    _parse(input_directory, parsed_directory)
+    unchanged_before = _output_mtimes(parsed_directory, 2012)
+
+    changed_file = input_directory / INPUT_FILES[0]
+    trace = pl.read_csv(changed_file)
+    trace.with_columns(pl.col("01") + 1000.0).write_csv(changed_file)
+    _parse(input_directory, parsed_directory, incremental=True)
+
+    assert _output_mtimes(parsed_directory, 2012) == unchanged_before
+    reparsed = pl.read_parquet(next(iter(parsed_directory.rglob("*RefYear2011*"))))
+    assert reparsed["Value"].max() >= 1000.0
+
+
+def test_deleted_outputs_are_rebuilt(tmp_path, input_directory):
+    parsed_directory = tmp_path / "parsed"
+    _parse(input_directory, parsed_directory)
+    deleted = sorted(parsed_directory.rglob("*RefYear2011*.parquet"))[3]
+    deleted.unlink()
+
+    _parse(input_directory, parsed_directory, incremental=True)
+    assert deleted.is_file()
+
+
+@pytest.mark.parametrize(
+    "change_detection, expect_reparse", [("size_mtime", True), ("hash", False)]
+)
+def test_change_detection_of_rewritten_inputs(
+    tmp_path, input_directory, change_detection, expect_reparse
+):
+    parsed_directory = tmp_path / "parsed"
+    _parse(input_directory, parsed_directory, change_detection=change_detection)
+    before = _output_mtimes(parsed_directory, 2011)
+
+    touched_file = input_directory / INPUT_FILES[0]
+    stat = touched_file.stat()
+    os.utime(touched_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    _parse(
+        input_directory,
+        parsed_directory,
+        incremental=True,
+        change_detection=change_detection,
+    )
+
+    after = _output_mtimes(parsed_directory, 2011)
+    assert (after != before) == expect_reparse
@@ -0,0 +1,86 @@
+import ntpath
+import os
+from pathlib import Path
+
+import pytest
+
+from isp_trace_parser import SolarMetadataFilter, WindMetadataFilter
+from isp_trace_parser.solar_traces import plan_solar_directory
+from isp_trace_parser.trace_restructure_helper_functions import (
+    get_all_filepaths,
+    scan_input_files,
+)
+from isp_trace_parser.wind_traces import plan_wind_directory
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_get_all_filepaths_matches_rglob(tmp_path, max_workers):
+    for filepath in [
+        "a.csv",
+        "b.txt",
+        "x/c.csv",
+        "x/y/d.csv",
+        "x/y/z/e.csv",
+        "w/f.csv",
+        "w/g.CSV",
+    ]:
+        (tmp_path / filepath).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / filepath).write_text("")
+    (tmp_path / "dir.csv").mkdir()
+
+    expected = sorted(p for p in tmp_path.rglob("*.csv") if p.is_file())
+    assert get_all_filepaths(tmp_path, max_workers=max_workers) == expected
+
+
+def test_csv_suffix_ignores_case_on_case_insensitive_platforms(tmp_path, monkeypatch):
+    for filename in ["a.csv", "b.CSV", "c.txt"]:
+        (tmp_path / filename).write_text("")
+    monkeypatch.setattr(os.path, "normcase", ntpath.normcase)
+    assert get_all_filepaths(tmp_path) == [tmp_path / "a.csv", tmp_path / "b.CSV"]
+
+
+def test_get_all_filepaths_missing_directory_raises(tmp_path):
+    with pytest.raises(ValueError, match="not found"):
+        get_all_filepaths(tmp_path / "missing")
+
+
+def test_scan_prunes_files_by_filename_metadata():
+    filters = WindMetadataFilter(reference_year=[2012], name=["not applied"])
+    file_metadata = scan_input_files(
+        Path("example_input_data/wind"),
+        "wind",
+        filters,
+    )
+    assert sorted(Path(f).name for f in file_metadata["filepath"]) == [
+        "BANGOWF1_RefYear2012.csv",
+        "Q1_WH_Far_North_QLD_RefYear2012.csv",
+    ]
+
+
+@pytest.mark.parametrize(
+    "plan_directory, filters",
+    [
+        (plan_solar_directory, SolarMetadataFilter(technology=["SAT"])),
+        (plan_solar_directory, SolarMetadataFilter(file_type=["project"])),
+        (plan_wind_directory, WindMetadataFilter(reference_year=[2011])),
+        (plan_wind_directory, WindMetadataFilter(resource_quality=["WH"])),
+    ],
+)
+def test_pruned_scan_plans_the_same_tasks_as_filtering_planned_tasks(
+    tmp_path, plan_directory, filters
+):
+    trace_type = "solar" if plan_directory is plan_solar_directory else "wind"
+    input_directory = Path(f"example_input_data/{trace_type}")
+    all_tasks = plan_directory(input_directory, tmp_path)
+    filtered_tasks = plan_directory(input_directory, tmp_path, filters)
+
+    allowed = filters.model_dump(exclude_unset=True)
+    expected = [
+        task
+        for task in all_tasks
+        if all(task.metadata.get(k, v[0]) in v for k, v in allowed.items())
+    ]
+    assert sorted(t.metadata["name"] + str(t.files) for t in filtered_tasks) == sorted(
+        t.metadata["name"] + str(t.files) for t in expected
+    )
+    assert filtered_tasks
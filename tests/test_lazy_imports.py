@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import isp_trace_parser
+
+
+def _run_in_new_process(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def test_import_does_not_import_submodules_or_dependencies():
+    loaded = _run_in_new_process(
+        "import sys, isp_trace_parser; "
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in "
+        "('isp_trace_parser', 'pandas', 'polars', 'joblib', 'yaml', 'pydantic')))"
+    )
+    assert loaded == "['isp_trace_parser']"
+
+
+def test_parse_functions_do_not_import_pandas_or_joblib():
+    loaded = _run_in_new_process(
+        "import sys; from isp_trace_parser import parse_all_traces; "
+        "print('pandas' in sys.modules, 'joblib' in sys.modules)"
+    )
+    assert loaded == "False False"
+
+
+def test_all_public_names_are_available():
+    for name in isp_trace_parser.__all__:
+        assert getattr(isp_trace_parser, name) is not None
+        assert name in dir(isp_trace_parser)
+
+
+def test_function_is_not_hidden_by_submodule_of_the_same_name():
+    name = _run_in_new_process(
+        "import isp_trace_parser.construct_reference_year_mapping; "
+        "from isp_trace_parser import construct_reference_year_mapping; "
+        "print(type(construct_reference_year_mapping).__name__)"
+    )
+    assert name == "function"
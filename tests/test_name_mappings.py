@@ -0,0 +1,113 @@
+import shutil
+
+import pytest
+import yaml
+
+from isp_trace_parser import name_mappings
+from isp_trace_parser.name_mappings import (
+    COMPILED_MAPPINGS_FILENAME,
+    MAPPING_CONFIGS_DIRECTORY,
+    MAPPING_NAMES,
+    TRACE_NAME_MAPPINGS,
+    compile_name_mappings,
+    create_trace_name_index,
+    load_name_mapping,
+    load_trace_name_index,
+    trace_names,
+)
+
+
+def _clear_caches():
+    for function in [
+        load_name_mapping,
+        load_trace_name_index,
+        name_mappings._load_compiled_mappings,
+        name_mappings._source_hash,
+    ]:
+        function.cache_clear()
+
+
+@pytest.fixture
+def mapping_configs(tmp_path, monkeypatch):
+    directory = tmp_path / "configs"
+    shutil.copytree(MAPPING_CONFIGS_DIRECTORY, directory)
+    monkeypatch.setattr(name_mappings, "MAPPING_CONFIGS_DIRECTORY", directory)
+    _clear_caches()
+    yield directory
+    _clear_caches()
+
+
+@pytest.mark.parametrize("mapping_name", MAPPING_NAMES)
+def test_compiled_mappings_are_up_to_date_with_yaml(mapping_name):
+    # If this fails, a YAML config was edited without running: python -m isp_trace_parser.name_mappings
+    compiled = name_mappings._load_compiled_mappings()
+    assert compiled["sources"][mapping_name] == name_mappings._source_hash(mapping_name)
+    with open(MAPPING_CONFIGS_DIRECTORY / f"{mapping_name}.yaml") as f:
+        assert load_name_mapping(mapping_name) == name_mappings._freeze(
+            yaml.safe_load(f)
+        )
+
+
+@pytest.mark.parametrize("mapping_name", TRACE_NAME_MAPPINGS)
+def test_trace_name_index_inverts_mapping(mapping_name):
+    index = load_trace_name_index(mapping_name)
+    assert index == {
+        name: tuple(map(tuple, outputs))
+        for name, outputs in create_trace_name_index(
+            load_name_mapping(mapping_name)
+        ).items()
+    }
+    for output_index, (output_name, mapping_value) in enumerate(
+        load_name_mapping(mapping_name).items()
+    ):
+        for input_index, name in enumerate(trace_names(mapping_value)):
+            assert (output_name, output_index, input_index) in index[name]
+
+
+def test_trace_name_index_of_demand_scenario_mapping_raises():
+    with pytest.raises(ValueError):
+        load_trace_name_index("demand_scenario_mapping")
+
+
+def test_mappings_are_loaded_once():
+    assert load_name_mapping("solar_area_mapping") is load_name_mapping(
+        "solar_area_mapping"
+    )
+    with pytest.raises(TypeError):
+        load_name_mapping("solar_area_mapping")["Q1"] = "Q2"
+
+
+def test_nested_mapping_values_are_immutable(mapping_configs):
+    with open(mapping_configs / "wind_project_mapping.yaml", "a") as f:
+        f.write("NEW:\n  CSVFile:\n  - X98\n  - X99\n")
+    project = load_name_mapping("wind_project_mapping")["NEW"]
+    with pytest.raises(TypeError):
+        project["CSVFile"] = "X97"
+    assert project["CSVFile"] == ("X98", "X99")
+    assert name_mappings.trace_names(project) == ["X98", "X99"]
+
+
+def test_edited_yaml_is_loaded_instead_of_stale_compiled_mapping(mapping_configs):
+    with open(mapping_configs / "wind_area_mapping.yaml", "a") as f:
+        f.write("NEW: X99\n")
+    assert load_name_mapping("wind_area_mapping")["NEW"] == "X99"
+    assert load_trace_name_index("wind_area_mapping")["X99"] == (
+        ("NEW", len(load_name_mapping("wind_area_mapping")) - 1, 0),
+    )
+    assert (
+        "NEW"
+        not in name_mappings._load_compiled_mappings()["mappings"]["wind_area_mapping"]
+    )
+
+
+def test_compile_name_mappings(mapping_configs):
+    (mapping_configs / COMPILED_MAPPINGS_FILENAME).unlink()
+    assert load_name_mapping("demand_scenario_mapping")["STEP_CHANGE"] == (
+        "Step Change"
+    )
+    compile_name_mappings(mapping_configs)
+    _clear_caches()
+    compiled = name_mappings._load_compiled_mappings()
+    assert set(compiled["sources"]) == set(MAPPING_NAMES)
+    assert set(compiled["mappings"]) == set(MAPPING_NAMES)
+    assert set(compiled["trace_name_indexes"]) == set(TRACE_NAME_MAPPINGS)
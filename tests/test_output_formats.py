@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pytest
+from pandas.testing import assert_frame_equal
+
+from isp_trace_parser import get_data
+
+SOLAR_DIRECTORY = "example_parsed_data/solar"
+PROJECT = "Adelaide Desalination Plant Solar Farm"
+
+
+def _read_single(output_format):
+    return get_data.solar_project_single_reference_year(
+        2022, 2024, 2011, PROJECT, SOLAR_DIRECTORY, output_format=output_format
+    )
+
+
+def _read_multiple(output_format):
+    return get_data.solar_project_multiple_reference_years(
+        {2022: 2011, 2024: 2012}, PROJECT, SOLAR_DIRECTORY, output_format=output_format
+    )
+
+
+def _as_pandas(data):
+    if isinstance(data, dict):
+        return pd.DataFrame(data)
+    if isinstance(data, pl.DataFrame):
+        return data.to_pandas()
+    if isinstance(data, pd.DataFrame):
+        return data.astype({"Datetime": "datetime64[us]", "Value": "float64"})
+    return data.to_pandas()
+
+
+@pytest.mark.parametrize("read", [_read_single, _read_multiple])
+@pytest.mark.parametrize(
+    "output_format", ["polars", "pyarrow", "pandas_arrow", "numpy"]
+)
+def test_output_formats_contain_the_same_data(read, output_format):
+    expected = read("pandas").reset_index(drop=True)
+    result = _as_pandas(read(output_format))
+    assert_frame_equal(result.reset_index(drop=True), expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("output_format", ["polars", "pyarrow", "numpy"])
+def test_output_format_types(output_format):
+    expected_type = {
+        "polars": pl.DataFrame,
+        "pyarrow": pa.Table,
+        "numpy": dict,
+    }[output_format]
+    assert isinstance(_read_multiple(output_format), expected_type)
+
+
+def test_multiple_reference_years_pandas_index_restarts_each_year():
+    data = _read_multiple("pandas")
+    single_years = [
+        get_data.solar_project_single_reference_year(
+            year, year, reference_year, PROJECT, SOLAR_DIRECTORY
+        )
+        for year, reference_year in {2022: 2011, 2024: 2012}.items()
+    ]
+    assert_frame_equal(data, pd.concat(single_years))
+
+
+def test_arrow_formats_share_buffers_with_polars():
+    data = pl.DataFrame({"Value": np.arange(10, dtype="float64")})
+    polars_values = data["Value"].to_numpy(allow_copy=False)
+    address = polars_values.__array_interface__["data"][0]
+    table = get_data.convert_output_format(data, "pyarrow")
+    assert table.column("Value").chunk(0).buffers()[1].address == address
+    values = get_data.convert_output_format(data, "numpy")["Value"]
+    assert np.shares_memory(values, polars_values)
+
+
+def test_unrecognised_output_format_raises():
+    with pytest.raises(ValueError):
+        get_data.convert_output_format(pl.DataFrame(), "csv")
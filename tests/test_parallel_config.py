@@ -0,0 +1,136 @@
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from isp_trace_parser import (
+    ParallelConfig,
+    parallel,
+    parse_demand_traces,
+    trace_restructure_helper_functions,
+)
+from isp_trace_parser.parallel import (
+    resolve_parallel_config,
+    run_tasks,
+    run_tasks_as_completed,
+)
+
+
+@pytest.mark.parametrize(
+    "cpu_count, expected_n_workers", [(1, 1), (2, 1), (3, 1), (8, 6), (64, 62)]
+)
+def test_default_n_workers_leaves_two_cpus_free(
+    monkeypatch, cpu_count, expected_n_workers
+):
+    monkeypatch.setattr(parallel, "available_cpu_count", lambda: cpu_count)
+    assert ParallelConfig().resolve_n_workers() == expected_n_workers
+
+
+def test_n_workers_limited_by_config_and_task_count():
+    assert ParallelConfig(n_workers=4).resolve_n_workers(n_tasks=100) == 4
+    assert ParallelConfig(n_workers=4).resolve_n_workers(n_tasks=2) == 2
+    assert ParallelConfig(n_workers=4).resolve_n_workers(n_tasks=0) == 1
+    assert ParallelConfig(n_workers=4, backend="sequential").resolve_n_workers() == 1
+
+
+def test_invalid_config_raises():
+    with pytest.raises(ValidationError):
+        ParallelConfig(n_workers=0)
+    with pytest.raises(ValidationError):
+        ParallelConfig(backend="dask")
+
+
+def test_use_concurrency_false_overrides_config():
+    config = resolve_parallel_config(False, ParallelConfig(n_workers=8))
+    assert config.backend == "sequential"
+
+
+@pytest.mark.parametrize("backend", ["process", "thread", "sequential"])
+def test_run_tasks_returns_results_in_order(backend):
+    config = ParallelConfig(n_workers=2, backend=backend, batch_size=3)
+    results = run_tasks(pow, ((i, 2) for i in range(10)), config)
+    assert results == [i**2 for i in range(10)]
+
+
+def test_parse_with_thread_backend_matches_sequential_parse(tmp_path):
+    parsed_files = {}
+    for backend in ["thread", "sequential"]:
+        parse_demand_traces(
+            "example_input_data/demand",
+            tmp_path / backend,
+            parallel_config=ParallelConfig(n_workers=2, backend=backend),
+        )
+        parsed_files[backend] = sorted(
+            p.relative_to(tmp_path / backend) for p in (tmp_path / backend).rglob("*")
+        )
+    assert parsed_files["thread"] == parsed_files["sequential"]
+
+
+def test_max_write_workers_is_used_to_write_partitions(tmp_path, monkeypatch):
+    write_workers = []
+    write_trace_partitions = trace_restructure_helper_functions.write_trace_partitions
+
+    def recorded_write_trace_partitions(*args):
+        write_workers.append(args[-1])
+        return write_trace_partitions(*args)
+
+    monkeypatch.setattr(
+        trace_restructure_helper_functions,
+        "write_trace_partitions",
+        recorded_write_trace_partitions,
+    )
+    parse_demand_traces(
+        "example_input_data/demand",
+        tmp_path,
+        parallel_config=ParallelConfig(backend="sequential", max_write_workers=4),
+    )
+    assert write_workers and set(write_workers) == {4}
+
+
+@pytest.mark.parametrize(
+    "cpu_count, n_workers, expected_threads", [(1, 1, 1), (8, 3, 2), (64, 62, 1)]
+)
+def test_default_threads_per_worker_divides_cpus_between_workers(
+    monkeypatch, cpu_count, n_workers, expected_threads
+):
+    monkeypatch.setattr(parallel, "available_cpu_count", lambda: cpu_count)
+    config = ParallelConfig()
+    assert config.resolve_threads_per_worker(n_workers) == expected_threads
+    config = ParallelConfig(threads_per_worker=3)
+    assert config.resolve_threads_per_worker(n_workers) == 3
+
+
+@pytest.mark.parametrize("n_tasks", [1, 2, 3, 4, 100])
+def test_threads_of_all_workers_stay_within_n_workers(monkeypatch, n_tasks):
+    monkeypatch.setattr(parallel, "available_cpu_count", lambda: 64)
+    config = ParallelConfig(n_workers=4)
+    n_workers = config.resolve_n_workers(n_tasks)
+    assert n_workers * config.resolve_threads_per_worker(n_workers) <= 4
+
+
+def _worker_thread_pool_sizes(task_number):
+    import polars as pl
+
+    return pl.thread_pool_size(), os.environ["OMP_NUM_THREADS"]
+
+
+@pytest.mark.parametrize("threads_per_worker", [2, 3])
+def test_worker_processes_use_threads_per_worker(monkeypatch, threads_per_worker):
+    monkeypatch.delenv("POLARS_MAX_THREADS", raising=False)
+    config = ParallelConfig(n_workers=2, threads_per_worker=threads_per_worker)
+    results = run_tasks(_worker_thread_pool_sizes, ((i,) for i in range(4)), config)
+    assert results == [(threads_per_worker, str(threads_per_worker))] * 4
+    assert "POLARS_MAX_THREADS" not in os.environ
+
+
+def test_calling_process_is_not_limited_while_results_are_consumed(monkeypatch):
+    monkeypatch.delenv("POLARS_MAX_THREADS", raising=False)
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    config = ParallelConfig(n_workers=2, threads_per_worker=2)
+    results = run_tasks_as_completed(
+        _worker_thread_pool_sizes, ((i,) for i in range(4)), config
+    )
+    assert next(results) == (2, "2")
+    assert "POLARS_MAX_THREADS" not in os.environ
+    assert "OMP_NUM_THREADS" not in os.environ
+    assert list(results) == [(2, "2")] * 3
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from isp_trace_parser import (
+    ParallelConfig,
+    parse_all_traces,
+    parse_demand_traces,
+    parse_solar_traces,
+    parse_wind_traces,
+)
+from isp_trace_parser.scheduler import order_tasks_largest_first
+from isp_trace_parser.trace_restructure_helper_functions import ParseTask
+
+
+def _parquet_files(directory: Path) -> list[Path]:
+    return sorted(p.relative_to(directory) for p in directory.rglob("*.parquet"))
+
+
+@pytest.mark.parametrize("backend", ["thread", "sequential"])
+def test_parse_all_traces_matches_separate_parses(tmp_path, backend):
+    separate = tmp_path / "separate"
+    for trace_type, parse in [
+        ("solar", parse_solar_traces),
+        ("wind", parse_wind_traces),
+        ("demand", parse_demand_traces),
+    ]:
+        parse(
+            f"example_input_data/{trace_type}",
+            separate / trace_type,
+            use_concurrency=False,
+        )
+
+    combined = tmp_path / "combined"
+    parse_all_traces(
+        combined,
+        solar_input_directory="example_input_data/solar",
+        wind_input_directory="example_input_data/wind",
+        demand_input_directory="example_input_data/demand",
+        parallel_config=ParallelConfig(n_workers=2, backend=backend),
+    )
+
+    assert _parquet_files(combined) == _parquet_files(separate)
+    for filepath in _parquet_files(separate)[::25]:
+        assert_frame_equal(
+            pl.read_parquet(combined / filepath), pl.read_parquet(separate / filepath)
+        )
+    for trace_type in ["solar", "wind", "demand"]:
+        assert (combined / trace_type / "parse_options.json").is_file()
+
+
+def test_parse_all_traces_requires_an_input_directory(tmp_path):
+    with pytest.raises(ValueError, match="input directory"):
+        parse_all_traces(tmp_path)
+
+
+def test_tasks_ordered_largest_first(tmp_path):
+    tasks = []
+    for name, size in [("small", 10), ("large", 3_000_000), ("medium", 1_000_000)]:
+        filepath = tmp_path / f"{name}.csv"
+        filepath.write_bytes(b"0" * size)
+        tasks.append(ParseTask([filepath], {"name": name}, str))
+    # A task averaging two medium files costs more than the large file.
+    tasks.append(
+        ParseTask(
+            [tmp_path / "medium.csv", tmp_path / "medium.csv"],
+            {"name": "two medium"},
+            str,
+        )
+    )
+    ordered = [task.metadata["name"] for task in order_tasks_largest_first(tasks)]
+    assert ordered == ["large", "two medium", "medium", "small"]
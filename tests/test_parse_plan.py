@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from isp_trace_parser import parse_all_traces, parse_wind_traces, run_parse_plan
+
+
+@pytest.mark.parametrize("partition_scheme", ["half_year", "year", "whole_trace"])
+def test_plan_matches_parse_output(tmp_path, partition_scheme):
+    parsed_directory = tmp_path / "parsed"
+    parse_plan = parse_wind_traces(
+        "example_input_data/wind",
+        parsed_directory,
+        partition_scheme=partition_scheme,
+        plan=True,
+    )
+    assert not parsed_directory.exists()
+
+    run_parse_plan(parse_plan, use_concurrency=False)
+
+    planned_outputs = set(parse_plan["outputs"].explode().to_list())
+    written_outputs = {str(p) for p in parsed_directory.rglob("*.parquet")}
+    assert planned_outputs == written_outputs
+
+    for row in parse_plan.iter_rows(named=True):
+        n_rows = pl.scan_parquet(row["outputs"]).select(pl.len()).collect().item()
+        assert n_rows == row["estimated_rows"]
+        assert row["estimated_bytes"] == sum(
+            Path(f).stat().st_size for f in row["inputs"]
+        )
+
+
+def test_plan_can_be_filtered_before_running(tmp_path):
+    parsed_directory = tmp_path / "parsed"
+    parse_plan = parse_all_traces(
+        parsed_directory,
+        solar_input_directory="example_input_data/solar",
+        demand_input_directory="example_input_data/demand",
+        plan=True,
+    )
+    assert set(parse_plan["output_directory"]) == {
+        str(parsed_directory / "solar"),
+        str(parsed_directory / "demand"),
+    }
+
+    demand_plan = parse_plan.filter(
+        pl.col("output_directory") == str(parsed_directory / "demand")
+    )
+    run_parse_plan(demand_plan, use_concurrency=False)
+
+    assert not (parsed_directory / "solar").exists()
+    assert {str(p) for p in (parsed_directory / "demand").rglob("*.parquet")} == set(
+        demand_plan["outputs"].explode()
+    )
+
+
+def test_plan_with_consolidated_layout(tmp_path):
+    parsed_directory = tmp_path / "parsed"
+    parse_plan = parse_wind_traces(
+        "example_input_data/wind",
+        parsed_directory,
+        output_layout="consolidated",
+        plan=True,
+    )
+    assert set(parse_plan["outputs"].explode()) == {
+        str(parsed_directory / "traces.parquet")
+    }
+
+    run_parse_plan(parse_plan, use_concurrency=False)
+    traces = pl.read_parquet(parsed_directory / "traces.parquet")
+    assert traces.height == parse_plan["estimated_rows"].sum()
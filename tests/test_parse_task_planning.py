@@ -0,0 +1,114 @@
+import pickle
+from pathlib import Path
+
+import polars as pl
+
+from isp_trace_parser.metadata_extractors import extract_metadata_table
+from isp_trace_parser.name_mappings import load_name_mapping
+from isp_trace_parser.solar_traces import write_output_solar_filepath
+from isp_trace_parser.trace_restructure_helper_functions import (
+    filter_mapping_by_names_in_input_files,
+    name_mapping_table,
+    plan_tasks_from_metadata_table,
+)
+from isp_trace_parser.wind_traces import (
+    WindMetadataFilter,
+    write_output_wind_area_filepath,
+    write_output_wind_project_filepath,
+)
+
+WIND_FILES = [
+    Path("DUID1_RefYear2011.csv"),
+    Path("DUID2_RefYear2011.csv"),
+    Path("DUID1_RefYear2012.csv"),
+    Path("DUID2_RefYear2012.csv"),
+    Path("OTHER_RefYear2011.csv"),
+    Path("N1_WH_Area_RefYear2011.csv"),
+    Path("N1_WM_Area_RefYear2011.csv"),
+]
+
+
+def _metadata_table(files, trace_type):
+    return (
+        extract_metadata_table([f.name for f in files], trace_type)
+        .with_columns(pl.Series("filepath", [str(f) for f in files]))
+        .drop("filename", "matched")
+    )
+
+
+def test_wind_project_tasks_only_contain_the_project_files():
+    file_metadata = _metadata_table(WIND_FILES, "wind")
+
+    tasks = plan_tasks_from_metadata_table(
+        file_metadata,
+        name_mapping_table({"Project A": ["DUID1", "DUID2"]}),
+        [],
+        write_output_wind_project_filepath,
+    )
+
+    assert sorted((t.metadata["reference_year"], t.files) for t in tasks) == [
+        (2011, [Path("DUID1_RefYear2011.csv"), Path("DUID2_RefYear2011.csv")]),
+        (2012, [Path("DUID1_RefYear2012.csv"), Path("DUID2_RefYear2012.csv")]),
+    ]
+    assert all(t.metadata["name"] == "Project A" for t in tasks)
+    # Planning doesn't modify the metadata of the input files.
+    assert file_metadata["name"][0] == "DUID1"
+
+
+def test_wind_area_tasks_split_by_resource_quality_and_filtered():
+    file_metadata = _metadata_table(WIND_FILES, "wind")
+    name_mapping = name_mapping_table({"N1": "N1"})
+
+    tasks = plan_tasks_from_metadata_table(
+        file_metadata,
+        name_mapping,
+        ["resource_quality"],
+        write_output_wind_area_filepath,
+    )
+    assert sorted(t.metadata["resource_quality"] for t in tasks) == ["WH", "WM"]
+    assert all(len(t.files) == 1 for t in tasks)
+
+    tasks = plan_tasks_from_metadata_table(
+        file_metadata,
+        name_mapping,
+        ["resource_quality"],
+        write_output_wind_area_filepath,
+        WindMetadataFilter(resource_quality=["WH"]),
+    )
+    assert [t.files for t in tasks] == [[Path("N1_WH_Area_RefYear2011.csv")]]
+
+
+def test_solar_task_payload_is_independent_of_number_of_input_files():
+    files = [Path("Woolooga_SAT_RefYear2011.csv")]
+    files += [Path(f"Project{i}_FFP_RefYear2011.csv") for i in range(1000)]
+
+    (task,) = plan_tasks_from_metadata_table(
+        _metadata_table(files, "solar"),
+        name_mapping_table({"Woolooga Solar Farm": "Woolooga"}),
+        ["technology"],
+        write_output_solar_filepath,
+    )
+
+    assert task.files == [Path("Woolooga_SAT_RefYear2011.csv")]
+    assert len(pickle.dumps(task)) < 1000
+
+
+def test_name_mapping_table_of_config_is_created_from_trace_name_index():
+    columns = ["output_index", "input_index"]
+    assert (
+        name_mapping_table("wind_project_mapping")
+        .sort(columns)
+        .equals(name_mapping_table(load_name_mapping("wind_project_mapping")))
+    )
+
+
+def test_mapping_is_filtered_by_first_trace_name_in_input_files():
+    # Snowtown S2 Wind Farm is mapped to SNOWSTH1 then SNOWNTH1.
+    name_mapping = filter_mapping_by_names_in_input_files(
+        "wind_project_mapping", pl.Series(["SNOWSTH1", "SNOWSTH1", "NOT_A_TRACE"])
+    )
+    assert set(name_mapping["output_name"]) == {"Snowtown S2 Wind Farm"}
+    assert sorted(name_mapping["name"]) == ["SNOWNTH1", "SNOWSTH1"]
+    assert filter_mapping_by_names_in_input_files(
+        "wind_project_mapping", pl.Series(["SNOWNTH1"])
+    ).is_empty()
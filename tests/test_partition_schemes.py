@@ -0,0 +1,112 @@
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from isp_trace_parser import get_data, parse_wind_traces
+from isp_trace_parser.wind_traces import WindMetadataFilter
+
+
+@pytest.fixture(scope="module")
+def half_year_directory(tmp_path_factory):
+    parsed_directory = tmp_path_factory.mktemp("half_year")
+    parse_wind_traces(
+        "example_input_data/wind",
+        parsed_directory,
+        use_concurrency=False,
+        filters=WindMetadataFilter(reference_year=[2011]),
+    )
+    return parsed_directory
+
+
+@pytest.mark.parametrize("partition_scheme", ["year", "financial_year", "whole_trace"])
+@pytest.mark.parametrize("year_type", ["fy", "calendar"])
+def test_get_data_reads_all_partition_schemes(
+    tmp_path, half_year_directory, partition_scheme, year_type
+):
+    parse_wind_traces(
+        "example_input_data/wind",
+        tmp_path,
+        use_concurrency=False,
+        filters=WindMetadataFilter(reference_year=[2011]),
+        partition_scheme=partition_scheme,
+    )
+    assert not list(tmp_path.rglob("*HalfYear*.parquet"))
+
+    kwargs = dict(
+        start_year=2030,
+        end_year=2032,
+        reference_year=2011,
+        project="Bango 973 Wind Farm",
+        year_type=year_type,
+    )
+    expected = get_data.wind_project_single_reference_year(
+        directory=half_year_directory, **kwargs
+    )
+    result = get_data.wind_project_single_reference_year(directory=tmp_path, **kwargs)
+    assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+
+    reference_years = {2030: 2011, 2031: 2011}
+    expected = get_data.wind_area_multiple_reference_years(
+        reference_years, "Q1", "WH", half_year_directory, year_type
+    )
+    result = get_data.wind_area_multiple_reference_years(
+        reference_years, "Q1", "WH", tmp_path, year_type
+    )
+    assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_parsing_with_a_different_partition_scheme_raises(tmp_path):
+    filters = WindMetadataFilter(reference_year=[2011], file_type=["area"])
+    parse_wind_traces(
+        "example_input_data/wind", tmp_path, use_concurrency=False, filters=filters
+    )
+    with pytest.raises(ValueError, match="differ"):
+        parse_wind_traces(
+            "example_input_data/wind",
+            tmp_path,
+            use_concurrency=False,
+            filters=filters,
+            partition_scheme="year",
+        )
+
+
+@pytest.mark.parametrize("partition_scheme", ["half_year", "year", "whole_trace"])
+@pytest.mark.parametrize("year_type", ["fy", "calendar"])
+def test_multiple_reference_years_matches_single_years(
+    tmp_path, partition_scheme, year_type
+):
+    parse_wind_traces(
+        "example_input_data/wind",
+        tmp_path,
+        use_concurrency=False,
+        filters=WindMetadataFilter(reference_year=[2011, 2012], file_type=["area"]),
+        partition_scheme=partition_scheme,
+    )
+    reference_years = {2032: 2012, 2030: 2011, 2031: 2012}
+    result = get_data.wind_area_multiple_reference_years(
+        reference_years, "Q1", "WH", tmp_path, year_type
+    )
+    expected = pd.concat(
+        get_data.wind_area_single_reference_year(
+            year, year, reference_year, "Q1", "WH", tmp_path, year_type
+        )
+        for year, reference_year in reference_years.items()
+    )
+    assert_frame_equal(result, expected)
+
+
+def test_aligned_partitions_are_read_by_one_scan(half_year_directory):
+    query = get_data.scan_trace_data(
+        "wind_area",
+        [(2030, 2030, 2011), (2031, 2031, 2011)],
+        "fy",
+        half_year_directory,
+        area="Q1",
+        resource_quality="WH",
+    )
+    assert query.explain().count("SCAN") == 1
+
+
+def test_store_options_file_ends_with_a_newline(half_year_directory):
+    options = (half_year_directory / "parse_options.json").read_text()
+    assert options.endswith("}\n")
@@ -0,0 +1,183 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+from pandas.testing import assert_frame_equal
+
+from isp_trace_parser import (
+    WindMetadataFilter,
+    disable_query_cache,
+    enable_query_cache,
+    get_data,
+    parse_wind_traces,
+)
+from isp_trace_parser.query_cache import QueryCache
+
+WIND_DIRECTORY = "example_parsed_data/wind"
+REFERENCE_YEARS = {2030: 2011, 2031: 2012, 2029: 2011}
+
+
+@pytest.fixture
+def query_cache(tmp_path):
+    yield enable_query_cache(tmp_path / "cache")
+    disable_query_cache()
+
+
+def _read_multiple(directory=WIND_DIRECTORY, output_format="pandas"):
+    return get_data.wind_area_multiple_reference_years(
+        REFERENCE_YEARS, "Q1", "WH", directory, output_format=output_format
+    )
+
+
+def _read_single(directory=WIND_DIRECTORY):
+    return get_data.wind_area_single_reference_year(
+        2029, 2031, 2011, "Q1", "WH", directory, output_format="polars"
+    )
+
+
+def test_cached_results_match_uncached_results(query_cache):
+    disable_query_cache()
+    expected = [
+        _read_multiple(),
+        _read_multiple(output_format="polars"),
+        _read_single(),
+    ]
+    query_cache = enable_query_cache(query_cache.directory)
+    for _ in range(2):
+        assert_frame_equal(_read_multiple(), expected[0])
+        assert _read_multiple(output_format="polars").equals(expected[1])
+        assert _read_single().equals(expected[2])
+    stats = query_cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (3, 3, 3)
+
+
+def test_rewritten_source_files_are_read_again(query_cache, tmp_path):
+    parse_wind_traces(
+        "example_input_data/wind",
+        tmp_path / "wind",
+        use_concurrency=False,
+        filters=WindMetadataFilter(reference_year=[2011]),
+    )
+    original = _read_single(tmp_path / "wind")
+    (rewritten_file,) = (tmp_path / "wind").rglob("*_Q1_WH_HalfYear2030-1.parquet")
+    pl.read_parquet(rewritten_file).head(100).write_parquet(rewritten_file)
+    stat = os.stat(rewritten_file)
+    os.utime(rewritten_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    result = _read_single(tmp_path / "wind")
+    assert result.height < original.height
+    assert query_cache.stats().misses == 2
+
+
+def test_corrupt_entries_are_read_again(query_cache):
+    expected = _read_single()
+    (entry,) = query_cache.directory.glob("*.arrow")
+    entry.write_bytes(b"not an arrow file")
+    assert _read_single().equals(expected)
+    assert query_cache.stats().misses == 2
+    assert _read_single().equals(expected)
+    assert query_cache.stats().hits == 1
+
+
+def test_empty_entries_are_deleted(tmp_path):
+    cache = QueryCache(tmp_path)
+    (tmp_path / "a.arrow").write_bytes(b"")
+    assert cache.get("a") is None
+    assert not (tmp_path / "a.arrow").exists()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    data = pl.DataFrame({"Value": [0.0] * 1000})
+    cache = QueryCache(tmp_path)
+    cache.put("a", data)
+    entry_size = cache.stats().size_bytes
+    cache = QueryCache(tmp_path, max_bytes=2 * entry_size)
+    cache.put("b", data)
+    os.utime(tmp_path / "a.arrow", ns=(0, 0))
+    os.utime(tmp_path / "b.arrow", ns=(1, 1))
+    cache.get("a")
+    cache.put("c", data)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.arrow", "c.arrow"]
+    assert cache.stats().evictions == 1
+
+
+def test_entries_that_cant_be_removed_are_skipped_when_evicting(tmp_path, monkeypatch):
+    data = pl.DataFrame({"Value": [0.0] * 1000})
+    cache = QueryCache(tmp_path)
+    for key in ["a", "b"]:
+        cache.put(key, data)
+    entry_size = cache.stats().size_bytes // 2
+    os.utime(tmp_path / "a.arrow", ns=(0, 0))
+    os.utime(tmp_path / "b.arrow", ns=(1, 1))
+    unlink = Path.unlink
+
+    def unlink_unless_open(path, missing_ok=False):
+        if path.name == "a.arrow":
+            raise PermissionError(f"{path} is open in another process.")
+        unlink(path, missing_ok)
+
+    monkeypatch.setattr(Path, "unlink", unlink_unless_open)
+    cache = QueryCache(tmp_path, max_bytes=2 * entry_size)
+    cache.put("c", data)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.arrow", "c.arrow"]
+    assert cache.stats().evictions == 1
+
+
+def test_entries_evicted_while_being_read_are_hits(tmp_path, monkeypatch):
+    cache = QueryCache(tmp_path)
+    cache.put("a", pl.DataFrame({"Value": [0.0]}))
+
+    def evicted(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted)
+    assert cache.get("a").height == 1
+    assert (cache.stats().hits, cache.stats().misses) == (1, 0)
+
+
+def test_results_that_cant_be_saved_are_skipped(tmp_path, monkeypatch):
+    def entry_open(source, destination):
+        raise PermissionError(f"{destination} is open in another process.")
+
+    monkeypatch.setattr(os, "replace", entry_open)
+    cache = QueryCache(tmp_path)
+    cache.put("a", pl.DataFrame({"Value": [0.0]}))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_results_larger_than_the_budget_are_not_saved(tmp_path):
+    cache = QueryCache(tmp_path, max_bytes=10)
+    cache.put("a", pl.DataFrame({"Value": [0.0] * 1000}))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_entries_are_shared_between_processes(tmp_path):
+    code = (
+        "from isp_trace_parser import enable_query_cache, get_data; "
+        f"enable_query_cache({str(tmp_path)!r}); "
+        f"get_data.wind_area_multiple_reference_years({REFERENCE_YEARS!r}, 'Q1', 'WH', {WIND_DIRECTORY!r})"
+    )
+    processes = [subprocess.Popen([sys.executable, "-c", code]) for _ in range(3)]
+    assert all(process.wait() == 0 for process in processes)
+    assert [p.suffix for p in tmp_path.iterdir()] == [".arrow"]
+
+    cache = enable_query_cache(tmp_path)
+    try:
+        result = _read_multiple()
+    finally:
+        disable_query_cache()
+    assert cache.stats().hits == 1
+    assert_frame_equal(result, _read_multiple())
+
+
+def test_clear_removes_entries(query_cache):
+    _read_single()
+    query_cache.clear()
+    assert query_cache.stats() == (0, 0, 0, 0, 0, query_cache.max_bytes)
+
+
+def test_negative_budget_raises(tmp_path):
+    with pytest.raises(ValueError):
+        QueryCache(tmp_path, max_bytes=-1)
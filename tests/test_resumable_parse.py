@@ -0,0 +1,118 @@
+import json
+import shutil
+
+import pytest
+
+from isp_trace_parser import parse_demand_traces
+from isp_trace_parser.manifest import JOURNAL_FILENAME, read_manifest
+
+INPUT_FILES = [
+    "CNSW_RefYear_2011_HYDROGEN_EXPORT_POE10_OPSO_MODELLING.csv",
+    "CNSW_RefYear_2012_HYDROGEN_EXPORT_POE10_OPSO_MODELLING.csv",
+]
+
+
+@pytest.fixture
+def input_directory(tmp_path):
+    directory = tmp_path / "input"
+    directory.mkdir()
+    for filename in INPUT_FILES:
+        shutil.copy(f"example_input_data/demand/{filename}", directory / filename)
+    return directory
+
+
+def _break_file(filepath):
+    filepath.write_text("Year,Month,Day,01\n2030,1,1,not_a_number\n")
+
+
+def _parse(input_directory, parsed_directory, **kwargs):
+    return parse_demand_traces(
+        input_directory, parsed_directory, use_concurrency=False, **kwargs
+    )
+
+
+def test_failing_trace_is_collected_and_others_are_parsed(tmp_path, input_directory):
+    parsed_directory = tmp_path / "parsed"
+    _break_file(input_directory / INPUT_FILES[0])
+
+    errors = _parse(input_directory, parsed_directory, errors="collect")
+
+    assert len(errors) == 1
+    assert errors[0]["stage"] == "parsing"
+    assert errors[0]["files"] == [str(input_directory / INPUT_FILES[0])]
+    assert any(parsed_directory.rglob("*RefYear2012*.parquet"))
+    assert not any(parsed_directory.rglob("*RefYear2011*.parquet"))
+    with open(parsed_directory / "parse_errors.json") as f:
+        assert json.load(f) == errors
+    assert len(read_manifest(parsed_directory)) == 1
+
+    shutil.copy(
+        f"example_input_data/demand/{INPUT_FILES[0]}", input_directory / INPUT_FILES[0]
+    )
+    assert _parse(input_directory, parsed_directory, errors="collect") == []
+    assert not (parsed_directory / "parse_errors.json").exists()
+
+
+def test_failing_trace_is_raised_by_default(tmp_path, input_directory):
+    _break_file(input_directory / INPUT_FILES[0])
+    with pytest.raises(Exception):
+        _parse(input_directory, tmp_path / "parsed")
+
+
+def test_unexpected_filename_is_collected(tmp_path, input_directory):
+    parsed_directory = tmp_path / "parsed"
+    (input_directory / INPUT_FILES[0]).rename(
+        input_directory / "CNSW_RefYear_2011_UNKNOWN_SCENARIO_OPSO_MODELLING.csv"
+    )
+
+    errors = _parse(input_directory, parsed_directory, errors="collect")
+
+    assert [e["stage"] for e in errors] == ["planning"]
+    assert any(parsed_directory.rglob("*RefYear2012*.parquet"))
+
+
+def test_interrupted_run_resumes_from_journal(tmp_path, input_directory):
+    parsed_directory = tmp_path / "parsed"
+    _parse(input_directory, parsed_directory)
+    manifest = read_manifest(parsed_directory)
+    completed_key = next(k for k in manifest if "RefYear2012" in k)
+
+    # Simulate a run that was stopped after saving the 2012 trace.
+    (parsed_directory / "parse_manifest.json").unlink()
+    with open(parsed_directory / JOURNAL_FILENAME, "w") as f:
+        f.write(json.dumps({"key": completed_key, "entry": manifest[completed_key]}))
+        f.write('\n{"key": "partly written')
+    completed_outputs = {
+        p: p.stat().st_mtime_ns for p in parsed_directory.rglob("*RefYear2012*.parquet")
+    }
+    other_outputs = {
+        p: p.stat().st_mtime_ns for p in parsed_directory.rglob("*RefYear2011*.parquet")
+    }
+
+    _parse(input_directory, parsed_directory)
+
+    assert {p: p.stat().st_mtime_ns for p in completed_outputs} == completed_outputs
+    assert all(p.stat().st_mtime_ns != t for p, t in other_outputs.items())
+    assert not (parsed_directory / JOURNAL_FILENAME).exists()
+    assert read_manifest(parsed_directory) == manifest
+
+
+def test_failing_trace_is_retried(tmp_path, input_directory, monkeypatch):
+    from isp_trace_parser import scheduler
+
+    calls = []
+    run_parse_task = scheduler.run_parse_task
+
+    def flaky_run_parse_task(task, **kwargs):
+        calls.append(task)
+        if len(calls) == 1:
+            raise OSError("Temporary failure")
+        return run_parse_task(task, **kwargs)
+
+    monkeypatch.setattr(scheduler, "run_parse_task", flaky_run_parse_task)
+    errors = _parse(
+        input_directory, tmp_path / "parsed", errors="collect", max_retries=1
+    )
+
+    assert errors == []
+    assert len(calls) == 3
@@ -0,0 +1,95 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from isp_trace_parser import parse_all_traces, parse_wind_traces
+from isp_trace_parser.manifest import read_manifest
+from isp_trace_parser.scheduler import estimate_task_cost, select_shard
+from isp_trace_parser.trace_restructure_helper_functions import ParseTask
+
+PARSE_SHARD = """
+import sys
+from isp_trace_parser import parse_all_traces
+
+parse_all_traces(
+    sys.argv[1],
+    solar_input_directory="example_input_data/solar",
+    wind_input_directory="example_input_data/wind",
+    demand_input_directory="example_input_data/demand",
+    use_concurrency=False,
+    shard_index=int(sys.argv[2]),
+    num_shards=int(sys.argv[3]),
+)
+"""
+
+
+def _parquet_files(directory: Path) -> list[Path]:
+    return sorted(p.relative_to(directory) for p in directory.rglob("*.parquet"))
+
+
+def _task(tmp_path, name, size):
+    filepath = tmp_path / f"{name}.csv"
+    filepath.write_bytes(b"0" * size)
+    return ParseTask(
+        [filepath], {"name": name}, lambda m: f"{m['name']}.parquet", tmp_path
+    )
+
+
+def test_shards_are_disjoint_and_balanced(tmp_path):
+    sizes = [9, 8, 7, 6, 5, 4, 3, 2, 1, 1]
+    tasks = [_task(tmp_path, f"t{i}", s * 1_000_000) for i, s in enumerate(sizes)]
+    shards = [select_shard(tasks, i, 3) for i in range(3)]
+
+    assert sorted(id(t) for shard in shards for t in shard) == sorted(
+        id(t) for t in tasks
+    )
+    assert [select_shard(list(reversed(tasks)), i, 3) for i in range(3)] == shards
+    costs = [sum(estimate_task_cost(t) for t in shard) for shard in shards]
+    assert max(costs) - min(costs) <= max(estimate_task_cost(t) for t in tasks)
+
+
+def test_invalid_shards_raise(tmp_path):
+    with pytest.raises(ValueError, match="shard_index"):
+        select_shard([], 2, 2)
+    with pytest.raises(ValueError, match="consolidated"):
+        parse_wind_traces(
+            "example_input_data/wind",
+            tmp_path,
+            output_layout="consolidated",
+            shard_index=0,
+            num_shards=2,
+        )
+
+
+def test_shards_parsed_in_separate_processes_match_single_parse(tmp_path):
+    single = tmp_path / "single"
+    parse_all_traces(
+        single,
+        solar_input_directory="example_input_data/solar",
+        wind_input_directory="example_input_data/wind",
+        demand_input_directory="example_input_data/demand",
+        use_concurrency=False,
+    )
+
+    sharded = tmp_path / "sharded"
+    num_shards = 3
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", PARSE_SHARD, str(sharded), str(i), str(num_shards)]
+        )
+        for i in range(num_shards)
+    ]
+    assert [p.wait() for p in processes] == [0] * num_shards
+
+    assert _parquet_files(sharded) == _parquet_files(single)
+    for trace_type in ["solar", "wind", "demand"]:
+        shard_manifests = [
+            read_manifest(
+                sharded / trace_type, f"parse_manifest.shard{i}of{num_shards}.json"
+            )
+            for i in range(num_shards)
+        ]
+        keys = [key for manifest in shard_manifests for key in manifest]
+        assert sorted(keys) == sorted(read_manifest(single / trace_type))
@@ -0,0 +1,55 @@
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from isp_trace_parser import trace_formatter
+from isp_trace_parser.trace_restructure_helper_functions import (
+    read_format_and_average_traces,
+    read_trace_csv,
+)
+
+TEST_TRACE = (
+    "tests/test_data/demand/demand_CNSW_Green Energy Exports"
+    "/CNSW_RefYear_2011_HYDROGEN_EXPORT_POE10_OPSO_MODELLING.csv"
+)
+
+
+def _write_scaled_copies(tmp_path, scales):
+    trace = read_trace_csv(TEST_TRACE)
+    files = []
+    for i, scale in enumerate(scales):
+        scaled = trace.with_columns(pl.col(f"{j:02d}") * scale for j in range(1, 49))
+        files.append(tmp_path / f"trace_{i}.csv")
+        scaled.write_csv(files[-1])
+    return files
+
+
+def _group_by_average(files):
+    traces = [trace_formatter(read_trace_csv(f)) for f in files]
+    return (
+        pl.concat(traces)
+        .group_by("Datetime")
+        .agg(pl.col("Value").mean())
+        .sort("Datetime")
+    )
+
+
+def test_aligned_traces_averaged_by_position(tmp_path):
+    files = _write_scaled_copies(tmp_path, [1.0, 2.0, 4.5])
+    average = read_format_and_average_traces(files)
+    assert_frame_equal(average, _group_by_average(files))
+
+
+def test_unaligned_traces_averaged_by_datetime(tmp_path):
+    files = _write_scaled_copies(tmp_path, [1.0, 2.0, 3.0, 0.5])
+    read_trace_csv(files[2]).slice(10).write_csv(files[2])
+    average = read_format_and_average_traces(files)
+    assert_frame_equal(average, _group_by_average(files))
+
+
+def test_missing_values_excluded_from_average(tmp_path):
+    files = _write_scaled_copies(tmp_path, [1.0, 2.0])
+    trace = read_trace_csv(files[0])
+    trace.with_columns(pl.lit(None, pl.Float64).alias("03")).write_csv(files[0])
+    average = read_format_and_average_traces(files)
+    assert_frame_equal(average, _group_by_average(files))
+    assert average["Value"].null_count() == 0
@@ -1,3 +1,5 @@
+import pytest
+
 from isp_trace_parser import metadata_extractors
 
 
@@ -53,3 +55,47 @@ def test_demand_trace_metadata_extraction():
     assert metadata["scenario"] == "STEP_CHANGE"
     assert metadata["poe"] == "POE10"
     assert metadata["demand_type"] == "OPSO_MODELLING"
+
+
+@pytest.mark.parametrize(
+    "trace_type, filenames",
+    [
+        (
+            "solar",
+            [
+                "Woolooga_SAT_RefYear2023.csv",
+                "Darling_Downs_FFP_RefYear2023.csv",
+                "REZ_N0_NSW_Non-REZ_CST_RefYear2023.csv",
+                "notes.csv",
+            ],
+        ),
+        (
+            "wind",
+            [
+                "ARWF1_RefYear2023.csv",
+                "CAPTL_WF_RefYear2023.csv",
+                "N8_WH_Cooma-Monaro_RefYear2023.csv",
+                "notes.csv",
+            ],
+        ),
+        (
+            "demand",
+            [
+                "VIC_RefYear_2011_STEP_CHANGE_POE10_OPSO_MODELLING.csv",
+                "CNSW_RefYear_2012_HYDROGEN_EXPORT_POE50_PV_TOT.csv",
+                "VIC_RefYear_2011.csv",
+            ],
+        ),
+    ],
+)
+def test_metadata_table_matches_single_file_extraction(trace_type, filenames):
+    extract = getattr(metadata_extractors, f"extract_{trace_type}_trace_metadata")
+    table = metadata_extractors.extract_metadata_table(filenames, trace_type)
+
+    for row in table.iter_rows(named=True):
+        filename, matched = row.pop("filename"), row.pop("matched")
+        if not matched:
+            with pytest.raises(ValueError):
+                extract(filename)
+            continue
+        assert {k: v for k, v in row.items() if v is not None} == extract(filename)
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 import polars as pl
 from polars.testing import assert_frame_equal
 
@@ -58,3 +60,38 @@ def test_trace_formatter():
     )
 
     assert_frame_equal(original_trace_data, formatted_data)
+
+
+def test_trace_formatter_unpadded_column_names():
+    padded = pl.DataFrame(
+        {
+            "Year": [2024, 2024],
+            "Month": [12, 12],
+            "Day": [30, 31],
+            **{f"{i:02d}": [float(i), float(i + 100)] for i in range(1, 49)},
+        }
+    )
+    unpadded = padded.rename({f"{i:02d}": str(i) for i in range(1, 10)})
+    formatted = trace_formatter(unpadded)
+    assert_frame_equal(formatted, trace_formatter(padded))
+    assert formatted["Datetime"][0] == datetime(2024, 12, 30, 0, 30)
+    assert formatted["Datetime"][-1] == datetime(2025, 1, 1, 0, 0)
+
+
+def test_trace_formatter_reshape_matches_unpivot():
+    filepath = (
+        "tests/test_data/demand/demand_CNSW_Green Energy Exports"
+        "/CNSW_RefYear_2011_HYDROGEN_EXPORT_POE10_OPSO_MODELLING.csv"
+    )
+    trace_data = trace_restructure_helper_functions.read_trace_csv(filepath)
+    assert_frame_equal(
+        trace_formatter(trace_data, method="reshape"), trace_formatter(trace_data)
+    )
+
+    # Days out of order and missing values.
+    trace_data = trace_data.reverse().with_columns(
+        pl.when(pl.col("Day") == 3).then(None).otherwise(pl.col("05")).alias("05")
+    )
+    reshaped = trace_formatter(trace_data, method="reshape")
+    assert_frame_equal(reshaped, trace_formatter(trace_data))
+    assert reshaped["Value"].null_count() > 0
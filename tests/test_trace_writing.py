@@ -0,0 +1,46 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from isp_trace_parser import trace_formatter
+from isp_trace_parser.parsed_store import add_partition_as_column
+from isp_trace_parser.trace_restructure_helper_functions import (
+    read_trace_csv,
+    write_trace_partitions,
+)
+from isp_trace_parser.wind_traces import write_output_wind_area_filepath
+
+
+@pytest.mark.parametrize("max_write_workers", [None, 4])
+@pytest.mark.parametrize(
+    "partition_scheme", ["half_year", "year", "financial_year", "whole_trace"]
+)
+def test_write_trace_partitions(tmp_path, max_write_workers, partition_scheme):
+    trace = read_trace_csv(
+        "tests/test_data/demand/demand_CNSW_Green Energy Exports"
+        "/CNSW_RefYear_2011_HYDROGEN_EXPORT_POE10_OPSO_MODELLING.csv"
+    )
+    trace = add_partition_as_column(
+        trace_formatter(trace, method="reshape"), partition_scheme
+    )
+    metadata = {
+        "name": "N1",
+        "reference_year": 2011,
+        "resource_quality": "WH",
+        "file_type": "area",
+    }
+    write_trace_partitions(
+        trace,
+        metadata,
+        tmp_path,
+        write_output_wind_area_filepath,
+        max_write_workers=max_write_workers,
+    )
+    assert "partition" not in metadata
+
+    for partition, chunk in trace.group_by("Partition"):
+        filepath = tmp_path / write_output_wind_area_filepath(
+            {**metadata, "partition": partition[0]}
+        )
+        assert_frame_equal(pl.read_parquet(filepath), chunk.drop("Partition"))
+    assert len(list(tmp_path.rglob("*.parquet"))) == trace["Partition"].n_unique()